@@ -0,0 +1,116 @@
+"""
+Micro-benchmark for answer extraction over large synthetic responses.
+
+Compares the compiled engine in src/answer_extraction.py with the previous
+per-call implementations (kept below as references) and checks that both
+return the same answers.
+
+Usage:
+    python benchmarks/bench_answer_extraction.py [--size CHARS] [--repeat N]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.answer_extraction import AnswerExtractor, CONCLUSION_PATTERNS
+
+def legacy_extract_step_answer(text):
+    """DynamicChainOfThought._extract_answer before the shared engine."""
+    delimiter_pattern = f"FINAL_ANSWER:(.*?)END_ANSWER"
+    delimiter_match = re.search(delimiter_pattern, text, re.DOTALL)
+    if delimiter_match:
+        return True, delimiter_match.group(1).strip()
+    for pattern in CONCLUSION_PATTERNS:
+        match = re.search(pattern, text)
+        if match:
+            return True, text[match.end():].strip()
+    if re.search(r'\d+\.?\d*', text):
+        return False, None
+    paragraphs = text.split('\n\n')
+    return False, paragraphs[-1].strip()
+
+def legacy_extract_answer(text):
+    """validation_test.extract_answer before the shared engine."""
+    delimiter_match = re.search(r"FINAL_ANSWER:(.*?)END_ANSWER", text, re.DOTALL)
+    if delimiter_match:
+        answer_text = re.sub(r'^\[|\]$', '', delimiter_match.group(1).strip()).strip()
+        try:
+            return str(float(answer_text))
+        except ValueError:
+            return answer_text
+    fraction_match = re.search(r'\b(\d+)/(\d+)\b', text)
+    if fraction_match:
+        numerator = int(fraction_match.group(1))
+        denominator = int(fraction_match.group(2))
+        if denominator != 0:
+            return str(round(numerator / denominator, 2))
+    percent_match = re.search(r'(\d+\.?\d*)%', text)
+    if percent_match:
+        return percent_match.group(1)
+    numbers = re.findall(r'\b\d+\.?\d*\b', text)
+    if numbers:
+        return numbers[-1]
+    return None
+
+SENTENCES = [
+    "Let me consider the information given in the problem carefully.",
+    "The train travels at 60 miles per hour for 2.5 hours.",
+    "Multiplying the two values gives the distance covered.",
+    "We have 20 chickens with 2 legs each and 15 cows with 4 legs each.",
+    "If we remove 25% of the liquid, 75% of the original mixture remains.",
+    "The probability of this outcome is 2/3 when we switch doors.",
+    "Next, I will verify each intermediate value before moving on.",
+]
+
+ENDINGS = {
+    "no conclusion": "",
+    "conclusion phrase": " Therefore, the answer is 150 miles.",
+    "delimited answer": " FINAL_ANSWER: 150.00 END_ANSWER",
+}
+
+def synthetic_response(size, ending, rng):
+    """Build a reasoning-like response of about `size` characters."""
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+        if rng.random() < 0.1:
+            parts.append("\n\n")
+    return " ".join(parts) + ending
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=20000, help="approximate characters per response")
+    parser.add_argument("--repeat", type=int, default=200, help="extractions per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    extractor = AnswerExtractor()
+
+    print(f"Answer extraction on ~{args.size}-character responses ({args.repeat} runs each)\n")
+    print(f"{'response':<20} {'function':<22} {'legacy us':>10} {'engine us':>10} {'speedup':>8}")
+    print("-" * 74)
+
+    for name, ending in ENDINGS.items():
+        text = synthetic_response(args.size, ending, rng)
+        cases = [
+            ("extract_step_answer", legacy_extract_step_answer, extractor.extract_step_answer),
+            ("extract_answer", legacy_extract_answer, lambda text: extractor.extract(text).text),
+        ]
+        for function, legacy, engine in cases:
+            if legacy(text) != engine(text):
+                raise SystemExit(f"Mismatch for {function} on '{name}': {legacy(text)!r} != {engine(text)!r}")
+            legacy_us = min(timeit.repeat(lambda: legacy(text), number=args.repeat, repeat=3)) / args.repeat * 1e6
+            engine_us = min(timeit.repeat(lambda: engine(text), number=args.repeat, repeat=3)) / args.repeat * 1e6
+            print(f"{name:<20} {function:<22} {legacy_us:>10.1f} {engine_us:>10.1f} {legacy_us / engine_us:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark batch-API mode against interactive requests on the same quota.
+
+Solves a dataset with ChainOfThought twice against the mock provider:
+
+- interactive: every step is its own request through the per-minute rate limiter,
+- batch: every step of every chain goes out in one job per wave to a
+  LocalBatchServer, whose requests do not count against that limiter.
+
+Reports wall time, solves per second, API calls made against the provider
+(requests, or job submissions and status polls) and solves per API call.
+
+Usage:
+    python benchmarks/bench_batch.py [--questions N] [--steps N] [--requests-per-min N]
+        [--latency SECONDS] [--turnaround SECONDS] [--workers N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_api import LocalBatchBackend, LocalBatchServer
+from src.chain_of_thought import ChainOfThought
+from src.mock_client import LatencyModel, MockClient
+from src.rate_limiter import RateLimiter
+
+class CountingBackend(LocalBatchBackend):
+    """LocalBatchBackend that counts the API calls a real provider would see."""
+
+    calls = 0
+
+    def submit(self, lines):
+        self.calls += 1
+        return super().submit(lines)
+
+    def status(self, job_id):
+        self.calls += 1
+        return super().status(job_id)
+
+def run(cot, questions, steps):
+    """Solve every question concurrently and return the wall time."""
+    async def solve_all():
+        async for _ in cot.solve_many_async(questions, concurrency=len(questions), steps=steps):
+            pass
+
+    start = time.perf_counter()
+    asyncio.run(solve_all())
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-API mode against interactive requests on one quota.")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--requests-per-min", type=float, default=1200, help="interactive request quota")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per request")
+    parser.add_argument("--turnaround", type=float, default=1.0, help="simulated queueing per batch job in seconds")
+    parser.add_argument("--workers", type=int, default=64, help="requests the batch server processes at once")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    questions = [f"Problem {index}: what is {index} + {index}?" for index in range(args.questions)]
+    latency = LatencyModel(args.latency, "lognormal", 0.5)
+    rows = []
+
+    interactive = ChainOfThought(provider="mock", steps_to_answer=args.steps, latency=latency,
+                                 rate_limiter=RateLimiter(args.requests_per_min, burst=1))
+    seconds = run(interactive, questions, args.steps)
+    rows.append(("interactive", seconds, interactive.client.calls))
+
+    with tempfile.TemporaryDirectory() as directory:
+        server_client = MockClient(steps_to_answer=args.steps, latency=latency, rate_limiter=RateLimiter(10 ** 9))
+        server = LocalBatchServer(directory, server_client, workers=args.workers, turnaround=args.turnaround).start()
+        backend = CountingBackend(directory)
+        batched = ChainOfThought(provider="mock", batch=backend, quiet_period=0.05, poll_interval=0.1,
+                                 rate_limiter=RateLimiter(args.requests_per_min, burst=1))
+        try:
+            seconds = run(batched, questions, args.steps)
+        finally:
+            server.stop()
+        rows.append((f"batch ({batched.client.waves} jobs)", seconds, backend.calls))
+
+    print(f"{args.questions} questions x {args.steps} steps, {args.requests_per_min:g} requests/min quota, "
+          f"{args.latency * 1000:.0f} ms per request, {args.turnaround:g} s batch turnaround\n")
+    print(f"{'mode':<18} {'seconds':>9} {'solves/s':>9} {'API calls':>10} {'solves/call':>12}")
+    print("-" * 62)
+    for label, seconds, calls in rows:
+        print(f"{label:<18} {seconds:>9.2f} {args.questions / seconds:>9.1f} {calls:>10} {args.questions / calls:>12.2f}")
+
+if __name__ == "__main__":
+    main()
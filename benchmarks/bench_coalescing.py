@@ -0,0 +1,78 @@
+"""
+Benchmark single-flight request coalescing with solver variants run side by side.
+
+Solves the same questions at temperature 0 with two ChainOfThought solvers
+that differ only in the steps they are asked for, both at once against the
+same mock model.
+The two variants send identical prompts until their chains diverge. The run
+is repeated with coalesce=False, and the script reports wall time, upstream
+calls and calls saved.
+
+Usage:
+    python benchmarks/bench_coalescing.py [--questions N] [--steps 3,5] [--concurrency N] [--latency SECONDS]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.chain_of_thought import ChainOfThought
+from src.mock_client import LatencyModel
+from src.rate_limiter import RateLimiter
+
+def run(questions, variants, concurrency, latency, coalesce):
+    """Solve the questions with every variant at once; return (seconds, upstream calls)."""
+    rate_limiter = RateLimiter(10 ** 9)
+    solvers = [
+        ChainOfThought(provider="mock", steps_to_answer=max(variants), latency=latency, rate_limiter=rate_limiter,
+                       coalesce=coalesce)
+        for _ in variants
+    ]
+
+    async def solve_all():
+        async def drain(cot, steps):
+            async for _ in cot.solve_many_async(questions, concurrency=concurrency, steps=steps, temperature=0):
+                pass
+        await asyncio.gather(*(drain(cot, steps) for cot, steps in zip(solvers, variants)))
+
+    start = time.perf_counter()
+    asyncio.run(solve_all())
+    seconds = time.perf_counter() - start
+    # Each solver has its own mock client underneath the single-flight wrapper
+    return seconds, sum(cot.client.calls for cot in solvers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight coalescing with solver variants side by side.")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--steps", default="3,5", help="comma-separated step counts of the variants")
+    parser.add_argument("--concurrency", type=int, default=200, help="concurrent solves per variant")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per request")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    questions = [f"Problem {index}: what is {index} + {index}?" for index in range(args.questions)]
+    variants = [int(steps) for steps in args.steps.split(",")]
+    latency = LatencyModel(args.latency, "lognormal", 0.3)
+
+    rows = []
+    for coalesce in (False, True):
+        metrics.REGISTRY.reset()
+        seconds, calls = run(questions, variants, args.concurrency, latency, coalesce)
+        coalesced = metrics.COALESCED_REQUESTS.get(provider="mock", model="mock-model")
+        rows.append(("coalesced" if coalesce else "independent", seconds, calls, coalesced))
+
+    print(f"{args.questions} questions x variants with steps {args.steps}, temperature 0, "
+          f"{args.latency * 1000:.0f} ms per request\n")
+    print(f"{'mode':<12} {'seconds':>9} {'upstream calls':>15} {'coalesced':>10}")
+    print("-" * 50)
+    for label, seconds, calls, coalesced in rows:
+        print(f"{label:<12} {seconds:>9.2f} {calls:>15} {coalesced:>10.0f}")
+
+if __name__ == "__main__":
+    main()
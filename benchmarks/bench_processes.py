@@ -0,0 +1,61 @@
+"""
+Benchmark solving in one process against a ProcessPool of worker processes.
+
+Solves the same questions with ChainOfThought against the mock provider,
+first on threads in this process, then sharded across worker processes with
+the same total concurrency. With little simulated latency the Python-side
+work per call dominates, which one process cannot spread across cores.
+
+Usage:
+    python benchmarks/bench_processes.py [--questions N] [--steps N] [--workers N]
+        [--concurrency N] [--latency SECONDS]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chain_of_thought import ChainOfThought
+from src.mock_client import LatencyModel
+from src.process_pool import ProcessPool
+
+def main():
+    parser = argparse.ArgumentParser(description="One process against a pool of worker processes.")
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent solves per process")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds per request")
+    args = parser.parse_args()
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    questions = [f"Problem {index}: what is {index} + {index}?" for index in range(args.questions)]
+    options = dict(provider="mock", steps_to_answer=args.steps, latency=LatencyModel(args.latency),
+                   requests_per_min=10 ** 9)
+    rows = []
+
+    cot = ChainOfThought(**options)
+    start = time.perf_counter()
+    for _ in cot.solve_many(questions, concurrency=args.concurrency * args.workers, steps=args.steps):
+        pass
+    rows.append(("1 process", time.perf_counter() - start))
+
+    with ProcessPool(workers=args.workers, concurrency=args.concurrency, **options) as pool:
+        start = time.perf_counter()
+        for _ in pool.solve_many(questions, steps=args.steps):
+            pass
+        rows.append((f"{args.workers} processes", time.perf_counter() - start))
+
+    print(f"{args.questions} questions x {args.steps} steps, {args.concurrency * args.workers} concurrent solves, "
+          f"{args.latency * 1000:.0f} ms per request, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<14} {'seconds':>9} {'solves/s':>9}")
+    print("-" * 34)
+    for label, seconds in rows:
+        print(f"{label:<14} {seconds:>9.2f} {args.questions / seconds:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark the solvers offline against the mock provider.
+
+Runs the fixed (ChainOfThought, one call per step), single (ChainOfThought
+with mode="single_call"), dynamic (DynamicChainOfThought), speculative
+(DynamicChainOfThought with speculate=True) and direct (single prompt) modes against MockClient with a simulated latency model and reports
+throughput, per-solve latency percentiles, estimated prompt and response
+tokens per solve, and the local overhead per LLM call (wall time not spent in
+simulated latency).
+
+Usage:
+    python benchmarks/bench_solvers.py [--solves N] [--concurrency N] [--latency SECONDS]
+        [--distribution lognormal] [--spread 0.5] [--per-token 0.01] [--failure-rate 0.01] [--modes fixed,single]
+        [--max-steps 10] [--hedge] [--hedge-percentile 0.95]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import threading
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.batch import solve_many
+from src.chain_of_thought import ChainOfThought
+from src.dynamic_cot import DynamicChainOfThought
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import LatencyModel
+from src.rate_limiter import RateLimiter
+
+MODES = ("fixed", "single", "dynamic", "speculative", "direct")
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def build_solver(mode, options, max_steps):
+    """
+    Return (solve, client) for a mode, where solve(question) runs one solve.
+    Every mode gets its own client, limiter and seed so runs are independent.
+    """
+    options = dict(options)
+    options["rate_limiter"] = RateLimiter(options.pop("requests_per_min"))
+    if "hedge" in options:
+        options["hedge"] = dict(options["hedge"], rate_limiter=RateLimiter(options["hedge"]["requests_per_min"]))
+    if mode in ("fixed", "single"):
+        cot = ChainOfThought(provider="mock", **options)
+        cot_mode = "single_call" if mode == "single" else "multi_call"
+        return lambda question: cot.solve(question, steps=options["steps_to_answer"], mode=cot_mode), cot.client
+    if mode in ("dynamic", "speculative"):
+        cot = DynamicChainOfThought(provider="mock", **options)
+        speculate = mode == "speculative"
+        return lambda question: cot.solve(question, max_steps=max_steps, speculate=speculate), cot.client
+    client = LLMClientFactory.create_client(provider="mock", **options)
+    prompt = "Question: {}\n\nSolve this problem step by step."
+    return lambda question: client.generate(prompt.format(question), use_standard_format=True), client
+
+def run_mode(mode, args, options):
+    """Run one mode and return its measurements."""
+    metrics.REGISTRY.reset()
+    solve, client = build_solver(mode, options, args.max_steps)
+    durations = []
+    lock = threading.Lock()
+
+    def timed_solve(question):
+        start = time.perf_counter()
+        result = solve(question)
+        with lock:
+            durations.append(time.perf_counter() - start)
+        return result
+
+    questions = [f"Problem {index}: what is {index} + {index}?" for index in range(args.solves)]
+    start = time.perf_counter()
+    for _ in solve_many(timed_solve, questions, (), concurrency=args.concurrency):
+        pass
+    elapsed = time.perf_counter() - start
+
+    durations.sort()
+    calls = client.calls
+    # The factory's outer wrappers pass the hedged client's secondary through
+    hedged = hasattr(client, "secondary")
+    if hedged:
+        calls += client.secondary.calls
+    if hedged or mode == "speculative":
+        # Lost races and speculation overlap other calls, so simulated time no longer adds up to wall time
+        overhead = None
+    else:
+        overhead = (sum(durations) - client.simulated_seconds) / client.calls
+    labels = {"provider": "mock", "model": client.model_name}
+    return {
+        "solves_per_sec": args.solves / elapsed,
+        "p50": percentile(durations, 0.50),
+        "p99": percentile(durations, 0.99),
+        "calls_per_solve": calls / args.solves,
+        "prompt_tokens_per_solve": metrics.PROMPT_TOKENS.get(**labels)["sum"] / args.solves,
+        "response_tokens_per_solve": metrics.RESPONSE_TOKENS.get(**labels)["sum"] / args.solves,
+        "overhead_per_call": overhead,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline solver benchmark against the mock provider.")
+    parser.add_argument("--solves", type=int, default=200, help="solves per mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent solves")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated modes to run")
+    parser.add_argument("--steps", type=int, default=3, help="steps before the mock model answers")
+    parser.add_argument("--max-steps", type=int, default=10, help="max_steps of the dynamic modes")
+    parser.add_argument("--step-tokens", type=int, default=40, help="approximate tokens per reasoning step")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean time to first token in seconds")
+    parser.add_argument("--distribution", default="fixed", choices=LatencyModel.DISTRIBUTIONS)
+    parser.add_argument("--spread", type=float, default=0.0, help="latency spread (see LatencyModel)")
+    parser.add_argument("--per-token", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of a simulated 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a simulated 429")
+    parser.add_argument("--requests-per-min", type=float, default=10 ** 9, help="client-side rate limit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hedge", action="store_true",
+                        help="hedge slow calls to a second mock provider with the same latency model")
+    parser.add_argument("--hedge-percentile", type=float, default=0.95, help="hedge after this latency percentile")
+    args = parser.parse_args()
+
+    # Simulated failures log a warning per retry; keep the report readable
+    logging.getLogger("src").setLevel(logging.ERROR)
+
+    options = {
+        "steps_to_answer": args.steps,
+        "step_tokens": args.step_tokens,
+        "latency": LatencyModel(args.latency, args.distribution, args.spread, args.per_token),
+        "failure_rate": args.failure_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "retry_delay": 0.0,
+        "seed": args.seed,
+        "requests_per_min": args.requests_per_min,
+    }
+    if args.hedge:
+        options["hedge"] = dict(options, provider="mock", seed=args.seed + 1)
+        options["hedge_percentile"] = args.hedge_percentile
+        options["hedge_delay"] = args.latency * 2
+
+    print(f"{args.solves} solves per mode, concurrency {args.concurrency}, "
+          f"latency {args.distribution} mean {args.latency * 1000:.1f} ms"
+          + (f", hedged at p{args.hedge_percentile * 100:g}" if args.hedge else "") + "\n")
+    print(f"{'mode':<12} {'solves/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'calls/solve':>12} "
+          f"{'prompt tok':>11} {'resp tok':>9} {'overhead us/call':>17}")
+    print("-" * 96)
+    for mode in args.modes.split(","):
+        if mode not in MODES:
+            raise SystemExit(f"Unknown mode: {mode}. Use one of {', '.join(MODES)}.")
+        stats = run_mode(mode, args, options)
+        overhead = "-" if stats["overhead_per_call"] is None else f"{stats['overhead_per_call'] * 1e6:.1f}"
+        print(f"{mode:<12} {stats['solves_per_sec']:>10.1f} {stats['p50'] * 1000:>9.2f} {stats['p99'] * 1000:>9.2f} "
+              f"{stats['calls_per_solve']:>12.2f} {stats['prompt_tokens_per_solve']:>11.0f} "
+              f"{stats['response_tokens_per_solve']:>9.0f} {overhead:>17}")
+
+if __name__ == "__main__":
+    main()
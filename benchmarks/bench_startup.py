@@ -0,0 +1,79 @@
+"""
+Benchmark cold import and startup cost.
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+Reports the median over several runs of:
+
+- importing the factory and the solvers (what every CLI invocation pays),
+- loading each provider on first use (what a run pays for the providers it uses),
+- importing every provider module up front, as the factory used to.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--providers openai,gemini,mock]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child script: time one import statement after `setup`, print seconds as JSON
+CHILD = """
+import json, time
+{setup}
+start = time.perf_counter()
+{statement}
+print(json.dumps(time.perf_counter() - start))
+"""
+
+def measure(statement, setup="", runs=5):
+    """Median seconds `statement` takes in a fresh interpreter, after `setup` has run."""
+    code = CHILD.format(setup=setup, statement=statement)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cold import and provider load times.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement (default: 5)")
+    parser.add_argument("--providers", default="openai,gemini,mock", help="comma-separated providers to load")
+    args = parser.parse_args(argv)
+    providers = args.providers.split(",")
+
+    factory_import = "from src.llm_client_factory import LLMClientFactory"
+    rows = [
+        ("python -c pass", measure("pass", runs=args.runs)),
+        ("import factory", measure(factory_import, runs=args.runs)),
+        ("import solvers", measure(
+            "from src.chain_of_thought import ChainOfThought\nfrom src.dynamic_cot import DynamicChainOfThought",
+            runs=args.runs,
+        )),
+    ]
+    for provider in providers:
+        try:
+            seconds = measure(f"LLMClientFactory.get_provider({provider!r}).load()", setup=factory_import, runs=args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"Could not load provider {provider}: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        rows.append((f"load {provider} (first use)", seconds))
+
+    eager = "\n".join(f"LLMClientFactory.get_provider({provider!r}).load()" for provider in providers)
+    try:
+        rows.append(("all providers up front", measure(f"{factory_import}\n{eager}", runs=args.runs)))
+    except subprocess.CalledProcessError:
+        pass
+
+    print(f"Median of {args.runs} fresh interpreters")
+    print(f"{'':<28}{'ms':>10}")
+    for label, seconds in rows:
+        print(f"{label:<28}{seconds * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
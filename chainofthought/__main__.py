@@ -0,0 +1,149 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add the repository root to the Python path, so the command works from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline import SOLVERS, Pipeline, read_records
+from src.work_queue import QueueWorker, WorkQueue
+
+def add_solver_options(parser, defaults=True):
+    """Add the per-question solver options; without defaults, unset options are left to the records or workers."""
+    def default(value):
+        return value if defaults else None
+
+    parser.add_argument("--solver", default=default("fixed"), choices=SOLVERS, help="default solver (default: fixed)")
+    parser.add_argument("--provider", default=default("openai"), help="default provider (default: openai)")
+    parser.add_argument("--model", help="default model (default: the provider's default)")
+    parser.add_argument("--steps", type=int, default=default(3), help="steps for the fixed solver (default: 3)")
+    parser.add_argument("--max-steps", type=int, default=default(10),
+                        help="max_steps for the dynamic solver (default: 10)")
+    parser.add_argument("--temperature", type=float, default=default(0.7), help="sampling temperature (default: 0.7)")
+    parser.add_argument("--mode", default=default("multi_call"), choices=("multi_call", "single_call"),
+                        help="fixed solver mode (default: multi_call)")
+
+def add_client_options(parser):
+    parser.add_argument("--cache", action="store_true", help="reuse responses from the on-disk cache")
+    parser.add_argument("--requests-per-min", type=float, help="request quota shared by all questions")
+
+def client_options(args):
+    options = {}
+    if args.cache:
+        options["cache"] = True
+    if args.requests_per_min:
+        options["requests_per_min"] = args.requests_per_min
+    return options
+
+def solver_options(args):
+    return {
+        "solver": args.solver, "provider": args.provider, "model": args.model, "steps": args.steps,
+        "max_steps": args.max_steps, "temperature": args.temperature, "mode": args.mode,
+    }
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m chainofthought", description="Chain of Thought command-line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser(
+        "run",
+        help="solve questions from a JSONL stream",
+        description="Solve questions from JSONL (one {\"question\": ...} object per line) and write one JSONL "
+                    "result per question as it finishes. Records may set their own id, solver, provider, model, "
+                    "steps, max_steps, temperature and mode.",
+    )
+    run.add_argument("input", nargs="?", default="-", help="JSONL file of questions, or - for stdin (default: -)")
+    run.add_argument("-o", "--output", default="-", help="JSONL file to append results to, or - for stdout (default: -)")
+    run.add_argument("--checkpoint", help="file of finished ids (default: the output file; needed to resume with stdout)")
+    run.add_argument("--fresh", action="store_true", help="discard the output and checkpoint files instead of resuming")
+    add_solver_options(run)
+    run.add_argument("--concurrency", type=int, default=8, help="questions in flight (default: 8)")
+    add_client_options(run)
+
+    queue = commands.add_parser(
+        "queue",
+        help="share one eval between workers on any number of hosts",
+        description="A SQLite work queue of questions that workers on any host sharing the file lease, "
+                    "solve and write results back to.",
+    )
+    queue_commands = queue.add_subparsers(dest="queue_command", required=True)
+
+    add = queue_commands.add_parser("add", help="add questions from a JSONL stream")
+    add.add_argument("database", help="SQLite queue file (created if missing)")
+    add.add_argument("input", nargs="?", default="-", help="JSONL file of questions, or - for stdin (default: -)")
+    add_solver_options(add, defaults=False)
+
+    work = queue_commands.add_parser("work", help="solve queued questions until none are left")
+    work.add_argument("database", help="SQLite queue file")
+    work.add_argument("--concurrency", type=int, default=8, help="questions in flight (default: 8)")
+    work.add_argument("--lease", type=float, default=300.0,
+                      help="seconds before a dead worker's questions are retried (default: 300)")
+    work.add_argument("--max-attempts", type=int, default=3, help="attempts before a question fails (default: 3)")
+    work.add_argument("--worker-id", help="id recorded on leases (default: <host>-<pid>)")
+    add_solver_options(work)
+    add_client_options(work)
+
+    status = queue_commands.add_parser("status", help="print job counts and quota use")
+    status.add_argument("database", help="SQLite queue file")
+
+    results = queue_commands.add_parser("results", help="write finished results as JSONL")
+    results.add_argument("database", help="SQLite queue file")
+    results.add_argument("-o", "--output", default="-", help="JSONL file to write, or - for stdout (default: -)")
+    results.add_argument("--status", choices=("done", "failed"), help="only jobs in this status (default: both)")
+    return parser.parse_args(argv)
+
+def run_command(args):
+    output = sys.stdout if args.output == "-" else args.output
+    if args.fresh:
+        for path in (args.checkpoint, None if args.output == "-" else args.output):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    with Pipeline(concurrency=args.concurrency, **solver_options(args), **client_options(args)) as pipeline:
+        counts = pipeline.run(read_records(args.input), output, checkpoint=args.checkpoint)
+    print(f"Solved {counts['solved']}, failed {counts['failed']}, skipped {counts['skipped']} already finished",
+          file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+def queue_command(args):
+    if args.queue_command == "add":
+        queue = WorkQueue(args.database)
+        added = queue.add(read_records(args.input), **solver_options(args))
+        print(f"Added {added} questions", file=sys.stderr)
+    elif args.queue_command == "work":
+        queue = WorkQueue(args.database, lease_duration=args.lease, max_attempts=args.max_attempts)
+        worker = QueueWorker(queue, worker_id=args.worker_id, concurrency=args.concurrency,
+                             **solver_options(args), **client_options(args))
+        try:
+            counts = worker.run()
+        finally:
+            worker.close()
+        print(f"Solved {counts['solved']}, failed {counts['failed']}", file=sys.stderr)
+    elif args.queue_command == "status":
+        queue = WorkQueue(args.database)
+        print(json.dumps({"jobs": queue.counts(), "quota_usage": queue.quota_usage()}, indent=2))
+    else:
+        queue = WorkQueue(args.database)
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            for result in queue.results(args.status):
+                output.write(json.dumps(result) + "\n")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    queue.close()
+    return 0
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # Logs go to stderr so results on stdout stay valid JSONL
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "queue":
+        return queue_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -39,26 +39,22 @@ def main():
         }
     ]
     
-    # Process each problem and save results
-    results = []
+    # Solve the problems concurrently; each problem dict carries its own steps and temperature
+    results = [None] * len(problems)
     
-    for problem in problems:
-        print(f"\nSolving {problem['type']} problem with {problem['steps']} steps...")
-        
-        result = cot.solve(
-            question=problem["question"],
-            steps=problem["steps"],
-            temperature=problem["temperature"]
-        )
+    print(f"\nSolving {len(problems)} problems concurrently...")
+    for index, result in cot.solve_many(problems, concurrency=4):
+        problem = problems[index]
         
         # Add problem metadata to result
         result["problem_type"] = problem["type"]
         result["steps_requested"] = problem["steps"]
         result["temperature"] = problem["temperature"]
         
-        results.append(result)
+        results[index] = result
         
         # Print condensed result
+        print(f"\nSolved {problem['type']} problem with {problem['steps']} steps")
         print(f"Question: {result['question']}")
         print(f"Answer: {result['final_answer'][:100]}..." if len(result['final_answer']) > 100 else f"Answer: {result['final_answer']}")
     
@@ -1,20 +1,12 @@
 import sys
 import os
-import re
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.dynamic_cot import DynamicChainOfThought
 from src.gemini_client import GeminiClient
-
-def extract_answer(text):
-    """Extract numerical answers from text."""
-    # Look for numbers in the text
-    numbers = re.findall(r'\b\d+\.?\d*\b', text)
-    if numbers:
-        return numbers[-1]  # Return the last number found
-    return None
+from src.answer_extraction import extract_answer
 
 # Choose a challenging problem (Monty Hall problem, which is often misunderstood)
 problem = {
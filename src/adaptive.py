@@ -0,0 +1,223 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider that has been failing, until the circuit's reset timeout has passed."""
+
+class AdaptiveController:
+    """
+    Shared congestion control for one provider quota: AIMD concurrency and rate, plus a circuit breaker.
+
+    Every client drawing on the same quota goes through the same controller, so
+    the whole process reacts to throttling once instead of each request backing
+    off on its own:
+
+    - Throttling (429 / resource exhausted) multiplies the allowed in-flight
+      requests and the rate limiter's request rate by `decrease`, at most once
+      per round of requests (throttles from requests started before the last
+      decrease are ignored). Each success raises the concurrency limit by
+      1/limit (about one per round) and the rate by `rate_increase`, back up to
+      their maximums.
+    - Other retryable failures (5xx, timeouts, connection errors) count towards
+      the circuit breaker. After `failure_threshold` in a row the circuit opens
+      and calls fail fast with CircuitOpenError. After `reset_timeout` seconds
+      one probe request is let through, and its outcome closes or reopens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, rate_limiter=None, max_concurrency=64, min_concurrency=1, decrease=0.5,
+                 rate_increase=0.05, min_rate_scale=0.05, failure_threshold=5, reset_timeout=30):
+        """
+        Args:
+            rate_limiter (RateLimiter, optional): Limiter whose request rate is scaled down on throttling.
+            max_concurrency (int, optional): Most requests in flight when nothing is throttled. Defaults to 64.
+            min_concurrency (int, optional): Fewest requests in flight however much is throttled. Defaults to 1.
+            decrease (float, optional): Factor applied to concurrency and rate on throttling. Defaults to 0.5.
+            rate_increase (float, optional): Fraction of the full rate restored per success. Defaults to 0.05.
+            min_rate_scale (float, optional): Lowest fraction of the configured rate. Defaults to 0.05.
+            failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to 5.
+            reset_timeout (float, optional): Seconds the circuit stays open before a probe. Defaults to 30.
+        """
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease = decrease
+        self.rate_increase = rate_increase
+        self.min_rate_scale = min_rate_scale
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.limit = float(max_concurrency)
+        self.rate_scale = 1.0
+        self.in_flight = 0
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._async_waiters = []
+
+    def _try_enter(self):
+        """Take a slot if one is free; raise CircuitOpenError while the circuit is open. Call with the lock held."""
+        if self.state != self.CLOSED:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                logger.info("Circuit half-open: letting one probe request through")
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.OPEN or self._probing:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                raise CircuitOpenError(f"Provider circuit is open after {self.consecutive_failures} consecutive failures; "
+                                       f"retry in {retry_in:.0f} seconds")
+        if self.in_flight >= max(self.min_concurrency, int(self.limit)):
+            return None
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+        self.in_flight += 1
+        return time.monotonic()
+
+    def _exit(self, probe):
+        with self._lock:
+            self.in_flight -= 1
+            # A probe that ended without a verdict (e.g. it was cancelled) lets the next request probe
+            if probe and self.state == self.HALF_OPEN:
+                self._probing = False
+            self._notify()
+
+    def _notify(self):
+        """Wake waiting requests to re-check the limit and circuit. Call with the lock held."""
+        self._available.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    @contextlib.contextmanager
+    def slot(self):
+        """
+        Hold one in-flight slot for the duration of a provider request, waiting for one if needed.
+
+        Yields:
+            float: When the slot was taken (pass it to record_throttle()).
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        with self._lock:
+            started = self._try_enter()
+            while started is None:
+                self._available.wait()
+                started = self._try_enter()
+            probe = self.state == self.HALF_OPEN
+        try:
+            yield started
+        finally:
+            self._exit(probe)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        """Async version of slot() that waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                started = self._try_enter()
+                if started is None:
+                    future = loop.create_future()
+                    self._async_waiters.append((loop, future))
+                probe = self.state == self.HALF_OPEN
+            if started is not None:
+                break
+            await future
+        try:
+            yield started
+        finally:
+            self._exit(probe)
+
+    def record_success(self):
+        """Count a successful request: close the circuit and grow concurrency and rate additively."""
+        with self._lock:
+            before = (self.state, int(self.limit))
+            if self.state != self.CLOSED:
+                logger.info("Circuit closed: provider is answering again")
+            self.state = self.CLOSED
+            self._probing = False
+            self.consecutive_failures = 0
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            if self.rate_scale < 1.0:
+                self._set_rate_scale(min(1.0, self.rate_scale + self.rate_increase))
+            if (self.state, int(self.limit)) != before:
+                self._notify()
+
+    def record_throttle(self, started):
+        """
+        Count a throttled request: cut concurrency and rate multiplicatively.
+
+        Args:
+            started (float): Value yielded by the request's slot; throttles of requests
+                sent before the last decrease were caused by the old limits and are ignored.
+        """
+        with self._lock:
+            # A throttle still proves the provider is up
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._probing = False
+            self.consecutive_failures = 0
+            if started < self._last_decrease:
+                return
+            self._last_decrease = time.monotonic()
+            self.limit = max(float(self.min_concurrency), min(self.limit, self.in_flight) * self.decrease)
+            self._set_rate_scale(max(self.min_rate_scale, self.rate_scale * self.decrease))
+            logger.warning(f"Throttled: allowing {int(self.limit)} requests in flight at {self.rate_scale:.0%} of the request rate")
+
+    def record_failure(self):
+        """Count a failed request towards the circuit breaker."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                logger.error(f"Circuit open after {self.consecutive_failures} consecutive failures; "
+                             f"failing fast for {self.reset_timeout} seconds")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self._notify()
+
+    def _set_rate_scale(self, scale):
+        self.rate_scale = scale
+        if self.rate_limiter is not None:
+            self.rate_limiter.rate_scale = scale
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+# One controller per rate limiter: clients sharing a quota share its congestion control
+_controllers = weakref.WeakKeyDictionary()
+_controllers_lock = threading.Lock()
+
+def get_controller(rate_limiter, **options):
+    """
+    Return the adaptive controller for a rate limiter, creating it on first use.
+
+    Later calls for the same limiter get the same controller and their options are ignored.
+
+    Args:
+        rate_limiter (RateLimiter): The limiter of the quota the controller protects.
+        **options: AdaptiveController options (max_concurrency, failure_threshold, ...).
+
+    Returns:
+        AdaptiveController: The shared controller.
+    """
+    with _controllers_lock:
+        controller = _controllers.get(rate_limiter)
+        if controller is None:
+            controller = _controllers[rate_limiter] = AdaptiveController(rate_limiter, **options)
+        return controller
@@ -0,0 +1,221 @@
+import re
+from collections import namedtuple
+
+# Delimiters the prompts ask the model to put around its final answer
+DELIMITER_START = "FINAL_ANSWER:"
+DELIMITER_END = "END_ANSWER"
+
+# Phrases that mark a conclusion when the delimiters are missing, in priority order
+CONCLUSION_PATTERNS = [
+    r"(?i)therefore,?\s+(?:the)?\s*(?:final)?\s*answer\s+is",
+    r"(?i)(?:the)?\s*(?:final)?\s*answer\s+is",
+    r"(?i)in\s+conclusion",
+    r"(?i)thus,?\s+(?:the)?\s*(?:final)?\s*(?:answer|result)\s+is",
+    r"(?i)(?:the)?\s*(?:final)?\s*(?:answer|result)[\s:]+",
+    r"(?i)(?:so|hence),?\s+(?:the)?\s*(?:final)?\s*answer\s+is",
+    r"(?i)to\s+summarize",
+    r"(?i)my\s+final\s+answer",
+    r"(?i)final\s+result",
+    r"(?i)^\s*answer\s*[:=]"
+]
+
+# Every conclusion pattern needs one of these words, so text without them can skip the patterns
+CONCLUSION_KEYWORDS = ("answer", "result", "conclusion", "summarize")
+
+_BRACKETS = re.compile(r'^\[|\]$')
+_FRACTION = re.compile(r'\b(\d+)/(\d+)\b')
+_PERCENT = re.compile(r'(\d+\.?\d*)%')
+_NUMBER = re.compile(r'\b\d+\.?\d*\b')
+_DIGITS = re.compile(r'\d+\.?\d*')
+
+class ExtractedAnswer(namedtuple("ExtractedAnswer", ["text", "value", "kind"])):
+    """
+    Result of extracting an answer from model output.
+
+    Attributes:
+        text (str): The answer as a string (None if nothing was found).
+        value (float): The numeric value, or None if the answer is not a number.
+        kind (str): How it was found: "delimiter", "fraction", "percent", "number" or None.
+    """
+    __slots__ = ()
+
+NO_ANSWER = ExtractedAnswer(None, None, None)
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+class AnswerExtractor:
+    """
+    Answer extraction with every pattern compiled once.
+
+    extract() finds the numeric answer of a response: the delimited answer,
+    then the first fraction, then the first percentage, then the last number.
+    extract_step_answer() detects whether a reasoning step has concluded,
+    trying the delimiters and then the conclusion patterns in priority order.
+    Cheap substring checks skip patterns that cannot match, which matters for
+    long steps: most of them contain no conclusion at all.
+    """
+
+    def __init__(self, delimiter_start=DELIMITER_START, delimiter_end=DELIMITER_END,
+                 conclusion_patterns=CONCLUSION_PATTERNS, conclusion_keywords=CONCLUSION_KEYWORDS):
+        """
+        Compile the extraction patterns.
+
+        Args:
+            delimiter_start (str, optional): Text opening a delimited answer. Defaults to "FINAL_ANSWER:".
+            delimiter_end (str, optional): Text closing a delimited answer. Defaults to "END_ANSWER".
+            conclusion_patterns (list, optional): Regexes marking a conclusion, highest priority first.
+            conclusion_keywords (tuple, optional): Lowercase words of which every conclusion
+                pattern needs at least one. Pass None when using custom patterns without them.
+        """
+        self.delimiter = re.compile(f"{delimiter_start}(.*?){delimiter_end}", re.DOTALL)
+        self.conclusions = [re.compile(pattern) for pattern in conclusion_patterns]
+        self.conclusion_keywords = conclusion_keywords
+
+    def extract(self, text):
+        """
+        Extract the final numeric answer from a response.
+
+        Args:
+            text (str): The model output.
+
+        Returns:
+            ExtractedAnswer: The answer text, its numeric value and how it was found.
+        """
+        if not text:
+            return NO_ANSWER
+
+        match = self.delimiter.search(text)
+        if match:
+            return self._delimited(match.group(1))
+
+        if "/" in text:
+            match = _FRACTION.search(text)
+            if match:
+                denominator = int(match.group(2))
+                if denominator != 0:
+                    value = round(int(match.group(1)) / denominator, 2)
+                    return ExtractedAnswer(str(value), value, "fraction")
+
+        if "%" in text:
+            match = _PERCENT.search(text)
+            if match:
+                return ExtractedAnswer(match.group(1), float(match.group(1)), "percent")
+
+        numbers = _NUMBER.findall(text)
+        if numbers:
+            return ExtractedAnswer(numbers[-1], float(numbers[-1]), "number")
+
+        return NO_ANSWER
+
+    def _delimited(self, body):
+        """Clean up the text between the delimiters and convert it to a number if possible."""
+        answer_text = _BRACKETS.sub('', body.strip()).strip()
+        value = _to_float(answer_text)
+        if value is not None:
+            return ExtractedAnswer(str(value), value, "delimiter")
+        return ExtractedAnswer(answer_text, None, "delimiter")
+
+    def find_conclusion(self, text):
+        """
+        Find the highest-priority conclusion marker in `text`.
+
+        Returns:
+            re.Match: The marker's match, or None if the text has no conclusion.
+        """
+        if self.conclusion_keywords:
+            lowered = text.lower()
+            if not any(keyword in lowered for keyword in self.conclusion_keywords):
+                return None
+
+        for pattern in self.conclusions:
+            match = pattern.search(text)
+            if match:
+                return match
+        return None
+
+    def extract_step_answer(self, text):
+        """
+        Check whether a reasoning step has reached an answer.
+
+        Args:
+            text (str): The reasoning step.
+
+        Returns:
+            tuple: (answer_found, answer_text). When no conclusion is found, answer_text
+                is None if the text contains digits, otherwise its last paragraph.
+        """
+        delimiter_match = self.delimiter.search(text)
+        if delimiter_match:
+            return True, delimiter_match.group(1).strip()
+
+        conclusion = self.find_conclusion(text)
+        if conclusion:
+            # Get everything after the conclusion marker
+            return True, text[conclusion.end():].strip()
+
+        # If no patterns match, check for digits (last resort)
+        if _DIGITS.search(text):
+            return False, None
+
+        # If nothing found, return the last paragraph as a fallback
+        paragraphs = text.split('\n\n')
+        return False, paragraphs[-1].strip()
+
+_default_extractor = AnswerExtractor()
+
+def extract_numeric_answer(text):
+    """
+    Extract the final numeric answer from text with the default delimiters.
+
+    Returns:
+        ExtractedAnswer: The answer text, its numeric value and how it was found.
+    """
+    return _default_extractor.extract(text)
+
+def extract_answer(text):
+    """Extract numerical answers from text."""
+    return _default_extractor.extract(text).text
+
+def validate_answer(expected, actual, tolerance=0.03):
+    """Validate if the actual answer matches the expected answer."""
+    if expected is None or actual is None:
+        return False
+    
+    # Clean the inputs - remove brackets and extra spaces
+    if isinstance(expected, str):
+        expected = _BRACKETS.sub('', expected).strip()
+    if isinstance(actual, str):
+        actual = _BRACKETS.sub('', actual).strip()
+        
+    # Try handling special fraction cases like 2/3 vs 0.67
+    try:
+        # Check if expected is a fraction
+        if '/' in str(expected):
+            num, denom = map(float, str(expected).split('/'))
+            expected_num = num / denom
+        else:
+            expected_num = float(expected)
+            
+        # Check if actual is a fraction
+        if '/' in str(actual):
+            num, denom = map(float, str(actual).split('/'))
+            actual_num = num / denom
+        else:
+            actual_num = float(actual)
+        
+        # Special case for percentages vs decimal representation (0.60 vs 60)
+        if expected_num > 1 and actual_num < 1 and expected_num == actual_num * 100:
+            return True
+        if actual_num > 1 and expected_num < 1 and actual_num == expected_num * 100:
+            return True
+            
+        # More generous tolerance for comparing fractions
+        return abs(expected_num - actual_num) <= tolerance
+        
+    except (ValueError, TypeError, ZeroDivisionError):
+        # If conversion fails, do string comparison
+        return str(expected).strip() == str(actual).strip()
@@ -0,0 +1,430 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import random
+import time
+
+from . import metrics
+from . import tracing
+from .adaptive import get_controller
+from .rate_limiter import RateLimiter
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Set while generating draws that must not be shared with other requests
+_independent_draws = contextvars.ContextVar("independent_draws", default=False)
+
+@contextlib.contextmanager
+def independent_draws():
+    """
+    Mark generation inside this block as independent samples.
+
+    Client wrappers that would otherwise share responses between identical
+    requests (such as the response cache) pass these requests straight through,
+    so e.g. self-consistency chains at temperature > 0 get distinct samples.
+    Asyncio tasks created inside the block inherit the setting.
+    """
+    token = _independent_draws.set(True)
+    try:
+        yield
+    finally:
+        _independent_draws.reset(token)
+
+def draws_must_be_independent():
+    """Return True inside an independent_draws() block."""
+    return _independent_draws.get()
+
+class RetriesExhaustedError(Exception):
+    """A provider call that still failed after all retries."""
+
+    def __init__(self, retries, last_error):
+        """
+        Args:
+            retries (int): Number of retries made.
+            last_error (Exception): The error of the final attempt.
+        """
+        super().__init__(f"Error after {retries} retries: {last_error}")
+        self.retries = retries
+        self.last_error = last_error
+
+def iter_until_stop(chunks, stop):
+    """
+    Pass text chunks through until `stop` has been produced, then stop reading.
+
+    The chunk containing the end of `stop` is cut right after it, and `stop` may
+    span chunk boundaries. The source is closed when the stop is found, which
+    for streaming responses ends the request early.
+
+    Args:
+        chunks (iterable): Text chunks, e.g. from a streaming response.
+        stop (str): Text after which generation should end. None disables stopping.
+
+    Yields:
+        str: Text chunks up to and including `stop`.
+    """
+    if not stop:
+        yield from chunks
+        return
+
+    tail = ""
+    try:
+        for chunk in chunks:
+            window = tail + chunk
+            index = window.find(stop)
+            if index != -1:
+                yield chunk[:index + len(stop) - len(tail)]
+                return
+            yield chunk
+            tail = window[-(len(stop) - 1):] if len(stop) > 1 else ""
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+def instrumented(call):
+    """
+    Decorate a client's generate method so each call is recorded in src.metrics.
+
+    Records the call's wall time (including rate limit waits and retries), the
+    prompt and response sizes, and exceptions that escape the call, counts it
+    towards the solve it is made for, and runs the call inside a "generate"
+    tracing span. Works for plain, async and
+    generator (streaming) methods.
+
+    Args:
+        call (str): Value of the "call" label, e.g. "generate", "agenerate" or "stream".
+    """
+    def decorate(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def wrapper(self, prompt, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    with self._generate_span(call, prompt) as span:
+                        response = await method(self, prompt, *args, **kwargs)
+                        span.set(response_chars=len(response or ""))
+                except Exception as e:
+                    self._record_failure(e)
+                    raise
+                finally:
+                    self._record_latency(call, time.perf_counter() - start)
+                self._record_sizes(prompt, response, kwargs)
+                return response
+
+        elif inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def wrapper(self, prompt, *args, **kwargs):
+                start = time.perf_counter()
+                chunks = tracing.trace_generator(self._generate_span(call, prompt), method(self, prompt, *args, **kwargs))
+                streamed = []
+                failed = False
+                try:
+                    for chunk in chunks:
+                        streamed.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    failed = True
+                    self._record_failure(e)
+                    raise
+                finally:
+                    # Closing ends the underlying request if the caller stopped reading early
+                    chunks.close()
+                    self._record_latency(call, time.perf_counter() - start)
+                    if not failed:
+                        self._record_sizes(prompt, "".join(streamed), kwargs)
+
+        else:
+            @functools.wraps(method)
+            def wrapper(self, prompt, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    with self._generate_span(call, prompt) as span:
+                        response = method(self, prompt, *args, **kwargs)
+                        span.set(response_chars=len(response or ""))
+                except Exception as e:
+                    self._record_failure(e)
+                    raise
+                finally:
+                    self._record_latency(call, time.perf_counter() - start)
+                self._record_sizes(prompt, response, kwargs)
+                return response
+
+        return wrapper
+    return decorate
+
+class BaseLLMClient:
+    """
+    Behaviour shared by all LLM clients.
+    Handles rate limiting, retries and the async entry point.
+    Subclasses implement generate() and override agenerate() with a native async call where the provider has one.
+
+    Provider calls made through _call_with_retries() share the adaptive
+    controller of their rate limiter (see src.adaptive): throttling lowers the
+    concurrency and rate for every client on the quota, and a provider that
+    keeps failing trips a circuit breaker so calls fail fast with
+    CircuitOpenError. Calls that fail after all retries raise RetriesExhaustedError.
+    """
+
+    provider = None
+
+    # Exponential backoff between retries, used when the error carries no retry_after
+    base_delay = 1
+    max_delay = 60
+
+    def __init__(self, model, requests_per_min, tokens_per_min=None, rate_limiter=None):
+        """
+        Initialize the shared client state.
+
+        Args:
+            model (str): The model to use.
+            requests_per_min (int): Maximum requests per minute.
+            tokens_per_min (int, optional): Maximum prompt + response tokens per minute. Defaults to no limit.
+            rate_limiter (RateLimiter, optional): A limiter shared with other clients.
+                When given, requests_per_min and tokens_per_min are ignored.
+        """
+        self.model_name = model
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_min, tokens_per_min=tokens_per_min)
+        self.controller = get_controller(self.rate_limiter)
+
+    def _wait_for_rate_limit(self, prompt=None):
+        """Ensure rate limit compliance by waiting if needed."""
+        with tracing.span("rate_limit_wait") as span:
+            waited = self.rate_limiter.acquire(estimate_tokens(prompt))
+            span.set(waited=round(waited, 6))
+        metrics.RATE_LIMIT_WAIT_SECONDS.observe(waited, provider=self.provider, model=self.model_name)
+
+    async def _await_rate_limit(self, prompt=None):
+        """Async version of _wait_for_rate_limit that yields to the event loop while waiting."""
+        with tracing.span("rate_limit_wait") as span:
+            waited = await self.rate_limiter.acquire_async(estimate_tokens(prompt))
+            span.set(waited=round(waited, 6))
+        metrics.RATE_LIMIT_WAIT_SECONDS.observe(waited, provider=self.provider, model=self.model_name)
+
+    def _should_retry(self, error):
+        """Return True if a failed attempt is worth retrying. By default every error is."""
+        return True
+
+    def _is_throttle(self, error):
+        """Return True if an error means the quota is exhausted (HTTP 429 or equivalent)."""
+        return False
+
+    def _retry_delay(self, error, retries, max_retries):
+        """
+        Calculate the wait before the next retry.
+
+        Honours a retry_after the error carries (e.g. from a Retry-After header);
+        otherwise uses exponential backoff with up to 10% jitter.
+
+        Args:
+            error (Exception): The error raised by the last attempt.
+            retries (int): Number of failed attempts so far.
+            max_retries (int): Maximum number of retries.
+
+        Returns:
+            float: Seconds to wait before retrying.
+        """
+        delay = getattr(error, "retry_after", None)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * (2 ** (retries - 1)))
+            delay += random.uniform(0, 0.1 * delay)
+
+        logger.warning(f"Error: {error}. Retrying in {delay:.2f} seconds (attempt {retries}/{max_retries})")
+        self._record_retry(error, delay)
+        return delay
+
+    def _attempt_failed(self, error, started):
+        """Report a failed attempt to the adaptive controller."""
+        if self._is_throttle(error):
+            self.controller.record_throttle(started)
+        elif self._should_retry(error):
+            self.controller.record_failure()
+        else:
+            # The provider answered; the request itself was at fault
+            self.controller.record_success()
+
+    def _next_retry(self, error, retries, max_retries):
+        """Return the delay before retry number `retries`, or raise if the call should give up."""
+        if not self._should_retry(error):
+            logger.error(f"Request failed and will not be retried: {error}")
+            raise error
+        if retries > max_retries:
+            logger.error(f"Failed after {max_retries} retries. Last error: {error}")
+            raise RetriesExhaustedError(max_retries, error) from error
+        return self._retry_delay(error, retries, max_retries)
+
+    def _call_with_retries(self, prompt, attempt, max_retries):
+        """
+        Make a provider call with rate limiting, adaptive concurrency and retries.
+
+        Args:
+            prompt (str): The prompt, for the tokens-per-minute estimate.
+            attempt (callable): Makes one provider request and returns its result.
+            max_retries (int): Maximum number of retries.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            RetriesExhaustedError: If every attempt failed.
+            CircuitOpenError: If the provider's circuit breaker is open.
+            Exception: A non-retryable error from the provider.
+        """
+        retries = 0
+        while True:
+            with self.controller.slot() as started:
+                self._wait_for_rate_limit(prompt)
+                try:
+                    with tracing.span("provider_call", attempt=retries + 1):
+                        result = attempt()
+                except Exception as e:
+                    error = e
+                    self._attempt_failed(e, started)
+                else:
+                    self.controller.record_success()
+                    return result
+
+            retries += 1
+            delay = self._next_retry(error, retries, max_retries)
+            with tracing.span("backoff", attempt=retries, seconds=round(delay, 3)):
+                time.sleep(delay)
+
+    async def _acall_with_retries(self, prompt, attempt, max_retries):
+        """Async version of _call_with_retries(); `attempt` is a coroutine function."""
+        retries = 0
+        while True:
+            async with self.controller.aslot() as started:
+                await self._await_rate_limit(prompt)
+                try:
+                    with tracing.span("provider_call", attempt=retries + 1):
+                        result = await attempt()
+                except Exception as e:
+                    error = e
+                    self._attempt_failed(e, started)
+                else:
+                    self.controller.record_success()
+                    return result
+
+            retries += 1
+            delay = self._next_retry(error, retries, max_retries)
+            with tracing.span("backoff", attempt=retries, seconds=round(delay, 3)):
+                await asyncio.sleep(delay)
+
+    def _generate_span(self, call, prompt):
+        """Start the tracing span around one generate call."""
+        return tracing.span("generate", provider=self.provider, model=self.model_name, call=call, prompt_chars=len(prompt))
+
+    def _record_response(self, response):
+        """Charge the response tokens against the tokens-per-minute quota."""
+        self.rate_limiter.record_tokens(estimate_tokens(response))
+
+    def _record_retry(self, error, delay):
+        """Count a failed attempt that will be retried after `delay` seconds."""
+        metrics.RETRIES.inc(provider=self.provider, model=self.model_name, error=type(error).__name__)
+        metrics.RETRY_BACKOFF_SECONDS.inc(delay, provider=self.provider, model=self.model_name)
+
+    def _record_failure(self, error):
+        """Count a call that failed for good, labelled with the final attempt's error type when retries ran out."""
+        error = getattr(error, "last_error", error)
+        metrics.ERRORS.inc(provider=self.provider, model=self.model_name, error=type(error).__name__)
+
+    def _record_latency(self, call, seconds):
+        metrics.GENERATE_SECONDS.observe(seconds, provider=self.provider, model=self.model_name, call=call)
+        metrics.count_model_call()
+
+    def _record_sizes(self, prompt, response, kwargs):
+        """Record prompt and response sizes for one completed call."""
+        prompt = self.effective_prompt(prompt, **kwargs)
+        response = response or ""
+        labels = {"provider": self.provider, "model": self.model_name}
+        metrics.PROMPT_CHARS.inc(len(prompt), **labels)
+        metrics.RESPONSE_CHARS.inc(len(response), **labels)
+        metrics.PROMPT_TOKENS.observe(estimate_tokens(prompt), **labels)
+        metrics.RESPONSE_TOKENS.observe(estimate_tokens(response), **labels)
+
+    def batch_backend(self, **options):
+        """
+        Return a backend for the provider's batch API (see src.batch_api.BatchClient).
+
+        Raises:
+            NotImplementedError: If the provider has no batch API support.
+        """
+        raise NotImplementedError(
+            f"The {self.provider} client has no batch API support; pass a backend such as LocalBatchBackend instead"
+        )
+
+    def effective_prompt(self, prompt, **kwargs):
+        """
+        Return the prompt exactly as it will be sent to the provider.
+        Clients that rewrite prompts (e.g. to add formatting instructions) override this.
+        """
+        return prompt
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        """Generate text based on the provided prompt."""
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, temperature=0.7, stop=None, **kwargs):
+        """
+        Generate text as a stream of chunks, ending early once `stop` is produced.
+
+        The default makes one blocking generate() call and yields the result as a
+        single chunk; clients with a streaming API override this.
+
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            stop (str, optional): Text after which to stop generating (kept in the output).
+            **kwargs: Extra arguments passed to generate().
+
+        Yields:
+            str: Chunks of generated text.
+        """
+        yield from iter_until_stop([self.generate(prompt, temperature=temperature, **kwargs)], stop)
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        """
+        Generate text without blocking the event loop.
+
+        The default runs the blocking generate() in the loop's executor;
+        clients with a native async API override this.
+
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            **kwargs: Extra arguments passed to generate().
+
+        Returns:
+            str: The generated text.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.generate, prompt, temperature=temperature, **kwargs)
+        return await loop.run_in_executor(None, call)
+
+class ClientWrapper:
+    """
+    Base for clients that wrap another client to add behaviour around generation.
+    Anything not overridden (model_name, rate_limiter, provider, ...) is delegated to the wrapped client.
+    """
+
+    def __init__(self, client):
+        """
+        Args:
+            client: The client to wrap.
+        """
+        self.client = client
+
+    def __getattr__(self, name):
+        # Guard against recursion before __init__ has set self.client (e.g. while unpickling)
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        return self.client.generate(prompt, temperature=temperature, **kwargs)
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        return await self.client.agenerate(prompt, temperature=temperature, **kwargs)
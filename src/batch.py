@@ -0,0 +1,133 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+def _prepare_call(item, parameters, defaults):
+    """
+    Split one batch item into the question and the keyword arguments for solve().
+
+    Args:
+        item (str or dict): A question string, or a dict with a "question" key and
+            optional per-question overrides (e.g. "steps", "temperature").
+        parameters (tuple): Names of the solve() arguments a dict item may override.
+            Other keys (such as a problem "type") are ignored.
+        defaults (dict): Keyword arguments applied to every question.
+
+    Returns:
+        tuple: (question, kwargs)
+    """
+    if isinstance(item, str):
+        return item, dict(defaults)
+
+    kwargs = dict(defaults)
+    kwargs.update({name: item[name] for name in parameters if name in item})
+    return item["question"], kwargs
+
+def _check_concurrency(concurrency):
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1; got {concurrency}.")
+
+def solve_many(solve, questions, parameters, concurrency=4, return_exceptions=False, **defaults):
+    """
+    Run solve() over many questions on a pool of threads.
+
+    At most `concurrency` questions are in flight at once, and questions are
+    read from the iterable lazily, so very large inputs are not held in memory.
+
+    Args:
+        solve (callable): The blocking solve function to call for each question.
+        questions (iterable): Question strings or problem dicts.
+        parameters (tuple): Names of the solve() arguments a problem dict may override.
+        concurrency (int, optional): Maximum number of concurrent solves. Defaults to 4.
+        return_exceptions (bool, optional): Yield exceptions in place of results instead
+            of raising them. Defaults to False.
+        **defaults: Keyword arguments passed to every solve() call.
+
+    Yields:
+        tuple: (index, result) in completion order, where index is the position of
+            the question in the input.
+
+    Raises:
+        ValueError: If concurrency is less than 1.
+    """
+    _check_concurrency(concurrency)
+    items = enumerate(questions)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next():
+            for index, item in items:
+                question, kwargs = _prepare_call(item, parameters, defaults)
+                pending[executor.submit(solve, question, **kwargs)] = index
+                return True
+            return False
+
+        for _ in range(concurrency):
+            if not submit_next():
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    result = e
+                submit_next()
+                yield index, result
+
+async def solve_many_async(solve_async, questions, parameters, concurrency=4, return_exceptions=False, **defaults):
+    """
+    Async version of solve_many() that runs solve_async() tasks on the current event loop.
+
+    Args:
+        solve_async (callable): The coroutine function to call for each question.
+        questions (iterable): Question strings or problem dicts.
+        parameters (tuple): Names of the solve() arguments a problem dict may override.
+        concurrency (int, optional): Maximum number of concurrent solves. Defaults to 4.
+        return_exceptions (bool, optional): Yield exceptions in place of results instead
+            of raising them. Defaults to False.
+        **defaults: Keyword arguments passed to every solve_async() call.
+
+    Yields:
+        tuple: (index, result) in completion order.
+
+    Raises:
+        ValueError: If concurrency is less than 1.
+    """
+    _check_concurrency(concurrency)
+    items = enumerate(questions)
+    pending = {}
+
+    def submit_next():
+        for index, item in items:
+            question, kwargs = _prepare_call(item, parameters, defaults)
+            pending[asyncio.ensure_future(solve_async(question, **kwargs))] = index
+            return True
+        return False
+
+    for _ in range(concurrency):
+        if not submit_next():
+            break
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    result = e
+                submit_next()
+                yield index, result
+    finally:
+        # Stop any chains still running if the caller stops iterating early
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,397 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from .base_client import ClientWrapper
+
+logger = logging.getLogger(__name__)
+
+# Batch job states after which the job will not change any more
+TERMINAL_STATUSES = frozenset(("completed", "failed", "expired", "cancelled"))
+
+class BatchJobError(Exception):
+    """A batch job, or one request in it, that did not produce a response."""
+
+def request_line(custom_id, model, prompt, temperature):
+    """
+    Build one line of a batch input file, in the OpenAI batch format.
+
+    Args:
+        custom_id (str): Id that the matching output line will carry.
+        model (str): Model name.
+        prompt (str): The prompt, sent as a single user message.
+        temperature (float): Sampling temperature.
+
+    Returns:
+        dict: The input line.
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+        },
+    }
+
+def response_line(custom_id, content=None, error=None):
+    """Build one line of a batch output file: the response content, or an error message."""
+    if error is not None:
+        return {"custom_id": custom_id, "response": None, "error": {"message": str(error)}}
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}},
+        "error": None,
+    }
+
+def parse_response_line(line):
+    """
+    Read one line of a batch output file.
+
+    Returns:
+        tuple: (custom_id, text, error) where exactly one of text and error is None.
+    """
+    response, error = line.get("response"), line.get("error")
+    if error:
+        return line["custom_id"], None, error.get("message", str(error))
+    if not response or response.get("status_code", 200) >= 400:
+        body = (response or {}).get("body") or {}
+        message = (body.get("error") or {}).get("message", "request failed")
+        return line["custom_id"], None, f"HTTP {(response or {}).get('status_code')}: {message}"
+    return line["custom_id"], response["body"]["choices"][0]["message"]["content"] or "", None
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for a provider batch API.
+
+    Each job is a directory under `directory` holding input.jsonl, status.json
+    and, once processed, output.jsonl, in the same line formats as the OpenAI
+    batch API. Jobs are processed by a LocalBatchServer watching the same
+    directory, which may run in another thread or process.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Directory the jobs are written to; created if missing.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def submit(self, lines):
+        """
+        Submit a batch job.
+
+        Args:
+            lines (list): Input lines built with request_line().
+
+        Returns:
+            str: The job id.
+        """
+        job_id = f"batch_{uuid.uuid4().hex[:16]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        _write_atomic(os.path.join(job_dir, "input.jsonl"), "".join(json.dumps(line) + "\n" for line in lines))
+        # The status file is written last: a server only picks up jobs that have one
+        self._write_status(job_id, "validating", total=len(lines))
+        return job_id
+
+    def _write_status(self, job_id, status, **fields):
+        job = {"id": job_id, "status": status, "updated_at": time.time()}
+        job.update(fields)
+        _write_atomic(os.path.join(self._job_dir(job_id), "status.json"), json.dumps(job))
+        return job
+
+    def status(self, job_id):
+        """Return the job's status dict ("status" is validating, in_progress, completed or failed)."""
+        with open(os.path.join(self._job_dir(job_id), "status.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def results(self, job):
+        """Yield the output lines of a completed job, given its status dict."""
+        with open(os.path.join(self._job_dir(job["id"]), "output.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def jobs(self, status=None):
+        """Return the ids of the jobs in the directory, optionally only those with the given status."""
+        job_ids = []
+        for job_id in sorted(os.listdir(self.directory)):
+            try:
+                job = self.status(job_id)
+            except (OSError, ValueError):
+                continue
+            if status is None or job["status"] == status:
+                job_ids.append(job_id)
+        return job_ids
+
+class LocalBatchServer:
+    """
+    Processes the jobs of a LocalBatchBackend directory with an ordinary client.
+
+    Run it in-process with start()/stop(), or call process_pending() from any
+    process that can see the directory. Requests of a job are sent through the
+    client concurrently, so a MockClient with a latency model makes a cheap
+    offline batch provider for tests and benchmarks.
+    """
+
+    def __init__(self, directory, client, workers=8, poll_interval=0.05, turnaround=0.0):
+        """
+        Args:
+            directory (str): The LocalBatchBackend directory to watch.
+            client: Client that answers the requests (e.g. a MockClient).
+            workers (int, optional): Requests of one job processed at once. Defaults to 8.
+            poll_interval (float, optional): Seconds between scans for new jobs. Defaults to 0.05.
+            turnaround (float, optional): Extra seconds each job waits before it is processed,
+                to simulate a provider's queueing. Defaults to 0.
+        """
+        self.backend = LocalBatchBackend(directory)
+        self.client = client
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.turnaround = turnaround
+        self.jobs_processed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _answer(self, line):
+        body = line["body"]
+        try:
+            content = self.client.generate(body["messages"][-1]["content"], temperature=body.get("temperature", 0.7))
+        except Exception as e:
+            return response_line(line["custom_id"], error=f"{type(e).__name__}: {e}")
+        return response_line(line["custom_id"], content)
+
+    def process_job(self, job_id):
+        """Answer every request of one job and mark it completed."""
+        self.backend._write_status(job_id, "in_progress")
+        time.sleep(self.turnaround)
+        with open(os.path.join(self.backend._job_dir(job_id), "input.jsonl"), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        with concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="local-batch") as executor:
+            outputs = list(executor.map(self._answer, lines))
+        _write_atomic(
+            os.path.join(self.backend._job_dir(job_id), "output.jsonl"),
+            "".join(json.dumps(output) + "\n" for output in outputs),
+        )
+        failed = sum(1 for output in outputs if output["error"])
+        self.backend._write_status(job_id, "completed", total=len(lines), completed=len(lines) - failed, failed=failed)
+        self.jobs_processed += 1
+
+    def process_pending(self):
+        """Process every job waiting in the directory and return how many were processed."""
+        job_ids = self.backend.jobs(status="validating")
+        for job_id in job_ids:
+            self.process_job(job_id)
+        return len(job_ids)
+
+    def start(self):
+        """Process jobs on a background thread until stop() is called."""
+        def serve():
+            while not self._stop.is_set():
+                try:
+                    self.process_pending()
+                except Exception as e:
+                    logger.error(f"Local batch server failed to process a job: {e}")
+                self._stop.wait(self.poll_interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=serve, name="local-batch-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread started by start()."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class _PendingRequest:
+    def __init__(self, prompt, temperature):
+        self.prompt = prompt
+        self.temperature = temperature
+        self.future = concurrent.futures.Future()
+        self.attempts = 0
+
+class BatchClient(ClientWrapper):
+    """
+    Client wrapper that sends requests as provider batch jobs instead of one by one.
+
+    Concurrent calls are collected into a wave: once no new request has arrived
+    for `quiet_period` seconds, everything waiting is submitted as one JSONL
+    batch job, the job is polled until it completes, and each caller gets its
+    response. Solving a whole dataset concurrently (e.g. solve_many_async() with
+    concurrency=len(questions)) makes every chain wait on the same wave, so the
+    chains advance through their steps in lockstep, one batch job per step.
+
+    Batch jobs are billed and rate-limited separately from interactive requests,
+    so the client's per-minute rate limiter is not used. Requests that fail
+    inside a job are resubmitted with the next wave up to `max_retries` times.
+    Streaming is not batched and goes to the wrapped client.
+    """
+
+    def __init__(self, client, backend, quiet_period=0.5, poll_interval=30.0, max_batch_size=50000, max_retries=2):
+        """
+        Args:
+            client: The wrapped client; its model and prompt formatting are used for batch requests.
+            backend: Where jobs are submitted: a LocalBatchBackend, or client.batch_backend() for the provider's batch API.
+            quiet_period (float, optional): Seconds without new requests before a wave is submitted. Defaults to 0.5.
+            poll_interval (float, optional): Seconds between job status checks. Defaults to 30.
+            max_batch_size (int, optional): Most requests per job. Defaults to 50000 (the OpenAI limit).
+            max_retries (int, optional): Resubmissions of a request that failed in its job. Defaults to 2.
+        """
+        super().__init__(client)
+        self.backend = backend
+        self.quiet_period = quiet_period
+        self.poll_interval = poll_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.waves = 0
+        self.requests_submitted = 0
+
+        self._pending = []
+        self._last_arrival = 0.0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._collector = None
+
+    def _enqueue(self, prompt, temperature, kwargs):
+        request = _PendingRequest(self.client.effective_prompt(prompt, **kwargs), temperature)
+        self._requeue([request])
+        return request.future
+
+    def _requeue(self, requests):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BatchClient is closed")
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name="batch-collector", daemon=True)
+                self._collector.start()
+            self._pending.extend(requests)
+            self._last_arrival = time.monotonic()
+            self._condition.notify_all()
+
+    def _next_wave(self):
+        """Wait until requests have stopped arriving, then take up to max_batch_size of them."""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            while not self._closed and len(self._pending) < self.max_batch_size:
+                remaining = self._last_arrival + self.quiet_period - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            wave = [request for request in self._pending[:self.max_batch_size] if not request.future.cancelled()]
+            del self._pending[:self.max_batch_size]
+            return wave
+
+    def _collect(self):
+        while True:
+            wave = self._next_wave()
+            if self._closed:
+                for request in wave:
+                    request.future.cancel()
+                return
+            if wave:
+                self._submit(wave)
+
+    def _submit(self, wave):
+        self.waves += 1
+        self.requests_submitted += len(wave)
+        requests = {f"w{self.waves}-{index}": request for index, request in enumerate(wave)}
+        lines = [
+            request_line(custom_id, self.client.model_name, request.prompt, request.temperature)
+            for custom_id, request in requests.items()
+        ]
+        try:
+            job_id = self.backend.submit(lines)
+        except Exception as e:
+            logger.error(f"Could not submit batch of {len(lines)} requests: {e}")
+            self._fail(requests.values(), e)
+            return
+        logger.info(f"Submitted batch job {job_id} with {len(lines)} requests (wave {self.waves})")
+        threading.Thread(target=self._wait_for_job, args=(job_id, requests), name=f"batch-{job_id}", daemon=True).start()
+
+    def _wait_for_job(self, job_id, requests):
+        try:
+            job = self.backend.status(job_id)
+            while job["status"] not in TERMINAL_STATUSES:
+                time.sleep(self.poll_interval)
+                job = self.backend.status(job_id)
+            if job["status"] != "completed":
+                raise BatchJobError(f"Batch job {job_id} {job['status']}")
+            outputs = list(self.backend.results(job))
+        except Exception as e:
+            logger.error(f"Batch job {job_id} failed: {e}")
+            self._fail(requests.values(), e)
+            return
+
+        errors = {custom_id: "missing from the job's output" for custom_id in requests}
+        for line in outputs:
+            custom_id, text, error = parse_response_line(line)
+            request = requests.get(custom_id)
+            if request is None:
+                continue
+            if error is None:
+                del errors[custom_id]
+                if not request.future.done():
+                    request.future.set_result(text)
+            else:
+                errors[custom_id] = error
+
+        retry = []
+        for custom_id, error in errors.items():
+            request = requests[custom_id]
+            if request.future.done():
+                continue
+            if request.attempts < self.max_retries:
+                request.attempts += 1
+                retry.append(request)
+            else:
+                request.future.set_exception(BatchJobError(f"Batch request failed after {request.attempts} retries: {error}"))
+        if retry:
+            logger.warning(f"Resubmitting {len(retry)} requests from batch job {job_id}")
+            try:
+                self._requeue(retry)
+            except RuntimeError as e:
+                self._fail(retry, e)
+
+    def _fail(self, requests, error):
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        """Queue the request for the next batch job and block until its job completes."""
+        return self._enqueue(prompt, temperature, kwargs).result()
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        """Queue the request for the next batch job and wait for it without blocking the event loop."""
+        return await asyncio.wrap_future(self._enqueue(prompt, temperature, kwargs))
+
+    def generate_stream(self, prompt, temperature=0.7, stop=None, **kwargs):
+        return self.client.generate_stream(prompt, temperature=temperature, stop=stop, **kwargs)
+
+    def close(self):
+        """Stop collecting requests; requests not yet submitted are cancelled."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
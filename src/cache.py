@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from .base_client import ClientWrapper, draws_must_be_independent, iter_until_stop
+
+logger = logging.getLogger(__name__)
+
+def default_cache_path():
+    """Default location of the on-disk response cache."""
+    return os.path.join(os.path.expanduser("~"), ".cache", "chainofthought", "responses.sqlite")
+
+class ResponseCache:
+    """
+    Two-level cache for LLM responses: a bounded in-memory LRU in front of a SQLite file.
+
+    Writes go to both levels. Entries can expire after a TTL, and the SQLite
+    file is trimmed to `max_disk_entries` by evicting the least recently used
+    rows. Hit and miss counters are kept for reporting.
+    """
+
+    # Trim the disk cache once every this many writes rather than on every write
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, path=None, max_memory_entries=1024, max_disk_entries=100000, ttl=None):
+        """
+        Initialize the cache.
+
+        Args:
+            path (str, optional): SQLite file path. Defaults to default_cache_path().
+                Pass ":memory:" for a cache that is not persisted.
+            max_memory_entries (int, optional): Size of the in-memory LRU. Defaults to 1024.
+            max_disk_entries (int, optional): Maximum rows kept in SQLite. Defaults to 100000.
+            ttl (float, optional): Seconds before an entry expires. Defaults to never.
+        """
+        self.path = path or default_cache_path()
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._writes_since_eviction = 0
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL, expires_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(provider, model, prompt, temperature):
+        """
+        Build the cache key for one generation request.
+
+        Args:
+            provider (str): The LLM provider.
+            model (str): The model name.
+            prompt (str): The prompt as sent to the provider (after any client rewrites).
+            temperature (float): Sampling temperature.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        payload = json.dumps([provider, model, prompt, temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from make_key().
+
+        Returns:
+            str or None: The cached response, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response):
+        """
+        Store a response in memory and on disk.
+
+        Args:
+            key (str): Key from make_key().
+            response (str): The generated text.
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, now, now, expires_at),
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                self._evict(now)
+            self._db.commit()
+
+    def _remember(self, key, response, expires_at):
+        """Insert into the in-memory LRU, dropping the least recently used entry when full."""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        """Delete expired rows and trim the table to max_disk_entries."""
+        self._writes_since_eviction = 0
+        self._db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        if self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate and the number of entries in memory and on disk.
+        """
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._db.close()
+
+class CachedClient(ClientWrapper):
+    """
+    Client wrapper that serves repeated requests from a ResponseCache.
+
+    Requests are keyed on provider, model, temperature and the prompt as the
+    wrapped client will actually send it, so client-side prompt rewrites such
+    as OpenAI's use_standard_format are part of the key.
+    """
+
+    def __init__(self, client, cache):
+        """
+        Args:
+            client: The client to wrap.
+            cache (ResponseCache): The cache to read from and write to.
+        """
+        super().__init__(client)
+        self.cache = cache
+
+    def _cache_key(self, prompt, temperature, kwargs):
+        return self.cache.make_key(
+            self.client.provider,
+            self.client.model_name,
+            self.client.effective_prompt(prompt, **kwargs),
+            temperature,
+        )
+
+    def _store(self, key, response):
+        if response:
+            self.cache.set(key, response)
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        """Return the cached response if there is one, otherwise generate and cache it."""
+        if draws_must_be_independent():
+            return self.client.generate(prompt, temperature=temperature, **kwargs)
+        key = self._cache_key(prompt, temperature, kwargs)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.client.generate(prompt, temperature=temperature, **kwargs)
+            self._store(key, response)
+        return response
+
+    def generate_stream(self, prompt, temperature=0.7, stop=None, **kwargs):
+        """
+        Serve a cached response as a single chunk, or stream from the wrapped client.
+        Streamed responses are not stored, since they may have been cut short at `stop`.
+        """
+        if draws_must_be_independent():
+            yield from self.client.generate_stream(prompt, temperature=temperature, stop=stop, **kwargs)
+            return
+        response = self.cache.get(self._cache_key(prompt, temperature, kwargs))
+        if response is not None:
+            yield from iter_until_stop([response], stop)
+        else:
+            yield from self.client.generate_stream(prompt, temperature=temperature, stop=stop, **kwargs)
+    
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        """Async version of generate()."""
+        if draws_must_be_independent():
+            return await self.client.agenerate(prompt, temperature=temperature, **kwargs)
+        key = self._cache_key(prompt, temperature, kwargs)
+        response = self.cache.get(key)
+        if response is None:
+            response = await self.client.agenerate(prompt, temperature=temperature, **kwargs)
+            self._store(key, response)
+        return response
+
+# Caches opened by path, so solvers created with the same cache setting share one instance
+_open_caches = {}
+_open_caches_lock = threading.Lock()
+
+def get_response_cache(cache):
+    """
+    Resolve the factory's `cache` argument to a ResponseCache.
+
+    Args:
+        cache (bool, str or ResponseCache): True for the default on-disk cache,
+            a path for a cache at that location, or an existing ResponseCache.
+
+    Returns:
+        ResponseCache: The cache to use.
+    """
+    if isinstance(cache, ResponseCache):
+        return cache
+
+    path = default_cache_path() if cache is True else cache
+    with _open_caches_lock:
+        if path not in _open_caches:
+            _open_caches[path] = ResponseCache(path)
+        return _open_caches[path]
@@ -1,4 +1,16 @@
+import re
+
 from .llm_client_factory import LLMClientFactory
+from . import answer_extraction
+from . import batch
+from . import metrics
+from . import self_consistency
+from . import tracing
+from .prefix_store import PrefixStore
+
+# Labels that start a step, and the final answer, in a single-call response
+_STEP_START = re.compile(r"^[ \t*#]*Step (\d+)\s*[:.]", re.MULTILINE | re.IGNORECASE)
+_FINAL_START = re.compile(r"^[ \t*#]*Final answer\s*:", re.MULTILINE | re.IGNORECASE)
 
 class ChainOfThought:
     """
@@ -7,8 +19,21 @@ class ChainOfThought:
     This class creates a step-by-step reasoning approach using
     either OpenAI or Gemini LLMs. It breaks reasoning into
     explicit steps and provides both reasoning chains and final answers.
+    
+    By default each step is its own request that re-sends the reasoning so far
+    ("multi_call"). mode="single_call" asks for all the steps and the final
+    answer in one request and splits the response locally, re-prompting only
+    for steps that are missing from it.
     """
     
+    MODES = ("multi_call", "single_call")
+    
+    # solve() arguments that a problem dict passed to solve_many() may override
+    _batch_parameters = ("steps", "temperature", "mode")
+    
+    # Single-call requests for missing steps before falling back to one request per step
+    max_reprompts = 2
+    
     def __init__(self, provider="openai", **kwargs):
         """
         Initialize the Chain of Thought handler.
@@ -18,13 +43,18 @@ class ChainOfThought:
             **kwargs: Additional arguments to pass to the client constructor
                 For OpenAI: model (defaults to "gpt-4o")
                 For Gemini: api_key, model (defaults to "gemini-2.0-flash")
+                prefix_store (PrefixStore, optional): Store of previously generated
+                    reasoning steps; pass one to share it between solvers.
         """
+        self.prefix_store = kwargs.pop("prefix_store", None) or PrefixStore()
         self.client = LLMClientFactory.create_client(provider=provider, **kwargs)
         # Use standardized delimiters for detecting answers
-        self.answer_delimiter_start = "FINAL_ANSWER:"
-        self.answer_delimiter_end = "END_ANSWER"
+        self.answer_delimiter_start = answer_extraction.DELIMITER_START
+        self.answer_delimiter_end = answer_extraction.DELIMITER_END
     
-    def solve(self, question, steps=3, temperature=0.7):
+    @tracing.traced("solve", solver="ChainOfThought")
+    @metrics.recorded_solve
+    def solve(self, question, steps=3, temperature=0.7, reuse_prefix=None, mode="multi_call"):
         """
         Solve a problem using Chain of Thought prompting.
         
@@ -32,29 +62,96 @@ class ChainOfThought:
             question (str): The question or problem to solve.
             steps (int, optional): Number of reasoning steps. Defaults to 3.
             temperature (float, optional): Temperature for generation. Defaults to 0.7.
+            reuse_prefix (bool, optional): Pick up from reasoning steps already generated for
+                this question by an earlier solve. Defaults to reusing only when temperature is 0.
+            mode (str, optional): "multi_call" for one request per step, or "single_call" to
+                generate all steps and the answer in one request. Defaults to "multi_call".
             
         Returns:
             dict: A dictionary containing the question, reasoning chains, and final answer.
         """
-        # Initialize step 1
-        initial_prompt = self._create_initial_prompt(question)
-        reasoning_steps = []
+        self._check_mode(mode)
+        reasoning_steps, prefix_key = self._start_chain(question, steps, temperature, reuse_prefix)
+        final_answer = None
         
-        # Step 1: Get initial reasoning
-        initial_reasoning = self.client.generate(initial_prompt, temperature=temperature)
-        reasoning_steps.append(initial_reasoning)
-        
-        # Steps 2 to n-1: Continue reasoning
-        for i in range(1, steps-1):
-            continuation_prompt = self._create_continuation_prompt(
-                question, reasoning_steps, i+1
+        # Single call: all remaining steps and the answer at once, re-prompting for missing steps
+        prompt = self._first_single_call_prompt(question, reasoning_steps, steps, mode)
+        attempt = 0
+        while prompt is not None:
+            with tracing.span("step", step="single_call", first=len(reasoning_steps) + 1, prompt_chars=len(prompt)):
+                response = self.client.generate(prompt, temperature=temperature)
+            prompt, prefix_key, final_answer = self._take_single_call(
+                question, response, reasoning_steps, prefix_key, steps, attempt
             )
-            next_step = self.client.generate(continuation_prompt, temperature=temperature)
+            attempt += 1
+        
+        # Step 1 and steps 2 to n-1, starting after any reused prefix
+        while len(reasoning_steps) < self._reasoning_step_count(steps):
+            step_prompt = self._create_step_prompt(question, reasoning_steps)
+            with tracing.span("step", step=len(reasoning_steps) + 1, prompt_chars=len(step_prompt)):
+                next_step = self.client.generate(step_prompt, temperature=temperature)
             reasoning_steps.append(next_step)
+            prefix_key = self._remember_step(prefix_key, next_step)
+            final_answer = None
         
         # Final step: Get the answer
-        final_prompt = self._create_final_prompt(question, reasoning_steps)
-        final_answer = self.client.generate(final_prompt, temperature=temperature)
+        if final_answer is None:
+            final_prompt = self._create_final_prompt(question, reasoning_steps)
+            with tracing.span("step", step="final", prompt_chars=len(final_prompt)):
+                final_answer = self.client.generate(final_prompt, temperature=temperature)
+        
+        return {
+            "question": question,
+            "reasoning_steps": reasoning_steps,
+            "final_answer": final_answer
+        }
+    
+    @tracing.traced("solve", solver="ChainOfThought")
+    @metrics.recorded_solve
+    async def solve_async(self, question, steps=3, temperature=0.7, reuse_prefix=None, mode="multi_call"):
+        """
+        Async version of solve() using the client's agenerate().
+        
+        Steps within one chain still run in order, but the event loop is free
+        while waiting, so many chains can be driven concurrently.
+        
+        Args:
+            question (str): The question or problem to solve.
+            steps (int, optional): Number of reasoning steps. Defaults to 3.
+            temperature (float, optional): Temperature for generation. Defaults to 0.7.
+            reuse_prefix (bool, optional): Pick up from reasoning steps already generated for
+                this question by an earlier solve. Defaults to reusing only when temperature is 0.
+            mode (str, optional): "multi_call" or "single_call", as for solve(). Defaults to "multi_call".
+            
+        Returns:
+            dict: A dictionary containing the question, reasoning chains, and final answer.
+        """
+        self._check_mode(mode)
+        reasoning_steps, prefix_key = self._start_chain(question, steps, temperature, reuse_prefix)
+        final_answer = None
+        
+        prompt = self._first_single_call_prompt(question, reasoning_steps, steps, mode)
+        attempt = 0
+        while prompt is not None:
+            with tracing.span("step", step="single_call", first=len(reasoning_steps) + 1, prompt_chars=len(prompt)):
+                response = await self.client.agenerate(prompt, temperature=temperature)
+            prompt, prefix_key, final_answer = self._take_single_call(
+                question, response, reasoning_steps, prefix_key, steps, attempt
+            )
+            attempt += 1
+        
+        while len(reasoning_steps) < self._reasoning_step_count(steps):
+            step_prompt = self._create_step_prompt(question, reasoning_steps)
+            with tracing.span("step", step=len(reasoning_steps) + 1, prompt_chars=len(step_prompt)):
+                next_step = await self.client.agenerate(step_prompt, temperature=temperature)
+            reasoning_steps.append(next_step)
+            prefix_key = self._remember_step(prefix_key, next_step)
+            final_answer = None
+        
+        if final_answer is None:
+            final_prompt = self._create_final_prompt(question, reasoning_steps)
+            with tracing.span("step", step="final", prompt_chars=len(final_prompt)):
+                final_answer = await self.client.agenerate(final_prompt, temperature=temperature)
         
         return {
             "question": question,
@@ -62,6 +159,102 @@ class ChainOfThought:
             "final_answer": final_answer
         }
     
+    def solve_many(self, questions, concurrency=4, return_exceptions=False, **kwargs):
+        """
+        Solve many questions concurrently, yielding results as they finish.
+        
+        Args:
+            questions (iterable): Question strings, or dicts with a "question" key and
+                optional per-question "steps"/"temperature" overrides.
+            concurrency (int, optional): Maximum number of questions in flight. Defaults to 4.
+            return_exceptions (bool, optional): Yield a failed question's exception instead
+                of raising it. Defaults to False.
+            **kwargs: Default solve() arguments for every question (e.g. temperature=0.2).
+            
+        Yields:
+            tuple: (index, result) where index is the question's position in the input.
+        """
+        return batch.solve_many(
+            self.solve, questions, self._batch_parameters,
+            concurrency=concurrency, return_exceptions=return_exceptions, **kwargs
+        )
+    
+    def solve_many_async(self, questions, concurrency=4, return_exceptions=False, **kwargs):
+        """
+        Async version of solve_many(), driving solve_async() on the current event loop.
+        
+        Use as: async for index, result in solver.solve_many_async(questions): ...
+        """
+        return batch.solve_many_async(
+            self.solve_async, questions, self._batch_parameters,
+            concurrency=concurrency, return_exceptions=return_exceptions, **kwargs
+        )
+    
+    def solve_self_consistent(self, question, k=5, quorum=None, temperature=0.7, **kwargs):
+        """
+        Solve with k concurrent sampled chains and return the majority answer.
+        
+        The vote ends, and the remaining chains are cancelled, as soon as
+        `quorum` chains agree on the (numerically normalized) answer.
+        
+        Args:
+            question (str): The question or problem to solve.
+            k (int, optional): Number of chains to sample. Defaults to 5.
+            quorum (int, optional): Agreeing chains needed to stop early. Defaults to a majority of k.
+            temperature (float, optional): Sampling temperature. Defaults to 0.7.
+            **kwargs: Extra solve arguments for every chain (e.g. steps=3).
+            
+        Returns:
+            dict: The winning final_answer with votes, agreement and the completed chains.
+        """
+        return self_consistency.solve_self_consistent(
+            self, question, k=k, quorum=quorum, temperature=temperature, **kwargs
+        )
+    
+    async def solve_self_consistent_async(self, question, k=5, quorum=None, temperature=0.7, **kwargs):
+        """Async version of solve_self_consistent()."""
+        return await self_consistency.solve_self_consistent_async(
+            self, question, k=k, quorum=quorum, temperature=temperature, **kwargs
+        )
+    
+    def _check_mode(self, mode):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported mode: {mode}. Use one of {', '.join(self.MODES)}.")
+    
+    def _reasoning_step_count(self, steps):
+        """Number of reasoning steps generated before the final answer (the initial step is always generated)."""
+        return max(1, steps - 1)
+    
+    def _start_chain(self, question, steps, temperature, reuse_prefix):
+        """
+        Look up the reasoning steps already generated for this question.
+        
+        Returns:
+            tuple: (reasoning_steps, prefix_key). prefix_key is None when prefix reuse is off,
+                in which case steps are neither looked up nor recorded.
+        """
+        if reuse_prefix is None:
+            reuse_prefix = temperature == 0
+        if not reuse_prefix:
+            return [], None
+        
+        root_key = PrefixStore.root_key(
+            type(self).__name__, self.client.provider, self.client.model_name, question, temperature
+        )
+        return self.prefix_store.walk(root_key, self._reasoning_step_count(steps))
+    
+    def _remember_step(self, prefix_key, step):
+        """Record a newly generated step in the prefix store and return the extended chain key."""
+        if prefix_key is None:
+            return None
+        return self.prefix_store.extend(prefix_key, step)
+    
+    def _create_step_prompt(self, question, reasoning_steps):
+        """Create the prompt for the next reasoning step given the steps so far."""
+        if not reasoning_steps:
+            return self._create_initial_prompt(question)
+        return self._create_continuation_prompt(question, reasoning_steps, len(reasoning_steps) + 1)
+    
     def _create_initial_prompt(self, question):
         """Create the initial prompt for starting the reasoning chain."""
         return f"""
@@ -89,6 +282,92 @@ I'm solving this problem step-by-step. Here's my reasoning so far:
 Let me continue with the next step in my reasoning:
 
 Step {current_step}: 
+"""
+    
+    def _first_single_call_prompt(self, question, reasoning_steps, steps, mode):
+        """Return the first single-call prompt, or None if single-call generation is not needed."""
+        step_count = self._reasoning_step_count(steps)
+        if mode != "single_call" or len(reasoning_steps) >= step_count:
+            return None
+        return self._create_single_call_prompt(question, reasoning_steps, step_count)
+    
+    def _take_single_call(self, question, response, reasoning_steps, prefix_key, steps, attempt):
+        """
+        Add the steps parsed from a single-call response to the chain.
+        
+        Shared by solve() and solve_async(). Missing steps are re-prompted up to
+        max_reprompts times, but not after a response that added no steps, since
+        resending the same prompt is unlikely to do better; the remaining steps
+        are then generated one request per step.
+        
+        Args:
+            question (str): The question being solved.
+            response (str): The single-call response.
+            reasoning_steps (list): The chain so far; new steps are appended to it.
+            prefix_key: The prefix store key of the chain so far.
+            steps (int): Number of steps requested from solve().
+            attempt (int): Single-call requests made before this response.
+        
+        Returns:
+            tuple: (next_prompt, prefix_key, final_answer); next_prompt is None when
+                single-call generation is over.
+        """
+        step_count = self._reasoning_step_count(steps)
+        new_steps, final_answer = self._split_single_call(response, len(reasoning_steps) + 1, step_count)
+        for step in new_steps:
+            reasoning_steps.append(step)
+            prefix_key = self._remember_step(prefix_key, step)
+        
+        if not new_steps or len(reasoning_steps) >= step_count or attempt >= self.max_reprompts:
+            return None, prefix_key, final_answer
+        return self._create_single_call_prompt(question, reasoning_steps, step_count), prefix_key, final_answer
+    
+    def _split_single_call(self, response, first, last):
+        """
+        Split a single-call response into its reasoning steps and final answer.
+        
+        Steps are taken in order from "Step {first}:" and parsing stops at the
+        first missing or out-of-order label, so only steps after a gap are re-prompted.
+        Labels are removed, so steps are stored as multi-call steps are and both
+        modes can share the prefix store.
+        
+        Returns:
+            tuple: (steps, final_answer); final_answer is None if the response has none.
+        """
+        final = _FINAL_START.search(response)
+        body = response[:final.start()] if final else response
+        final_answer = response[final.start():].strip() if final else None
+        if final_answer is None and self.answer_delimiter_start in body:
+            # Answer given without its label: it ends the last step
+            index = body.index(self.answer_delimiter_start)
+            body, final_answer = body[:index], body[index:].strip()
+        
+        labels = list(_STEP_START.finditer(body))
+        steps = []
+        for index, label in enumerate(labels):
+            if int(label.group(1)) != first + len(steps) or len(steps) == last - first + 1:
+                break
+            end = labels[index + 1].start() if index + 1 < len(labels) else len(body)
+            steps.append(body[label.end():end].strip())
+        return steps, final_answer
+    
+    def _create_single_call_prompt(self, question, reasoning_steps, step_count):
+        """Create the prompt asking for all remaining steps and the final answer in one response."""
+        first = len(reasoning_steps) + 1
+        previous_reasoning = ""
+        if reasoning_steps:
+            previous_reasoning = "Here's my reasoning so far:\n\n" + "\n\n".join(reasoning_steps) + "\n\n"
+        return f"""
+Question: {question}
+
+I need to solve this problem by thinking step-by-step.
+
+{previous_reasoning}Write Steps {first} to {step_count} of the reasoning, each starting on a new line with its label
+(Step {first}: ...), then give the final answer on its own line starting with "Final answer:".
+
+IMPORTANT: The final answer must be in decimal format (not as a fraction), rounded to 2 decimal places if needed.
+Put the numerical answer within these delimiters:
+{self.answer_delimiter_start} [your numerical answer here, as a decimal] {self.answer_delimiter_end}
 """
     
     def _create_final_prompt(self, question, reasoning_steps):
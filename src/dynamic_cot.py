@@ -1,5 +1,18 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+
 from .llm_client_factory import LLMClientFactory
-import re
+from . import batch
+from . import metrics
+from . import self_consistency
+from . import tracing
+from . import answer_extraction
+from .reasoning_context import ReasoningContext, context_budget_for_model
+
+logger = logging.getLogger(__name__)
 
 class DynamicChainOfThought:
     """
@@ -8,8 +21,17 @@ class DynamicChainOfThought:
     Instead of using a fixed number of reasoning steps, this class
     lets the model itself decide when it has reached a conclusion
     by detecting when it's ready to provide a final answer.
+    
+    With speculate=True, solve() requests the final answer over the reasoning
+    so far while each continuation step is in flight. If that step hits
+    max_steps or only repeats earlier reasoning, the prefetched answer is used
+    instead of one more sequential request; otherwise it is cancelled (async)
+    or discarded (sync).
     """
     
+    # solve() arguments that a problem dict passed to solve_many() may override
+    _batch_parameters = ("max_steps", "temperature", "speculate")
+    
     def __init__(self, provider="openai", **kwargs):
         """
         Initialize the Dynamic Chain of Thought handler.
@@ -19,28 +41,35 @@ class DynamicChainOfThought:
             **kwargs: Additional arguments to pass to the client constructor
                 For OpenAI: model (defaults to "gpt-4o")
                 For Gemini: api_key, model (defaults to "gemini-2.0-flash")
+                context_budget (int, optional): Estimated tokens of earlier reasoning to carry
+                    in each prompt. Defaults to a per-model budget.
+                speculation_workers (int, optional): Threads for speculative final answers in
+                    solve(). Defaults to 32.
         """
+        context_budget = kwargs.pop("context_budget", None)
+        self.speculation_workers = kwargs.pop("speculation_workers", 32)
         self.client = LLMClientFactory.create_client(provider=provider, **kwargs)
         
+        # Token budget for the earlier reasoning carried in each prompt
+        self.context_budget = context_budget or context_budget_for_model(self.client.model_name)
+        
         # Use standardized delimiters for detecting answers
-        self.answer_delimiter_start = "FINAL_ANSWER:"
-        self.answer_delimiter_end = "END_ANSWER"
+        self.answer_delimiter_start = answer_extraction.DELIMITER_START
+        self.answer_delimiter_end = answer_extraction.DELIMITER_END
         
         # Fall back to these patterns if delimiters aren't found
-        self.conclusion_patterns = [
-            r"(?i)therefore,?\s+(?:the)?\s*(?:final)?\s*answer\s+is",
-            r"(?i)(?:the)?\s*(?:final)?\s*answer\s+is",
-            r"(?i)in\s+conclusion",
-            r"(?i)thus,?\s+(?:the)?\s*(?:final)?\s*(?:answer|result)\s+is",
-            r"(?i)(?:the)?\s*(?:final)?\s*(?:answer|result)[\s:]+",
-            r"(?i)(?:so|hence),?\s+(?:the)?\s*(?:final)?\s*answer\s+is",
-            r"(?i)to\s+summarize",
-            r"(?i)my\s+final\s+answer",
-            r"(?i)final\s+result",
-            r"(?i)^\s*answer\s*[:=]"
-        ]
-    
-    def solve(self, question, max_steps=10, temperature=0.7):
+        self.conclusion_patterns = list(answer_extraction.CONCLUSION_PATTERNS)
+        self.answer_extractor = answer_extraction.AnswerExtractor(
+            self.answer_delimiter_start, self.answer_delimiter_end, self.conclusion_patterns
+        )
+        
+        # Worker threads for speculative final answers in solve(), created on first use; see close()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    @tracing.traced("solve", solver="DynamicChainOfThought")
+    @metrics.recorded_solve
+    def solve(self, question, max_steps=10, temperature=0.7, speculate=False):
         """
         Solve a problem using Dynamic Chain of Thought prompting.
         
@@ -48,6 +77,8 @@ class DynamicChainOfThought:
             question (str): The question or problem to solve.
             max_steps (int, optional): Maximum reasoning steps. Defaults to 10.
             temperature (float, optional): Temperature for generation. Defaults to 0.7.
+            speculate (bool, optional): Prefetch the final answer alongside each step,
+                at the cost of up to one extra request per step. Defaults to False.
             
         Returns:
             dict: A dictionary with the question, reasoning chains, and final answer.
@@ -55,12 +86,13 @@ class DynamicChainOfThought:
         # Initialize step 1
         initial_prompt = self._create_initial_prompt(question)
         reasoning_steps = []
-        combined_reasoning = ""
+        context = self._new_context()
         
         # Step 1: Get initial reasoning
-        initial_reasoning = self.client.generate(initial_prompt, temperature=temperature)
+        with tracing.span("step", step=1, prompt_chars=len(initial_prompt)):
+            initial_reasoning = self.client.generate(initial_prompt, temperature=temperature)
         reasoning_steps.append(initial_reasoning)
-        combined_reasoning = initial_reasoning
+        context.add_step(initial_reasoning)
         
         # Check if initial reasoning already contains a conclusion
         answer_found, final_answer = self._extract_answer(initial_reasoning)
@@ -73,33 +105,250 @@ class DynamicChainOfThought:
             }
         
         # Continue reasoning until reaching a conclusion or max steps
-        for step in range(2, max_steps + 1):
-            continuation_prompt = self._create_continuation_prompt(
-                question, combined_reasoning, step
-            )
-            next_reasoning = self.client.generate(continuation_prompt, temperature=temperature)
-            reasoning_steps.append(next_reasoning)
+        speculation = None
+        try:
+            for step in range(2, max_steps + 1):
+                continuation_prompt = self._create_continuation_prompt(
+                    question, context.render(), step
+                )
+                if speculate:
+                    speculation = self._speculate(question, reasoning_steps, context, temperature)
+                with tracing.span("step", step=step, prompt_chars=len(continuation_prompt)):
+                    next_reasoning = self.client.generate(continuation_prompt, temperature=temperature)
+                stalled = self._adds_nothing(next_reasoning, reasoning_steps)
+                reasoning_steps.append(next_reasoning)
+                context.add_step(next_reasoning)
+                
+                # Check if we've reached a conclusion
+                answer_found, final_answer = self._extract_answer(next_reasoning)
+                if answer_found:
+                    return {
+                        "question": question,
+                        "reasoning_steps": reasoning_steps,
+                        "final_answer": final_answer,
+                        "steps_taken": step
+                    }
+                
+                # Out of steps or going in circles: the prefetched answer is as good as a new one
+                if speculation is not None and (stalled or step == max_steps):
+                    final_answer_text = self._speculation_result(speculation)
+                    speculation = None
+                    if final_answer_text is not None:
+                        return self._final_result(question, reasoning_steps, final_answer_text, step)
+                self._discard_speculation(speculation)
+                speculation = None
+        finally:
+            self._discard_speculation(speculation)
+        
+        # If we hit max steps without a conclusion, generate a final answer
+        final_prompt = self._create_final_prompt(question, reasoning_steps, context)
+        with tracing.span("step", step="final", prompt_chars=len(final_prompt)):
+            final_answer_text = self.client.generate(final_prompt, temperature=temperature)
+        
+        return self._final_result(question, reasoning_steps, final_answer_text, max_steps)
+    
+    @tracing.traced("solve", solver="DynamicChainOfThought")
+    @metrics.recorded_solve
+    async def solve_async(self, question, max_steps=10, temperature=0.7, speculate=False):
+        """
+        Async version of solve() using the client's agenerate().
+        
+        Stale speculative requests are cancelled rather than left to finish.
+        
+        Args:
+            question (str): The question or problem to solve.
+            max_steps (int, optional): Maximum reasoning steps. Defaults to 10.
+            temperature (float, optional): Temperature for generation. Defaults to 0.7.
+            speculate (bool, optional): Prefetch the final answer alongside each step. Defaults to False.
+            
+        Returns:
+            dict: A dictionary with the question, reasoning chains, and final answer.
+        """
+        initial_prompt = self._create_initial_prompt(question)
+        reasoning_steps = []
+        context = self._new_context()
+        
+        with tracing.span("step", step=1, prompt_chars=len(initial_prompt)):
+            initial_reasoning = await self.client.agenerate(initial_prompt, temperature=temperature)
+        reasoning_steps.append(initial_reasoning)
+        context.add_step(initial_reasoning)
+        
+        answer_found, final_answer = self._extract_answer(initial_reasoning)
+        if answer_found:
+            return {
+                "question": question,
+                "reasoning_steps": reasoning_steps,
+                "final_answer": final_answer,
+                "steps_taken": 1
+            }
+        
+        speculation = None
+        try:
+            for step in range(2, max_steps + 1):
+                continuation_prompt = self._create_continuation_prompt(
+                    question, context.render(), step
+                )
+                if speculate:
+                    speculation = self._speculate_async(question, reasoning_steps, context, temperature)
+                with tracing.span("step", step=step, prompt_chars=len(continuation_prompt)):
+                    next_reasoning = await self.client.agenerate(continuation_prompt, temperature=temperature)
+                stalled = self._adds_nothing(next_reasoning, reasoning_steps)
+                reasoning_steps.append(next_reasoning)
+                context.add_step(next_reasoning)
+                
+                answer_found, final_answer = self._extract_answer(next_reasoning)
+                if answer_found:
+                    return {
+                        "question": question,
+                        "reasoning_steps": reasoning_steps,
+                        "final_answer": final_answer,
+                        "steps_taken": step
+                    }
+                
+                if speculation is not None and (stalled or step == max_steps):
+                    final_answer_text = await self._speculation_result_async(speculation)
+                    speculation = None
+                    if final_answer_text is not None:
+                        return self._final_result(question, reasoning_steps, final_answer_text, step)
+                self._discard_speculation(speculation)
+                speculation = None
+        finally:
+            self._discard_speculation(speculation)
+        
+        final_prompt = self._create_final_prompt(question, reasoning_steps, context)
+        with tracing.span("step", step="final", prompt_chars=len(final_prompt)):
+            final_answer_text = await self.client.agenerate(final_prompt, temperature=temperature)
+        
+        return self._final_result(question, reasoning_steps, final_answer_text, max_steps)
+    
+    @tracing.traced("solve", solver="DynamicChainOfThought")
+    @metrics.recorded_solve
+    def solve_stream(self, question, max_steps=10, temperature=0.7):
+        """
+        Solve a problem like solve(), yielding reasoning text as it is generated.
+        
+        Each request is cut off as soon as the model writes the END_ANSWER delimiter,
+        so chains that conclude early stop paying for text after the answer.
+        
+        Args:
+            question (str): The question or problem to solve.
+            max_steps (int, optional): Maximum reasoning steps. Defaults to 10.
+            temperature (float, optional): Temperature for generation. Defaults to 0.7.
             
-            # Keep combined reasoning manageable by keeping only last 2 steps if too long
-            if len(combined_reasoning) > 2000:
-                combined_reasoning = "\n\n".join(reasoning_steps[-2:])
+        Yields:
+            dict: Progress events:
+                {"type": "delta", "step": n, "text": chunk} for each streamed chunk
+                ("step" is "final" for the closing answer prompt),
+                {"type": "step", "step": n, "text": step_text} when a step is complete,
+                and finally {"type": "result", "result": result} with the dict solve() returns.
+        """
+        reasoning_steps = []
+        context = self._new_context()
+        
+        for step in range(1, max_steps + 1):
+            if step == 1:
+                prompt = self._create_initial_prompt(question)
             else:
-                combined_reasoning = combined_reasoning + "\n\n" + next_reasoning
+                prompt = self._create_continuation_prompt(question, context.render(), step)
+            
+            chunks = []
+            for chunk in self.client.generate_stream(prompt, temperature=temperature, stop=self.answer_delimiter_end):
+                chunks.append(chunk)
+                yield {"type": "delta", "step": step, "text": chunk}
+            step_text = "".join(chunks)
+            reasoning_steps.append(step_text)
+            yield {"type": "step", "step": step, "text": step_text}
+            
+            context.add_step(step_text)
             
-            # Check if we've reached a conclusion
-            answer_found, final_answer = self._extract_answer(next_reasoning)
+            answer_found, final_answer = self._extract_answer(step_text)
             if answer_found:
-                return {
+                yield {"type": "result", "result": {
                     "question": question,
                     "reasoning_steps": reasoning_steps,
                     "final_answer": final_answer,
                     "steps_taken": step
-                }
+                }}
+                return
         
-        # If we hit max steps without a conclusion, generate a final answer
-        final_prompt = self._create_final_prompt(question, reasoning_steps)
-        final_answer_text = self.client.generate(final_prompt, temperature=temperature)
+        final_prompt = self._create_final_prompt(question, reasoning_steps, context)
+        chunks = []
+        for chunk in self.client.generate_stream(final_prompt, temperature=temperature, stop=self.answer_delimiter_end):
+            chunks.append(chunk)
+            yield {"type": "delta", "step": "final", "text": chunk}
+        final_answer_text = "".join(chunks)
+        
+        _, extracted_answer = self._extract_answer(final_answer_text)
+        if not extracted_answer:
+            extracted_answer = final_answer_text
+        
+        yield {"type": "result", "result": {
+            "question": question,
+            "reasoning_steps": reasoning_steps,
+            "final_answer": extracted_answer,
+            "steps_taken": max_steps
+        }}
+    
+    def solve_many(self, questions, concurrency=4, return_exceptions=False, **kwargs):
+        """
+        Solve many questions concurrently, yielding results as they finish.
+        
+        Args:
+            questions (iterable): Question strings, or dicts with a "question" key and
+                optional per-question "max_steps"/"temperature" overrides.
+            concurrency (int, optional): Maximum number of questions in flight. Defaults to 4.
+            return_exceptions (bool, optional): Yield a failed question's exception instead
+                of raising it. Defaults to False.
+            **kwargs: Default solve() arguments for every question (e.g. temperature=0.2).
+            
+        Yields:
+            tuple: (index, result) where index is the question's position in the input.
+        """
+        return batch.solve_many(
+            self.solve, questions, self._batch_parameters,
+            concurrency=concurrency, return_exceptions=return_exceptions, **kwargs
+        )
+    
+    def solve_many_async(self, questions, concurrency=4, return_exceptions=False, **kwargs):
+        """
+        Async version of solve_many(), driving solve_async() on the current event loop.
         
+        Use as: async for index, result in solver.solve_many_async(questions): ...
+        """
+        return batch.solve_many_async(
+            self.solve_async, questions, self._batch_parameters,
+            concurrency=concurrency, return_exceptions=return_exceptions, **kwargs
+        )
+    
+    def solve_self_consistent(self, question, k=5, quorum=None, temperature=0.7, **kwargs):
+        """
+        Solve with k concurrent sampled chains and return the majority answer.
+        
+        The vote ends, and the remaining chains are cancelled, as soon as
+        `quorum` chains agree on the (numerically normalized) answer.
+        
+        Args:
+            question (str): The question or problem to solve.
+            k (int, optional): Number of chains to sample. Defaults to 5.
+            quorum (int, optional): Agreeing chains needed to stop early. Defaults to a majority of k.
+            temperature (float, optional): Sampling temperature. Defaults to 0.7.
+            **kwargs: Extra solve arguments for every chain (e.g. max_steps=5).
+            
+        Returns:
+            dict: The winning final_answer with votes, agreement and the completed chains.
+        """
+        return self_consistency.solve_self_consistent(
+            self, question, k=k, quorum=quorum, temperature=temperature, **kwargs
+        )
+    
+    async def solve_self_consistent_async(self, question, k=5, quorum=None, temperature=0.7, **kwargs):
+        """Async version of solve_self_consistent()."""
+        return await self_consistency.solve_self_consistent_async(
+            self, question, k=k, quorum=quorum, temperature=temperature, **kwargs
+        )
+    
+    def _final_result(self, question, reasoning_steps, final_answer_text, steps_taken):
+        """Build the result of a chain that ended with a separate final-answer request."""
         # Extract the final answer using our standard format
         _, extracted_answer = self._extract_answer(final_answer_text)
         if not extracted_answer:
@@ -110,36 +359,88 @@ class DynamicChainOfThought:
             "question": question,
             "reasoning_steps": reasoning_steps,
             "final_answer": extracted_answer,
-            "steps_taken": max_steps
+            "steps_taken": steps_taken
         }
     
+    def _adds_nothing(self, step_text, reasoning_steps):
+        """True if a step is empty or repeats an earlier step (ignoring case and whitespace)."""
+        normalized = " ".join(step_text.lower().split())
+        return not normalized or any(normalized == " ".join(step.lower().split()) for step in reasoning_steps)
+    
+    def _generate_final(self, final_prompt, temperature):
+        with tracing.span("step", step="final", speculative=True, prompt_chars=len(final_prompt)):
+            return self.client.generate(final_prompt, temperature=temperature)
+    
+    async def _agenerate_final(self, final_prompt, temperature):
+        with tracing.span("step", step="final", speculative=True, prompt_chars=len(final_prompt)):
+            return await self.client.agenerate(final_prompt, temperature=temperature)
+    
+    def _speculate(self, question, reasoning_steps, context, temperature):
+        """Start the final-answer request over the reasoning so far on a worker thread."""
+        final_prompt = self._create_final_prompt(question, reasoning_steps, context)
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        self.speculation_workers, thread_name_prefix="speculate")
+        # Run in the caller's context so the request's span nests under this solve
+        run = contextvars.copy_context().run
+        return self._executor.submit(run, self._generate_final, final_prompt, temperature)
+    
+    def close(self):
+        """Stop the speculation worker threads. Speculative requests still running finish unused."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def _speculate_async(self, question, reasoning_steps, context, temperature):
+        """Start the final-answer request over the reasoning so far as a task."""
+        final_prompt = self._create_final_prompt(question, reasoning_steps, context)
+        return asyncio.ensure_future(self._agenerate_final(final_prompt, temperature))
+    
+    def _speculation_result(self, speculation):
+        """Wait for a prefetched final answer; None if it failed and a new one must be requested."""
+        try:
+            response = speculation.result()
+        except Exception as e:
+            logger.warning(f"Speculative final answer failed, requesting it again: {e}")
+            self._record_speculation("failed")
+            return None
+        self._record_speculation("used")
+        return response
+    
+    async def _speculation_result_async(self, speculation):
+        """Async version of _speculation_result()."""
+        try:
+            response = await speculation
+        except Exception as e:
+            logger.warning(f"Speculative final answer failed, requesting it again: {e}")
+            self._record_speculation("failed")
+            return None
+        self._record_speculation("used")
+        return response
+    
+    def _discard_speculation(self, speculation):
+        """Cancel a prefetched final answer that is no longer needed (a running sync request finishes unused)."""
+        if speculation is None:
+            return
+        speculation.cancel()
+        self._record_speculation("discarded")
+    
+    def _record_speculation(self, outcome):
+        metrics.SPECULATIVE_ANSWERS.inc(solver=type(self).__name__, outcome=outcome)
+    
+    def _new_context(self):
+        """Create the token-budgeted reasoning context for one chain."""
+        return ReasoningContext(budget_tokens=self.context_budget)
+    
     def _extract_answer(self, text):
         """
         Extract the answer from text using delimiters or fallback patterns.
         Returns a tuple: (answer_found, answer_text)
         """
-        # First try to extract using our explicit delimiters
-        delimiter_pattern = f"{self.answer_delimiter_start}(.*?){self.answer_delimiter_end}"
-        delimiter_match = re.search(delimiter_pattern, text, re.DOTALL)
-        if delimiter_match:
-            return True, delimiter_match.group(1).strip()
-            
-        # Then try our fallback patterns
-        for pattern in self.conclusion_patterns:
-            match = re.search(pattern, text)
-            if match:
-                # Get everything after the conclusion marker
-                conclusion_start = match.end()
-                conclusion_text = text[conclusion_start:].strip()
-                return True, conclusion_text
-        
-        # If no patterns match, check for digits (last resort)
-        if re.search(r'\d+\.?\d*', text):
-            return False, None
-            
-        # If nothing found, return the last paragraph as a fallback
-        paragraphs = text.split('\n\n')
-        return False, paragraphs[-1].strip()
+        return self.answer_extractor.extract_step_answer(text)
     
     def _create_initial_prompt(self, question):
         """Create the initial prompt for starting the reasoning chain."""
@@ -173,14 +474,12 @@ IMPORTANT: If you're ready to provide a final answer, make sure to format it lik
 {self.answer_delimiter_start} [your numerical answer in decimal format, rounded to 2 decimal places if needed] {self.answer_delimiter_end}
 """
     
-    def _create_final_prompt(self, question, reasoning_steps):
+    def _create_final_prompt(self, question, reasoning_steps, context=None):
         """Create a prompt to generate the final answer."""
-        # Use only the last two steps if there are too many
-        if len(reasoning_steps) > 3:
-            selected_steps = reasoning_steps[-3:]
-            summary = "(...previous steps omitted...)\n\n" + "\n\n".join(selected_steps)
-        else:
-            summary = "\n\n".join(reasoning_steps)
+        # Fit the reasoning into the token budget, compacting older steps if needed
+        if context is None:
+            context = ReasoningContext.from_steps(reasoning_steps, budget_tokens=self.context_budget)
+        summary = context.render()
             
         return f"""
 Question: {question}
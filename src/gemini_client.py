@@ -1,20 +1,41 @@
 import google.generativeai as genai
+import itertools
 import os
-import time
-import random
 import logging
 
+from .base_client import BaseLLMClient, instrumented, iter_until_stop
+
 # Configure basic logging
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class GeminiClient:
+def _end_stream(response):
+    """
+    End a streaming generate_content() response.
+
+    The SDK's response has no close() of its own; it wraps the gRPC call, whose
+    cancel() stops the server sending. Ending a finished stream does nothing.
+    """
+    for target in (response, getattr(response, "_iterator", None)):
+        for name in ("close", "cancel"):
+            end = getattr(target, name, None)
+            if callable(end):
+                end()
+                return
+
+class GeminiClient(BaseLLMClient):
     """
     A client for interacting with the Gemini API.
     Handles rate limiting, API key configuration, and retries with exponential backoff.
     """
+
+    provider = "gemini"
+    
+    # Exponential backoff between retries; quota errors also slow every Gemini client down (see src.adaptive)
+    base_delay = 2
+    max_delay = 60
     
-    def __init__(self, api_key=None, model="gemini-1.5-flash", requests_per_min=2): # gemini-2.0-flash
+    def __init__(self, api_key=None, model="gemini-1.5-flash", requests_per_min=2, tokens_per_min=None, rate_limiter=None): # gemini-2.0-flash
         """
         Initialize the Gemini client with API key and rate limiting.
         
@@ -22,6 +43,8 @@ class GeminiClient:
             api_key (str, optional): The API key for Gemini. Defaults to environment variable.
             model (str, optional): The model to use. Defaults to "gemini-2.0-flash".
             requests_per_min (int, optional): Maximum requests per minute. Defaults to 2.
+            tokens_per_min (int, optional): Maximum tokens per minute. Defaults to no limit.
+            rate_limiter (RateLimiter, optional): A limiter shared with other clients on the same quota.
         """
         # Use provided API key or get from environment
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
@@ -32,20 +55,17 @@ class GeminiClient:
         genai.configure(api_key=self.api_key)
         
         # Set model and rate limiting parameters
-        self.model_name = model
+        super().__init__(model, requests_per_min, tokens_per_min=tokens_per_min, rate_limiter=rate_limiter)
         self.model = genai.GenerativeModel(self.model_name)
-        self.min_time_between_requests = 60 / requests_per_min
-        self.last_request_time = 0
-        
-    def _wait_for_rate_limit(self):
-        """Ensure rate limit compliance by waiting if needed."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_time_between_requests:
-            wait_time = self.min_time_between_requests - elapsed
-            logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds")
-            time.sleep(wait_time)
-        self.last_request_time = time.time()
     
+    def _is_throttle(self, error):
+        """Quota errors surface as ResourceExhausted / 429 "resource exhausted" or "quota exceeded"."""
+        if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+            return True
+        message = str(error).lower()
+        return "resource exhausted" in message or "quota exceeded" in message or "429" in message
+    
+    @instrumented("generate")
     def generate(self, prompt, temperature=0.7, max_retries=5):
         """
         Generate text based on the provided prompt with retry logic and exponential backoff.
@@ -57,42 +77,86 @@ class GeminiClient:
             
         Returns:
             str: The generated text.
+            
+        Raises:
+            RetriesExhaustedError: If every attempt failed.
+            CircuitOpenError: If Gemini has been failing and the circuit breaker is open.
+        """
+        def attempt():
+            response = self.model.generate_content(
+                prompt,
+                generation_config={"temperature": temperature}
+            )
+            return response.text
+        
+        text = self._call_with_retries(prompt, attempt, max_retries)
+        self._record_response(text)
+        return text
+    
+    @instrumented("stream")
+    def generate_stream(self, prompt, temperature=0.7, stop=None, max_retries=5):
         """
-        base_delay = 2  # Base delay in seconds
-        max_delay = 60  # Maximum delay in seconds
+        Stream generated text as it arrives, ending the request once `stop` is produced.
         
-        retries = 0
-        while True:
+        Failures before the first chunk are retried with the same backoff as generate();
+        once text has been yielded, errors are raised to the caller.
+        
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            stop (str, optional): Text after which to stop generating (kept in the output).
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+            
+        Yields:
+            str: Chunks of generated text.
+        """
+        def attempt():
+            response = self.model.generate_content(
+                prompt,
+                generation_config={"temperature": temperature},
+                stream=True
+            )
+            chunks = (chunk.text for chunk in response)
+            # Wait for the first chunk, so errors at the start of the stream are retried
             try:
-                # Ensure we respect rate limits
-                self._wait_for_rate_limit()
-                
-                # Make the API call
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={"temperature": temperature}
-                )
-                return response.text
-                
-            except Exception as e:
-                retries += 1
-                error_message = str(e).lower()
-                
-                # Check if we should retry or give up
-                if retries > max_retries:
-                    logger.error(f"Failed after {max_retries} retries. Last error: {e}")
-                    return f"Error after {max_retries} retries: {e}"
-                
-                # Calculate backoff with jitter
-                delay = min(max_delay, base_delay * (2 ** (retries - 1)))
-                jitter = random.uniform(0, 0.1 * delay)  # Add up to 10% jitter
-                total_delay = delay + jitter
-                
-                # Add extra delay for specific errors
-                if "resource exhausted" in error_message or "quota exceeded" in error_message:
-                    logger.warning("Resource exhaustion detected. Adding significant additional delay.")
-                    total_delay += 10  # Add 10 more seconds for resource exhaustion
-                
-                # Log the retry
-                logger.warning(f"Error: {e}. Retrying in {total_delay:.2f} seconds (attempt {retries}/{max_retries})")
-                time.sleep(total_delay)
\ No newline at end of file
+                return response, next(chunks, ""), chunks
+            except BaseException:
+                _end_stream(response)
+                raise
+        
+        response, first, rest = self._call_with_retries(prompt, attempt, max_retries)
+        streamed = []
+        try:
+            for text in iter_until_stop(itertools.chain([first], rest), stop):
+                streamed.append(text)
+                yield text
+        finally:
+            # The chain passed to iter_until_stop cannot close the stream, so end it here
+            rest.close()
+            _end_stream(response)
+        self._record_response("".join(streamed))
+    
+    @instrumented("agenerate")
+    async def agenerate(self, prompt, temperature=0.7, max_retries=5):
+        """
+        Async version of generate() using the native Gemini async API.
+        Rate limiting and backoff sleep with asyncio.sleep, so other chains keep running.
+        
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+            
+        Returns:
+            str: The generated text.
+        """
+        async def attempt():
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config={"temperature": temperature}
+            )
+            return response.text
+        
+        text = await self._acall_with_retries(prompt, attempt, max_retries)
+        self._record_response(text)
+        return text
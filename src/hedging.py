@@ -0,0 +1,229 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import logging
+import math
+import threading
+import time
+
+from .base_client import ClientWrapper
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+def _succeeded(future):
+    """True if a finished (concurrent or asyncio) future holds a response rather than an error."""
+    return not future.cancelled() and future.exception() is None
+
+class LatencyTracker:
+    """
+    Recent latencies of calls per (provider, model), for percentile estimates.
+
+    Keeps a sliding window of the latest samples, so the estimate follows a
+    provider whose latency drifts over a long run. A call cancelled before it
+    answered contributes the time it had run, a lower bound on its latency, so
+    slow calls that lose a hedge still hold the percentile up.
+    """
+
+    def __init__(self, window=1000):
+        """
+        Args:
+            window (int, optional): Samples kept per (provider, model). Defaults to 1000.
+        """
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider, model, seconds):
+        """Record the latency of one call, or a lower bound on it for a cancelled call."""
+        with self._lock:
+            samples = self._samples.get((provider, model))
+            if samples is None:
+                samples = self._samples[(provider, model)] = collections.deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, provider, model):
+        """Return how many samples are held for (provider, model)."""
+        with self._lock:
+            return len(self._samples.get((provider, model), ()))
+
+    def percentile(self, provider, model, fraction):
+        """
+        Return the nearest-rank percentile of the recorded latencies.
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model name.
+            fraction (float): Percentile as a fraction, e.g. 0.95.
+
+        Returns:
+            float: Latency in seconds, or None if nothing has been recorded.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get((provider, model), ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(fraction * len(samples)) - 1))
+        return samples[index]
+
+# Latencies shared by all hedged clients in the process, so estimates carry over between solvers
+LATENCY = LatencyTracker()
+
+class HedgedClient(ClientWrapper):
+    """
+    Client wrapper that hedges slow requests to a secondary client.
+
+    Each request goes to the wrapped (primary) client first. If it has not
+    answered within the hedge delay, the same prompt is also sent to the
+    secondary client, and whichever answers first wins; the other request is
+    cancelled. A primary that fails outright is also retried on the secondary
+    straight away (including a CircuitOpenError from a primary that is down).
+
+    The hedge delay is a percentile (p95 by default) of the primary's recent
+    latencies, so only the slowest few percent of requests are duplicated. Until
+    enough latencies have been seen, `initial_delay` is used.
+
+    Async calls cancel the losing request, recording the time it had run. Sync
+    calls run on worker pools and cannot interrupt a request that is already in
+    flight: the loser keeps its thread until it returns, and its latency is
+    recorded then. Primaries and hedges have separate pools of `max_workers`
+    threads each, so a hedge never queues behind primaries that are hung.
+    Streaming is not hedged and goes to the primary.
+    """
+
+    def __init__(self, client, secondary, percentile=0.95, initial_delay=2.0, min_delay=0.0,
+                 max_delay=None, min_samples=20, tracker=None, max_workers=32):
+        """
+        Args:
+            client: The primary client.
+            secondary: The client to hedge to, e.g. another provider or model.
+            percentile (float, optional): Hedge once the primary is slower than this
+                fraction of its recent calls. Defaults to 0.95.
+            initial_delay (float, optional): Hedge delay in seconds until `min_samples` latencies are known. Defaults to 2.
+            min_delay (float, optional): Lower bound on the hedge delay in seconds. Defaults to 0.
+            max_delay (float, optional): Upper bound on the hedge delay in seconds. Defaults to none.
+            min_samples (int, optional): Latencies needed before the percentile is used. Defaults to 20.
+            tracker (LatencyTracker, optional): Where latencies are recorded. Defaults to the process-wide LATENCY.
+            max_workers (int, optional): Threads for sync calls, for each of the primary
+                and the secondary. Defaults to 32.
+        """
+        super().__init__(client)
+        self.secondary = secondary
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.tracker = tracker or LATENCY
+        self.max_workers = max_workers
+        self._executors = {}
+        self._executor_lock = threading.Lock()
+
+    def hedge_delay(self):
+        """
+        Return how long to wait for the primary before hedging.
+
+        Returns:
+            float: Seconds.
+        """
+        provider, model = self.client.provider, self.client.model_name
+        if self.tracker.count(provider, model) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = self.tracker.percentile(provider, model, self.percentile)
+        delay = max(self.min_delay, delay)
+        if self.max_delay is not None:
+            delay = min(self.max_delay, delay)
+        return delay
+
+    def _record(self, client, start, response):
+        self.tracker.observe(client.provider, client.model_name, time.perf_counter() - start)
+        return response
+
+    def _record_hedge(self, winner):
+        metrics.HEDGED_REQUESTS.inc(provider=self.client.provider, model=self.client.model_name, winner=winner)
+
+    def _call(self, client, prompt, temperature, kwargs):
+        start = time.perf_counter()
+        return self._record(client, start, client.generate(prompt, temperature=temperature, **kwargs))
+
+    async def _acall(self, client, prompt, temperature, kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.agenerate(prompt, temperature=temperature, **kwargs)
+        except asyncio.CancelledError:
+            # The loser of a hedge: it took at least this long
+            self._record(client, start, None)
+            raise
+        return self._record(client, start, response)
+
+    def _submit(self, role, client, prompt, temperature, kwargs):
+        executor = self._executors.get(role)
+        if executor is None:
+            with self._executor_lock:
+                executor = self._executors.get(role)
+                if executor is None:
+                    executor = self._executors[role] = concurrent.futures.ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix=f"hedge-{role}")
+        # Worker threads run in the caller's context, so tracing spans and independent_draws() carry over
+        context = contextvars.copy_context()
+        return executor.submit(context.run, self._call, client, prompt, temperature, kwargs)
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        """
+        Generate with the primary client, hedging to the secondary if it is slow or fails.
+
+        Returns:
+            str: The first response.
+
+        Raises:
+            Exception: The primary's error, if both clients failed.
+        """
+        primary = self._submit("primary", self.client, prompt, temperature, kwargs)
+        pending = {primary: "primary"}
+        try:
+            concurrent.futures.wait(pending, timeout=self.hedge_delay())
+            if primary.done() and _succeeded(primary):
+                return primary.result()
+
+            logger.debug(f"Hedging request to {self.secondary.provider}/{self.secondary.model_name}")
+            pending[self._submit("secondary", self.secondary, prompt, temperature, kwargs)] = "secondary"
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in sorted(done, key=lambda future: pending[future] != "primary"):
+                    role = pending.pop(future)
+                    if _succeeded(future):
+                        self._record_hedge(role)
+                        return future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+        self._record_hedge("none")
+        return primary.result()
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        """Async version of generate(); the losing request is cancelled."""
+        primary = asyncio.ensure_future(self._acall(self.client, prompt, temperature, kwargs))
+        pending = {primary: "primary"}
+        try:
+            await asyncio.wait(pending, timeout=self.hedge_delay())
+            if primary.done() and _succeeded(primary):
+                return primary.result()
+
+            logger.debug(f"Hedging request to {self.secondary.provider}/{self.secondary.model_name}")
+            pending[asyncio.ensure_future(self._acall(self.secondary, prompt, temperature, kwargs))] = "secondary"
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda task: pending[task] != "primary"):
+                    role = pending.pop(task)
+                    if _succeeded(task):
+                        self._record_hedge(role)
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._record_hedge("none")
+        return primary.result()
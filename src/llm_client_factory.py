@@ -1,36 +1,248 @@
-from .gemini_client import GeminiClient
-from .openai_client import OpenAIClient
+import importlib
+import os
+import threading
+
+from .adaptive import get_controller
+from .rate_limiter import get_rate_limiter
+from .cache import CachedClient, get_response_cache
+from .hedging import HedgedClient
+from .single_flight import SingleFlightClient
+from .batch_api import BatchClient, LocalBatchBackend
+
+class ProviderSpec:
+    """
+    How to build the clients of one provider.
+
+    The client class may be given as an import path, so provider modules (and
+    SDKs such as google.generativeai) are only imported when first used.
+    """
+
+    def __init__(self, name, client, default_model=None, requests_per_min=60, options=(), api_key_env=None):
+        """
+        Args:
+            name (str): Provider name passed to create_client().
+            client (type or str): The client class, or its import path as "package.module:ClassName".
+            default_model (str, optional): Model used when create_client() is not given one.
+            requests_per_min (int, optional): Default request quota of the shared rate limiter. Defaults to 60.
+            options (tuple, optional): create_client() kwargs passed through to the client constructor.
+            api_key_env (str, optional): Environment variable holding the API key, used to tell quotas apart.
+        """
+        self.name = name
+        self.client = client
+        self.default_model = default_model
+        self.requests_per_min = requests_per_min
+        self.options = tuple(options)
+        self.api_key_env = api_key_env
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the client class on first use and return it."""
+        if isinstance(self.client, str):
+            with self._lock:
+                if isinstance(self.client, str):
+                    module_name, _, class_name = self.client.partition(":")
+                    module = importlib.import_module(module_name)
+                    self.client = getattr(module, class_name)
+        return self.client
 
 class LLMClientFactory:
     """
     Factory class that creates appropriate LLM clients based on the provider.
     This centralizes the client creation logic.
+
+    Providers are looked up in a registry. Built-in providers are registered by
+    import path and only imported when a client is first created, so importing
+    the factory (and the solvers) stays cheap. Other packages can add providers
+    with register_provider().
     """
-    
+
+    _providers = {}
+
+    # create_client() kwargs that configure the adaptive controller shared by clients on one quota
+    CONTROLLER_OPTIONS = ("max_concurrency", "min_concurrency", "failure_threshold", "reset_timeout")
+
+    @staticmethod
+    def register_provider(name, client, default_model=None, requests_per_min=60, options=(), api_key_env=None):
+        """
+        Register a provider so create_client(name) can build it.
+
+        The client class is constructed as client(model=..., rate_limiter=..., **options),
+        where options are the create_client() kwargs named in `options`.
+        Registering an existing name replaces it.
+
+        Args:
+            name (str): Provider name (case-insensitive).
+            client (type or str): A BaseLLMClient subclass, or its import path as
+                "package.module:ClassName" to import it lazily.
+            default_model (str, optional): Model used when create_client() is not given one.
+            requests_per_min (int, optional): Default request quota of the shared rate limiter. Defaults to 60.
+            options (tuple, optional): create_client() kwargs passed through to the client constructor.
+            api_key_env (str, optional): Environment variable holding the API key.
+
+        Returns:
+            ProviderSpec: The registered provider.
+        """
+        spec = ProviderSpec(name.lower(), client, default_model, requests_per_min, options, api_key_env)
+        LLMClientFactory._providers[spec.name] = spec
+        return spec
+
+    @staticmethod
+    def providers():
+        """Return the names of the registered providers."""
+        return sorted(LLMClientFactory._providers)
+
+    @staticmethod
+    def get_provider(provider):
+        """
+        Return the registration of a provider.
+
+        Raises:
+            ValueError: If no provider of that name is registered.
+        """
+        spec = LLMClientFactory._providers.get(provider.lower())
+        if spec is None:
+            names = ", ".join(f"'{name}'" for name in LLMClientFactory.providers())
+            raise ValueError(f"Unsupported provider: {provider}. Use one of {names}.")
+        return spec
+
+    @staticmethod
+    def _shared_rate_limiter(spec, api_key, model, kwargs):
+        """
+        Return the rate limiter for a new client.
+
+        Clients built by the factory share one limiter per (provider, api key, model),
+        so several solvers on the same key never exceed the quota together.
+        An explicit rate_limiter in kwargs takes precedence.
+        """
+        if kwargs.get("rate_limiter") is not None:
+            return kwargs["rate_limiter"]
+
+        return get_rate_limiter(
+            spec.name,
+            api_key,
+            model,
+            requests_per_min=kwargs.get("requests_per_min", spec.requests_per_min),
+            tokens_per_min=kwargs.get("tokens_per_min"),
+            burst=kwargs.get("burst"),
+            backend=kwargs.get("rate_limit_backend", "memory"),
+            state_dir=kwargs.get("rate_limit_dir"),
+        )
+
+    @staticmethod
+    def _hedge_client(hedge):
+        """Resolve the `hedge` argument to the secondary client."""
+        if isinstance(hedge, str):
+            return LLMClientFactory.create_client(hedge)
+        if isinstance(hedge, dict):
+            return LLMClientFactory.create_client(**hedge)
+        return hedge
+
+    @staticmethod
+    def _batch_client(client, batch, kwargs):
+        """Wrap a client in a BatchClient, resolving the `batch` argument to a backend."""
+        if batch is True:
+            backend = client.batch_backend()
+        elif isinstance(batch, (str, os.PathLike)):
+            backend = LocalBatchBackend(batch)
+        else:
+            backend = batch
+        options = {name: kwargs[name] for name in ("quiet_period", "poll_interval") if name in kwargs}
+        return BatchClient(client, backend, **options)
+
     @staticmethod
     def create_client(provider="openai", **kwargs):
         """
         Create an appropriate LLM client based on the requested provider.
-        
+
         Args:
-            provider (str): The LLM provider to use ("openai" or "gemini")
+            provider (str): A registered provider ("openai", "gemini", "mock" or one added with register_provider())
             **kwargs: Additional arguments to pass to the client constructor
-                For OpenAI: model (defaults to "gpt-4o")
+                For OpenAI: api_key, model (defaults to "gpt-4o"), base_url,
+                pool_size, connect_timeout and read_timeout
                 For Gemini: api_key, model (defaults to "gemini-2.0-flash")
-                
+                For the offline mock: model and the MockClient options
+                (responses, answer, steps_to_answer, latency, failure_rate, ...)
+                For all: requests_per_min, tokens_per_min and burst configure the
+                rate limiter shared by all clients on the same key and model,
+                or pass rate_limiter to supply one directly.
+                rate_limit_backend="file" (with optional rate_limit_dir) shares
+                the limit with every process on the host; "sqlite" (with
+                rate_limit_dir set to a database path) with every process on
+                any host using that database.
+                max_concurrency, min_concurrency, failure_threshold and
+                reset_timeout configure the adaptive concurrency and circuit
+                breaker shared with them (see src.adaptive); the first client
+                on a quota sets them.
+                cache: True for the default on-disk response cache, a SQLite
+                path, or a ResponseCache instance. Defaults to no caching.
+                hedge: a provider name, a dict of create_client() kwargs, or a
+                client to send slow requests to as well (see HedgedClient), with
+                hedge_percentile (default 0.95) and hedge_delay (seconds before
+                enough latencies are known, default 2). Defaults to no hedging.
+                batch: True for the provider's batch API, a directory for a
+                LocalBatchBackend, or a backend instance, to send requests as
+                batch jobs (see BatchClient), with quiet_period and
+                poll_interval. Defaults to interactive requests.
+                coalesce: False to send every request upstream even while an
+                identical one is in flight (see SingleFlightClient). Defaults
+                to True; independent_draws() blocks always send their own.
+
         Returns:
             An instance of the appropriate client class
         """
-        provider = provider.lower()
-        
-        if provider == "openai":
-            model = kwargs.get("model", "gpt-4o")
-            return OpenAIClient(model=model)
-        
-        elif provider == "gemini":
-            api_key = kwargs.get("api_key", None)
-            model = kwargs.get("model", "gemini-2.0-flash")
-            return GeminiClient(api_key=api_key, model=model)
-        
-        else:
-            raise ValueError(f"Unsupported provider: {provider}. Use 'openai' or 'gemini'.")
\ No newline at end of file
+        spec = LLMClientFactory.get_provider(provider)
+        client_class = spec.load()
+
+        model = kwargs.get("model") or spec.default_model
+        api_key = kwargs.get("api_key") or (os.environ.get(spec.api_key_env) if spec.api_key_env else None)
+        rate_limiter = LLMClientFactory._shared_rate_limiter(spec, api_key, model, kwargs)
+        get_controller(rate_limiter, **{name: kwargs[name] for name in LLMClientFactory.CONTROLLER_OPTIONS if name in kwargs})
+        options = {name: kwargs[name] for name in spec.options if name in kwargs}
+        if model is not None:
+            options["model"] = model
+        client = client_class(rate_limiter=rate_limiter, **options)
+
+        if kwargs.get("batch"):
+            client = LLMClientFactory._batch_client(client, kwargs["batch"], kwargs)
+        elif kwargs.get("hedge"):
+            client = HedgedClient(
+                client,
+                LLMClientFactory._hedge_client(kwargs["hedge"]),
+                percentile=kwargs.get("hedge_percentile", 0.95),
+                initial_delay=kwargs.get("hedge_delay", 2.0),
+            )
+
+        if kwargs.get("coalesce", True):
+            client = SingleFlightClient(client)
+
+        if kwargs.get("cache"):
+            client = CachedClient(client, get_response_cache(kwargs["cache"]))
+
+        return client
+
+LLMClientFactory.register_provider(
+    "openai",
+    f"{__package__}.openai_client:OpenAIClient",
+    default_model="gpt-4o",
+    requests_per_min=20,
+    options=("api_key", "base_url", "pool_size", "connect_timeout", "read_timeout"),
+    api_key_env="OPENAI_API_KEY",
+)
+LLMClientFactory.register_provider(
+    "gemini",
+    f"{__package__}.gemini_client:GeminiClient",
+    default_model="gemini-2.0-flash",
+    requests_per_min=2,
+    options=("api_key",),
+    api_key_env="GEMINI_API_KEY",
+)
+LLMClientFactory.register_provider(
+    "mock",
+    f"{__package__}.mock_client:MockClient",
+    default_model="mock-model",
+    requests_per_min=1000000,
+    options=(
+        "responses", "answer", "steps_to_answer", "step_tokens", "latency",
+        "failure_rate", "rate_limit_rate", "retry_delay", "seed",
+    ),
+)
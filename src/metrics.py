@@ -0,0 +1,333 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import math
+import os
+import tempfile
+import threading
+import time
+
+# Bucket upper bounds (seconds) for latency and wait histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Bucket upper bounds for prompt and response sizes, in estimated tokens
+SIZE_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+# Bucket upper bounds for model calls per solve
+STEP_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class _Metric:
+    """Common state of a labelled metric: one child value per combination of label values."""
+
+    type_name = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        """Forget all recorded values."""
+        with self._lock:
+            self._values.clear()
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Add `amount` to the counter for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Return the current count for the given label values (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Record one observation for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def get(self, **labels):
+        """
+        Return the recorded distribution for the given label values.
+
+        Returns:
+            dict: count, sum, and buckets as a list of (upper bound, cumulative count).
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"count": 0, "sum": 0.0, "buckets": [(bound, 0) for bound in self.buckets]}
+            counts = list(state["counts"])
+            total, count = state["sum"], state["count"]
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def samples(self):
+        with self._lock:
+            keys = sorted(self._values)
+        for key in keys:
+            labels = dict(zip(self.labelnames, key))
+            state = self.get(**labels)
+            for bound, count in state["buckets"]:
+                yield self.name + "_bucket", _format_labels(self.labelnames, key, [("le", _format_value(bound))]), count
+            yield self.name + "_sum", _format_labels(self.labelnames, key), state["sum"]
+            yield self.name + "_count", _format_labels(self.labelnames, key), state["count"]
+
+class MetricsRegistry:
+    """
+    A set of named metrics that can be read in-process or exported as a Prometheus text page.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """Return the counter called `name`, creating it on first use."""
+        return self._register(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        """Return the histogram called `name`, creating it on first use."""
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def get(self, name):
+        """Return the metric called `name`, or None."""
+        return self._metrics.get(name)
+
+    def reset(self):
+        """Forget the values of every metric (the metrics stay registered)."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The text page.
+        """
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the text page to `path` atomically, e.g. for node_exporter's textfile collector.
+
+        Args:
+            path (str): Destination file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+# The process-wide registry that clients and solvers record into
+REGISTRY = MetricsRegistry()
+
+GENERATE_SECONDS = REGISTRY.histogram(
+    "cot_generate_seconds",
+    "Wall time of generate calls, including rate limit waits and retries.",
+    ("provider", "model", "call"),
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "cot_rate_limit_wait_seconds",
+    "Time requests were held by the client-side rate limiter.",
+    ("provider", "model"),
+)
+RETRIES = REGISTRY.counter(
+    "cot_retries_total",
+    "Provider calls that failed and were retried, by error type.",
+    ("provider", "model", "error"),
+)
+RETRY_BACKOFF_SECONDS = REGISTRY.counter(
+    "cot_retry_backoff_seconds_total",
+    "Time spent sleeping between retries.",
+    ("provider", "model"),
+)
+ERRORS = REGISTRY.counter(
+    "cot_errors_total",
+    "Generate calls that failed after all retries, by error type.",
+    ("provider", "model", "error"),
+)
+PROMPT_CHARS = REGISTRY.counter("cot_prompt_chars_total", "Characters sent in prompts.", ("provider", "model"))
+RESPONSE_CHARS = REGISTRY.counter("cot_response_chars_total", "Characters received in responses.", ("provider", "model"))
+PROMPT_TOKENS = REGISTRY.histogram(
+    "cot_prompt_tokens", "Estimated tokens per prompt.", ("provider", "model"), buckets=SIZE_BUCKETS
+)
+RESPONSE_TOKENS = REGISTRY.histogram(
+    "cot_response_tokens", "Estimated tokens per response.", ("provider", "model"), buckets=SIZE_BUCKETS
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "cot_hedged_requests_total",
+    "Requests sent to a secondary provider after the primary was slow or failed, by which answered first.",
+    ("provider", "model", "winner"),
+)
+COALESCED_REQUESTS = REGISTRY.counter(
+    "cot_coalesced_requests_total",
+    "Requests answered by an identical request already in flight instead of a call of their own.",
+    ("provider", "model"),
+)
+SPECULATIVE_ANSWERS = REGISTRY.counter(
+    "cot_speculative_answers_total",
+    "Final answers requested ahead of time alongside a reasoning step, by whether they were used.",
+    ("solver", "outcome"),
+)
+SOLVE_SECONDS = REGISTRY.histogram("cot_solve_seconds", "Wall time per solve.", ("solver",))
+SOLVE_STEPS = REGISTRY.histogram(
+    "cot_solve_steps",
+    "Model calls per solve: reasoning steps, final answer, re-prompts and speculative answers sent to the provider.",
+    ("solver",), buckets=STEP_BUCKETS,
+)
+
+# Model calls made by the solve running in this context; a list so copied contexts share the count
+_solve_calls = contextvars.ContextVar("solve_calls", default=None)
+
+def count_model_call():
+    """Count one model call towards the solve it is made for, if any (see recorded_solve)."""
+    calls = _solve_calls.get()
+    if calls is not None:
+        calls[0] += 1
+
+@contextlib.contextmanager
+def _counting_calls(calls):
+    token = _solve_calls.set(calls)
+    try:
+        yield
+    finally:
+        _solve_calls.reset(token)
+
+def recorded_solve(method):
+    """
+    Decorate a solver's solve method to record its wall time and model calls.
+
+    Model calls are counted by the instrumented clients (count_model_call()) in
+    the same way for every solver, including calls made on worker threads and
+    tasks started by the solve. Responses served from the cache or shared with
+    an identical request in flight are not calls.
+
+    Supports plain and async methods returning the result dict, and generator
+    methods (such as solve_stream) whose final event is {"type": "result", ...}.
+    The solver label is the class name of the solver.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            calls = [0]
+            with _counting_calls(calls):
+                result = await method(self, *args, **kwargs)
+            _observe_solve(self, start, calls[0])
+            return result
+
+    elif inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            calls = [0]
+            events = method(self, *args, **kwargs)
+            try:
+                while True:
+                    # Count only while the solve runs, not while the caller handles an event
+                    with _counting_calls(calls):
+                        event = next(events, None)
+                    if event is None:
+                        return
+                    if event.get("type") == "result":
+                        _observe_solve(self, start, calls[0])
+                    yield event
+            finally:
+                events.close()
+
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            calls = [0]
+            with _counting_calls(calls):
+                result = method(self, *args, **kwargs)
+            _observe_solve(self, start, calls[0])
+            return result
+
+    return wrapper
+
+def _observe_solve(solver, start, calls):
+    solver_name = type(solver).__name__
+    SOLVE_SECONDS.observe(time.perf_counter() - start, solver=solver_name)
+    SOLVE_STEPS.observe(calls, solver=solver_name)
@@ -0,0 +1,256 @@
+import asyncio
+import math
+import random
+import re
+import threading
+import time
+import logging
+
+from .base_client import BaseLLMClient, instrumented, iter_until_stop
+from .answer_extraction import DELIMITER_START, DELIMITER_END
+
+logger = logging.getLogger(__name__)
+
+# The step a prompt asks for: the last "Step N:" label in it
+_STEP_LABEL = re.compile(r"Step (\d+):")
+_FINAL_PROMPT = "final answer is:"
+# A prompt asking for several steps and the answer in one response
+_STEP_RANGE = re.compile(r"Steps (\d+) to (\d+)")
+
+class MockServiceError(Exception):
+    """A simulated transient server error (HTTP 503)."""
+
+class MockRateLimitError(MockServiceError):
+    """A simulated quota error (HTTP 429)."""
+
+class LatencyModel:
+    """
+    Simulated request latency: a time to first token drawn from a distribution,
+    plus a fixed time per generated token.
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, mean=0.0, distribution="fixed", spread=0.0, per_token=0.0):
+        """
+        Initialize the latency model.
+
+        Args:
+            mean (float, optional): Mean time to first token in seconds. Defaults to 0.
+            distribution (str, optional): One of DISTRIBUTIONS. Defaults to "fixed".
+            spread (float, optional): Half-width for "uniform", standard deviation for
+                "normal", sigma of the underlying normal for "lognormal". Defaults to 0.
+            per_token (float, optional): Seconds per generated token. Defaults to 0.
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unsupported latency distribution: {distribution}. Use one of {', '.join(self.DISTRIBUTIONS)}.")
+        self.mean = mean
+        self.distribution = distribution
+        self.spread = spread
+        self.per_token = per_token
+
+    def first_token(self, rng):
+        """Sample the time to first token in seconds."""
+        if self.distribution == "uniform":
+            return rng.uniform(max(0.0, self.mean - self.spread), self.mean + self.spread)
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(self.mean, self.spread))
+        if self.distribution == "lognormal":
+            # Shift the underlying normal so the distribution keeps `mean` as its mean
+            return self.mean * math.exp(rng.gauss(-self.spread ** 2 / 2, self.spread))
+        if self.distribution == "exponential":
+            return rng.expovariate(1 / self.mean) if self.mean else 0.0
+        return self.mean
+
+    def sample(self, rng, response_tokens=0):
+        """Sample the latency of a whole response of `response_tokens` tokens."""
+        return self.first_token(rng) + self.per_token * response_tokens
+
+class MockClient(BaseLLMClient):
+    """
+    An offline, deterministic client for tests and benchmarks.
+
+    Responses are scripted (a list consumed in order, or a callable) or follow
+    built-in rules that mimic a model working through the solvers' prompts:
+    each "Step N:" prompt gets a reasoning step, steps from `steps_to_answer`
+    on and final-answer prompts include the FINAL_ANSWER delimiters, prompts
+    asking for "Steps N to M" get all of those steps and a final answer, and
+    prompts without a step label are answered directly. Latency, transient
+    failures and 429s are simulated from a seeded random generator and retried
+    like the real clients do.
+    """
+
+    provider = "mock"
+
+    def __init__(self, model="mock-model", responses=None, answer="42", steps_to_answer=3, step_tokens=40,
+                 latency=None, failure_rate=0.0, rate_limit_rate=0.0, retry_delay=0.01, seed=0,
+                 requests_per_min=1000000, tokens_per_min=None, rate_limiter=None):
+        """
+        Initialize the mock client.
+
+        Args:
+            model (str, optional): Model name reported to caches and limiters. Defaults to "mock-model".
+            responses (list or callable, optional): Scripted responses returned in order before
+                falling back to the rules, or a function (prompt, temperature) -> str.
+            answer (str, optional): The final answer the rules produce. Defaults to "42".
+            steps_to_answer (int, optional): First step that includes the final answer. Defaults to 3.
+            step_tokens (int, optional): Approximate length of each reasoning step. Defaults to 40.
+            latency (LatencyModel, optional): Simulated latency. Defaults to none.
+            failure_rate (float, optional): Probability that a request fails with a 503. Defaults to 0.
+            rate_limit_rate (float, optional): Probability that a request fails with a 429. Defaults to 0.
+            retry_delay (float, optional): Base backoff between retries in seconds. Defaults to 0.01.
+            seed (int, optional): Seed for latency and failure sampling. Defaults to 0.
+            requests_per_min (int, optional): Maximum requests per minute. Defaults to 1000000.
+            tokens_per_min (int, optional): Maximum tokens per minute. Defaults to no limit.
+            rate_limiter (RateLimiter, optional): A limiter shared with other clients on the same quota.
+        """
+        super().__init__(model, requests_per_min, tokens_per_min=tokens_per_min, rate_limiter=rate_limiter)
+        self.script = responses if callable(responses) else list(responses or [])
+        self.answer = answer
+        self.steps_to_answer = steps_to_answer
+        self.step_tokens = step_tokens
+        self.latency = latency or LatencyModel()
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_delay = retry_delay
+
+        self.calls = 0
+        self.simulated_seconds = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt, temperature):
+        """Return the scripted or rule-based response for a prompt."""
+        if callable(self.script):
+            return self.script(prompt, temperature)
+        with self._lock:
+            if self.script:
+                return self.script.pop(0)
+
+        step_range = _STEP_RANGE.search(prompt)
+        if step_range:
+            first, last = int(step_range.group(1)), int(step_range.group(2))
+            steps = "\n\n".join(self._step(step) for step in range(first, last + 1))
+            return f"{steps}\n\nFinal answer: {self._answer()}"
+
+        labels = _STEP_LABEL.findall(prompt)
+        step = int(labels[-1]) if labels else None
+        if step is not None and step < self.steps_to_answer and _FINAL_PROMPT not in prompt.lower():
+            return self._step(step)
+        return self._answer()
+
+    def _step(self, step):
+        filler = " Checking each quantity carefully before moving on." * max(0, self.step_tokens // 12 - 1)
+        return f"Step {step}: Working through part {step} of the problem, the running total is now {step * 6}.{filler}"
+
+    def _answer(self):
+        return f"Putting everything together gives {self.answer}.\n\n{DELIMITER_START} {self.answer} {DELIMITER_END}"
+
+    def _attempt(self, prompt, temperature):
+        """
+        Simulate one request: pick its outcome and latency.
+
+        Returns:
+            tuple: (response, delay, error) where error is the exception to raise after the delay, or None.
+        """
+        with self._lock:
+            self.calls += 1
+            outcome = self._rng.random()
+
+        response = error = None
+        if outcome < self.rate_limit_rate:
+            error = MockRateLimitError("429 Resource exhausted: simulated quota error")
+        elif outcome < self.rate_limit_rate + self.failure_rate:
+            error = MockServiceError("503 Service unavailable: simulated failure")
+        else:
+            response = self._respond(prompt, temperature)
+
+        with self._lock:
+            delay = self.latency.sample(self._rng, len(response or "") // 4)
+            self.simulated_seconds += delay
+        return response, delay, error
+
+    def _retry_delay(self, error, retries, max_retries):
+        """Exponential backoff from retry_delay, without jitter so runs stay reproducible."""
+        delay = self.retry_delay * 2 ** (retries - 1)
+        logger.warning(f"Error: {error}. Retrying (attempt {retries}/{max_retries})")
+        self._record_retry(error, delay)
+        return delay
+
+    def _is_throttle(self, error):
+        return isinstance(error, MockRateLimitError)
+
+    @instrumented("generate")
+    def generate(self, prompt, temperature=0.7, max_retries=5, **kwargs):
+        """
+        Generate a simulated response, sleeping for the sampled latency.
+
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Passed to a callable script. Defaults to 0.7.
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+            **kwargs: Accepted for compatibility with other clients and ignored.
+
+        Returns:
+            str: The generated text.
+        """
+        def attempt():
+            response, delay, error = self._attempt(prompt, temperature)
+            time.sleep(delay)
+            if error is not None:
+                raise error
+            return response
+
+        response = self._call_with_retries(prompt, attempt, max_retries)
+        self._record_response(response)
+        return response
+
+    @instrumented("stream")
+    def generate_stream(self, prompt, temperature=0.7, stop=None, max_retries=5, **kwargs):
+        """
+        Stream a simulated response word by word, ending early once `stop` is produced.
+
+        The first chunk arrives after the time to first token; each later chunk
+        takes the per-token latency. Failures happen before the first chunk and are retried.
+
+        Yields:
+            str: Chunks of generated text.
+        """
+        def attempt():
+            response, delay, error = self._attempt(prompt, temperature)
+            if error is not None:
+                time.sleep(delay)
+                raise error
+            return response, delay
+
+        response, delay = self._call_with_retries(prompt, attempt, max_retries)
+
+        def chunks():
+            time.sleep(delay - self.latency.per_token * (len(response) // 4))
+            for index, word in enumerate(re.findall(r"\S+\s*", response)):
+                if index:
+                    time.sleep(self.latency.per_token * (len(word) // 4 or 1))
+                yield word
+
+        streamed = []
+        for text in iter_until_stop(chunks(), stop):
+            streamed.append(text)
+            yield text
+        self._record_response("".join(streamed))
+
+    @instrumented("agenerate")
+    async def agenerate(self, prompt, temperature=0.7, max_retries=5, **kwargs):
+        """
+        Async version of generate(); latency and backoff use asyncio.sleep,
+        so many simulated requests can be in flight on one event loop.
+        """
+        async def attempt():
+            response, delay, error = self._attempt(prompt, temperature)
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            return response
+
+        response = await self._acall_with_retries(prompt, attempt, max_retries)
+        self._record_response(response)
+        return response
@@ -1,70 +1,374 @@
-import time
-import random
+import asyncio
+import concurrent.futures
+import email.utils
+import itertools
+import json
 import logging
-import sys
 import os
+import time
 
-# Add the parent directory to the Python path to access apis.py
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from apis import get_openai_response
+import requests
+
+from .base_client import BaseLLMClient, instrumented, iter_until_stop
 
-# Configure basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class OpenAIClient:
+# Used unless base_url or the OPENAI_BASE_URL environment variable says otherwise
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = frozenset((408, 409, 429, 500, 502, 503, 504))
+
+class OpenAIAPIError(Exception):
+    """An error response from the OpenAI API."""
+
+    def __init__(self, status, message, retry_after=None):
+        """
+        Args:
+            status (int): HTTP status code.
+            message (str): Error message from the response body.
+            retry_after (float, optional): Seconds the server asked us to wait before retrying.
+        """
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status in RETRYABLE_STATUS
+
+def parse_retry_after(headers):
+    """
+    Read how long the server asked us to wait from a response's headers.
+
+    Understands OpenAI's retry-after-ms as well as the standard Retry-After
+    header in either of its forms (delay in seconds or an HTTP date).
+
+    Args:
+        headers (Mapping): Response headers (case-insensitive, as on a requests response).
+
+    Returns:
+        float: Seconds to wait, or None if the server did not say.
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def _raise_for_status(response):
+    """Raise OpenAIAPIError for an error response, with the API's message and Retry-After."""
+    if response.status_code >= 400:
+        try:
+            message = response.json()["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = response.text[:200] or response.reason
+        raise OpenAIAPIError(response.status_code, message, parse_retry_after(response.headers))
+    return response
+
+def _stream_text(response):
+    """
+    Yield the text deltas of a streaming chat completion's server-sent events.
+
+    The response is closed when the generator finishes or is closed, which
+    ends the request if the server is still generating.
+    """
+    try:
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[len(b"data:"):].strip()
+            if data == b"[DONE]":
+                return
+            choices = json.loads(data).get("choices") or []
+            text = choices[0].get("delta", {}).get("content") if choices else None
+            if text:
+                yield text
+    finally:
+        response.close()
+
+class OpenAIBatchBackend:
+    """
+    Submits batch jobs to the OpenAI Batch API (see src.batch_api.BatchClient).
+
+    The input lines are uploaded as a JSONL file, a batch is created for
+    /v1/chat/completions, and the output and error files are downloaded once
+    the batch has completed.
+    """
+
+    def __init__(self, session, base_url, timeout=(10, 300), completion_window="24h"):
+        """
+        Args:
+            session (requests.Session): Authorized session, e.g. an OpenAIClient's.
+            base_url (str): API root.
+            timeout (tuple, optional): (connect, read) timeouts for the file transfers. Defaults to (10, 300).
+            completion_window (str, optional): How long OpenAI may take over a batch. Defaults to "24h".
+        """
+        self.session = session
+        self.base_url = base_url
+        self.timeout = timeout
+        self.completion_window = completion_window
+
+    def _request(self, method, path, **kwargs):
+        return _raise_for_status(self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs))
+
+    def submit(self, lines):
+        """Upload the input lines and create a batch; return the batch id."""
+        data = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        upload = self._request("POST", "/files", data={"purpose": "batch"},
+                               files={"file": ("batch.jsonl", data, "application/jsonl")}).json()
+        batch = self._request("POST", "/batches", json={
+            "input_file_id": upload["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": self.completion_window,
+        }).json()
+        return batch["id"]
+
+    def status(self, job_id):
+        """Return the batch object ("status" is e.g. validating, in_progress, completed, failed or expired)."""
+        return self._request("GET", f"/batches/{job_id}").json()
+
+    def results(self, job):
+        """Yield the output lines, then the error lines, of a finished batch."""
+        for key in ("output_file_id", "error_file_id"):
+            if job.get(key):
+                content = self._request("GET", f"/files/{job[key]}/content").text
+                for line in content.splitlines():
+                    if line.strip():
+                        yield json.loads(line)
+
+class OpenAIClient(BaseLLMClient):
     """
-    A client for interacting with the OpenAI API.
-    Uses GPT-4o model for text generation.
+    A client for interacting with the OpenAI chat completions API.
+
+    Requests go through one keep-alive HTTP session owned by the client, so
+    every step of every chain reuses pooled connections instead of paying for
+    a new TCP and TLS handshake. Async calls run on a worker pool sized to the
+    connection pool and share the same connections.
     """
-    
-    def __init__(self, model="gpt-4o", requests_per_min=20):
+
+    provider = "openai"
+
+    def __init__(self, model="gpt-4o", requests_per_min=20, tokens_per_min=None, rate_limiter=None,
+                 api_key=None, base_url=None, pool_size=16, connect_timeout=10, read_timeout=120):
         """
         Initialize the OpenAI client.
-        
+
         Args:
             model (str, optional): The model to use. Defaults to "gpt-4o".
             requests_per_min (int, optional): Maximum requests per minute. Defaults to 20.
+            tokens_per_min (int, optional): Maximum tokens per minute. Defaults to no limit.
+            rate_limiter (RateLimiter, optional): A limiter shared with other clients on the same quota.
+            api_key (str, optional): The API key for OpenAI. Defaults to the OPENAI_API_KEY environment variable.
+            base_url (str, optional): API root, e.g. a proxy or a local test server.
+                Defaults to OPENAI_BASE_URL or the public API.
+            pool_size (int, optional): Connections kept open, and the most requests in flight at once. Defaults to 16.
+            connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 10.
+            read_timeout (float, optional): Seconds to wait for the server between bytes of the response. Defaults to 120.
         """
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("No OpenAI API key provided. Please set OPENAI_API_KEY environment variable or pass api_key to constructor.")
+
         # Set model and rate limiting parameters
-        self.model_name = model
-        self.min_time_between_requests = 60 / requests_per_min
-        self.last_request_time = 0
-        
-    def _wait_for_rate_limit(self):
-        """Ensure rate limit compliance by waiting if needed."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_time_between_requests:
-            wait_time = self.min_time_between_requests - elapsed
-            logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds")
-            time.sleep(wait_time)
-        self.last_request_time = time.time()
-    
-    def generate(self, prompt, temperature=0.7, use_standard_format=True):
+        super().__init__(model, requests_per_min, tokens_per_min=tokens_per_min, rate_limiter=rate_limiter)
+
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        # pool_block makes callers wait for a free connection rather than opening
+        # throwaway ones, so pool_size caps the connections to the API
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        self._executor = None
+
+    def close(self):
+        """Close pooled connections and stop the async worker pool."""
+        self.session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _format_prompt(self, prompt, use_standard_format):
+        """Add formatting instructions for consistent numerical answers."""
+        if use_standard_format and "Question:" in prompt and not "FINAL_ANSWER:" in prompt:
+            prompt += "\n\nIMPORTANT: If your answer includes a numerical value, provide it in decimal format (not as a fraction), " \
+                      "rounded to 2 decimal places if needed. Put your final numerical answer within these delimiters: " \
+                      "FINAL_ANSWER: [your numerical answer here] END_ANSWER"
+        return prompt
+
+    def effective_prompt(self, prompt, use_standard_format=True, **kwargs):
+        """Return the prompt as generate() will send it, including the formatting rewrite."""
+        return self._format_prompt(prompt, use_standard_format)
+
+    def _complete(self, prompt, temperature):
+        """
+        Make one chat completions request over the pooled session.
+
+        Returns:
+            str: The text of the first choice.
+
+        Raises:
+            OpenAIAPIError: If the API returns an error status.
+            requests.RequestException: On connection errors and timeouts.
+        """
+        response = self.session.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": self.model_name,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+            },
+            timeout=self.timeout,
+        )
+        return _raise_for_status(response).json()["choices"][0]["message"]["content"] or ""
+
+    def _open_stream(self, prompt, temperature):
+        """
+        Start a streaming chat completions request.
+
+        Returns:
+            requests.Response: The open response, with the events not yet read.
+
+        Raises:
+            OpenAIAPIError: If the API returns an error status.
+            requests.RequestException: On connection errors and timeouts.
+        """
+        response = self.session.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": self.model_name,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "stream": True,
+            },
+            timeout=self.timeout,
+            stream=True,
+        )
+        try:
+            return _raise_for_status(response)
+        except OpenAIAPIError:
+            response.close()
+            raise
+
+    def batch_backend(self, **options):
+        """Return an OpenAIBatchBackend that submits jobs over this client's session and key."""
+        return OpenAIBatchBackend(self.session, self.base_url, **options)
+
+    def _should_retry(self, error):
+        """Connection errors, timeouts and transient statuses are retried; other errors are final."""
+        if isinstance(error, OpenAIAPIError):
+            return error.retryable
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _is_throttle(self, error):
+        return isinstance(error, OpenAIAPIError) and error.status == 429
+
+    @instrumented("generate")
+    def generate(self, prompt, temperature=0.7, use_standard_format=True, max_retries=5):
         """
         Generate text based on the provided prompt using OpenAI API.
-        
+
         Args:
             prompt (str): The prompt to generate from.
             temperature (float, optional): Controls randomness. Defaults to 0.7.
             use_standard_format (bool, optional): Whether to add formatting instructions. Defaults to True.
-            
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+
         Returns:
             str: The generated text.
+
+        Raises:
+            RetriesExhaustedError: If every attempt failed with a retryable error.
+            CircuitOpenError: If OpenAI has been failing and the circuit breaker is open.
+            OpenAIAPIError: For errors that are not retried, such as 400 or 401.
         """
-        # Ensure we respect rate limits
-        self._wait_for_rate_limit()
-        
-        # Add formatting instructions for consistent numerical answers
-        if use_standard_format and "Question:" in prompt and not "FINAL_ANSWER:" in prompt:
-            prompt += "\n\nIMPORTANT: If your answer includes a numerical value, provide it in decimal format (not as a fraction), " \
-                      "rounded to 2 decimal places if needed. Put your final numerical answer within these delimiters: " \
-                      "FINAL_ANSWER: [your numerical answer here] END_ANSWER"
-        
-        # Call the get_openai_response function from apis.py
-        response = get_openai_response(prompt, modell=self.model_name)
-        
-        # Update the last request time
-        self.last_request_time = time.time()
-        
-        return response
\ No newline at end of file
+        prompt = self._format_prompt(prompt, use_standard_format)
+
+        response = self._call_with_retries(prompt, lambda: self._complete(prompt, temperature), max_retries)
+        self._record_response(response)
+        return response
+
+    @instrumented("stream")
+    def generate_stream(self, prompt, temperature=0.7, stop=None, use_standard_format=True, max_retries=5):
+        """
+        Stream generated text as it arrives, ending the request once `stop` is produced.
+
+        Failures before the first chunk are retried with the same backoff as generate();
+        once text has been yielded, errors are raised to the caller.
+
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            stop (str, optional): Text after which to stop generating (kept in the output).
+            use_standard_format (bool, optional): Whether to add formatting instructions. Defaults to True.
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+
+        Yields:
+            str: Chunks of generated text.
+        """
+        prompt = self._format_prompt(prompt, use_standard_format)
+
+        def attempt():
+            chunks = _stream_text(self._open_stream(prompt, temperature))
+            # Wait for the first chunk, so errors at the start of the stream are retried
+            return next(chunks, ""), chunks
+
+        first, rest = self._call_with_retries(prompt, attempt, max_retries)
+        streamed = []
+        try:
+            for text in iter_until_stop(itertools.chain([first], rest), stop):
+                streamed.append(text)
+                yield text
+        finally:
+            # Closes the response, so the connection stops receiving once the stop text is seen
+            rest.close()
+        self._record_response("".join(streamed))
+
+    @instrumented("agenerate")
+    async def agenerate(self, prompt, temperature=0.7, use_standard_format=True, max_retries=5):
+        """
+        Async version of generate().
+
+        Rate limiting and backoff wait with asyncio.sleep. Requests run on a worker
+        pool with one thread per pooled connection, so up to pool_size requests are
+        in flight while the event loop stays free.
+
+        Args:
+            prompt (str): The prompt to generate from.
+            temperature (float, optional): Controls randomness. Defaults to 0.7.
+            use_standard_format (bool, optional): Whether to add formatting instructions. Defaults to True.
+            max_retries (int, optional): Maximum number of retries. Defaults to 5.
+
+        Returns:
+            str: The generated text.
+        """
+        prompt = self._format_prompt(prompt, use_standard_format)
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.pool_size, thread_name_prefix="openai-http")
+        loop = asyncio.get_running_loop()
+
+        async def attempt():
+            return await loop.run_in_executor(self._executor, self._complete, prompt, temperature)
+
+        response = await self._acall_with_retries(prompt, attempt, max_retries)
+        self._record_response(response)
+        return response
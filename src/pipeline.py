@@ -0,0 +1,277 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import logging
+
+from .chain_of_thought import ChainOfThought
+from .dynamic_cot import DynamicChainOfThought
+from .llm_client_factory import LLMClientFactory
+from .answer_extraction import extract_answer, validate_answer
+from .validation import problem_id
+
+logger = logging.getLogger(__name__)
+
+# Ways a question can be solved
+SOLVERS = ("fixed", "dynamic", "direct")
+
+# Record keys that override the run's defaults for one question
+RECORD_OPTIONS = ("solver", "provider", "model", "steps", "max_steps", "temperature", "mode")
+
+def read_records(source):
+    """
+    Stream question records from a JSONL file or file object.
+
+    Each line is a JSON object with a "question", or a bare JSON string.
+    Blank lines are skipped. Nothing is read ahead, so inputs of any size
+    are processed in constant memory.
+
+    Args:
+        source (str or file): Path to a JSONL file, "-" for stdin, or an open text file.
+
+    Yields:
+        dict: The records in input order.
+    """
+    if source == "-":
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            yield from read_records(f)
+        return
+    for number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, str):
+            record = {"question": record}
+        if "question" not in record:
+            raise ValueError(f"Input line {number} has no \"question\"")
+        yield record
+
+def load_checkpoint(path):
+    """
+    Return the ids finished by earlier runs, from a results or checkpoint file.
+
+    Records that ended in an error do not count as finished, so they are
+    rerun. A partially written last line is ignored.
+
+    Args:
+        path (str): JSONL file of result records (or {"id": ...} checkpoint lines).
+
+    Returns:
+        set: The finished ids.
+    """
+    finished = set()
+    if not path or not os.path.exists(path):
+        return finished
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping incomplete line in {path}")
+                continue
+            if record.get("error"):
+                finished.discard(record["id"])
+            else:
+                finished.add(record["id"])
+    return finished
+
+def _open_for_append(path):
+    """Open a JSONL file for appending, starting on a new line if a crash left a partial record."""
+    output = open(path, "a", encoding="utf-8")
+    if output.tell() > 0:
+        with open(path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                output.write("\n")
+    return output
+
+class Pipeline:
+    """
+    Solves a stream of question records and writes one result record per question as it finishes.
+
+    Records are read lazily and at most `concurrency` questions are in flight,
+    so memory does not grow with the input. Each result is written and flushed
+    as soon as it completes, and its id is checkpointed: rerunning with the
+    same checkpoint skips questions that already finished without an error.
+
+    Each record may choose its own solver, provider, model and solve options
+    (see RECORD_OPTIONS); solvers are created on first use and shared.
+    """
+
+    def __init__(self, solver="fixed", provider="openai", model=None, concurrency=8, steps=3, max_steps=10,
+                 temperature=0.7, mode="multi_call", **kwargs):
+        """
+        Args:
+            solver (str, optional): Default solver, from SOLVERS. Defaults to "fixed".
+            provider (str, optional): Default provider. Defaults to "openai".
+            model (str, optional): Default model. Defaults to the provider's default.
+            concurrency (int, optional): Maximum questions in flight. Defaults to 8.
+            steps (int, optional): steps for the fixed solver. Defaults to 3.
+            max_steps (int, optional): max_steps for the dynamic solver. Defaults to 10.
+            temperature (float, optional): Sampling temperature. Defaults to 0.7.
+            mode (str, optional): Fixed solver mode ("multi_call" or "single_call"). Defaults to "multi_call".
+            **kwargs: Passed to the solvers and clients (e.g. cache, requests_per_min).
+        """
+        self.defaults = {
+            "solver": solver, "provider": provider, "model": model,
+            "steps": steps, "max_steps": max_steps, "temperature": temperature, "mode": mode,
+        }
+        self.concurrency = concurrency
+        self.client_options = kwargs
+        self._solvers = {}
+
+    def _options(self, record):
+        options = dict(self.defaults)
+        options.update({name: record[name] for name in RECORD_OPTIONS if record.get(name) is not None})
+        if options["solver"] not in SOLVERS:
+            raise ValueError(f"Unsupported solver: {options['solver']}. Use one of {', '.join(SOLVERS)}.")
+        return options
+
+    def _solver(self, solver, provider, model):
+        """Return the solver (or client, for "direct") for a combination, creating it on first use."""
+        key = (solver, provider, model)
+        if key not in self._solvers:
+            kwargs = dict(self.client_options)
+            if model:
+                kwargs["model"] = model
+            if solver == "fixed":
+                self._solvers[key] = ChainOfThought(provider=provider, **kwargs)
+            elif solver == "dynamic":
+                self._solvers[key] = DynamicChainOfThought(provider=provider, **kwargs)
+            else:
+                self._solvers[key] = LLMClientFactory.create_client(provider=provider, **kwargs)
+        return self._solvers[key]
+
+    def close(self):
+        """Release the solvers' and clients' resources, such as worker threads and pooled connections."""
+        for solver in self._solvers.values():
+            close = getattr(solver, "close", None)
+            if close is not None:
+                close()
+        self._solvers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def _solve(self, solver, question, options):
+        """Run one question and return its solve result dict."""
+        if options["solver"] == "fixed":
+            return await solver.solve_async(question, steps=options["steps"], temperature=options["temperature"],
+                                            mode=options["mode"])
+        if options["solver"] == "dynamic":
+            return await solver.solve_async(question, max_steps=options["max_steps"], temperature=options["temperature"])
+        response = await solver.agenerate(f"Question: {question}\n\nSolve this problem step by step.",
+                                          temperature=options["temperature"])
+        return {"question": question, "reasoning_steps": [], "final_answer": response, "steps_taken": 1}
+
+    async def solve_record(self, record):
+        """
+        Solve one question record and build its result record.
+
+        Errors are recorded in the result's "error" field, not raised.
+
+        Args:
+            record (dict): A question record with optional RECORD_OPTIONS overrides.
+
+        Returns:
+            dict: The result record, as written by run_async().
+        """
+        result_record = {"id": problem_id(record), "question": record["question"]}
+        start = time.perf_counter()
+        try:
+            options = self._options(record)
+            solver = self._solver(options["solver"], options["provider"], options["model"])
+            # Solvers hold their client; "direct" uses the client itself
+            model = getattr(solver, "client", solver).model_name
+            result_record.update(solver=options["solver"], provider=options["provider"], model=model)
+            result = await self._solve(solver, record["question"], options)
+            result_record["answer"] = extract_answer(result["final_answer"])
+            result_record["final_answer"] = result["final_answer"]
+            result_record["reasoning_steps"] = result["reasoning_steps"]
+            result_record["steps_taken"] = result.get("steps_taken", len(result["reasoning_steps"]) + 1)
+            if record.get("expected_answer") is not None:
+                result_record["expected_answer"] = record["expected_answer"]
+                result_record["correct"] = validate_answer(record["expected_answer"], result_record["answer"])
+            result_record["error"] = None
+        except Exception as e:
+            logger.warning(f"Question {result_record['id']} failed: {e}")
+            result_record["error"] = f"{type(e).__name__}: {e}"
+        result_record["elapsed"] = round(time.perf_counter() - start, 3)
+        return result_record
+
+    async def run_async(self, records, output, checkpoint=None, on_result=None):
+        """
+        Solve every record not finished by an earlier run.
+
+        Args:
+            records (iterable): Question records, e.g. from read_records().
+            output (str or file): JSONL file to append results to, or an open text file (e.g. sys.stdout).
+            checkpoint (str, optional): File recording finished ids. Defaults to the output
+                file when output is a path; with a file object and no checkpoint, nothing is skipped.
+            on_result (callable, optional): Called with each result record as it is written.
+
+        Returns:
+            dict: Counts of "solved", "failed" and "skipped" questions.
+        """
+        if checkpoint is None and isinstance(output, str):
+            checkpoint = output
+        finished = load_checkpoint(checkpoint)
+        counts = {"solved": 0, "failed": 0, "skipped": 0}
+
+        def unfinished():
+            for record in records:
+                if problem_id(record) in finished:
+                    counts["skipped"] += 1
+                    continue
+                yield record
+
+        pending_records = unfinished()
+        pending = set()
+
+        def submit_next():
+            for record in pending_records:
+                pending.add(asyncio.ensure_future(self.solve_record(record)))
+                return True
+            return False
+
+        output_file = _open_for_append(output) if isinstance(output, str) else output
+        checkpoint_file = None
+        if checkpoint is not None and checkpoint != output:
+            checkpoint_file = _open_for_append(checkpoint)
+
+        try:
+            for _ in range(self.concurrency):
+                if not submit_next():
+                    break
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    result_record = task.result()
+                    output_file.write(json.dumps(result_record) + "\n")
+                    output_file.flush()
+                    if checkpoint_file is not None:
+                        checkpoint_file.write(json.dumps({"id": result_record["id"], "error": result_record["error"]}) + "\n")
+                        checkpoint_file.flush()
+                    counts["failed" if result_record["error"] else "solved"] += 1
+                    if on_result is not None:
+                        on_result(result_record)
+                    submit_next()
+        finally:
+            for task in pending:
+                task.cancel()
+            if output_file is not output:
+                output_file.close()
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+        return counts
+
+    def run(self, records, output, checkpoint=None, on_result=None):
+        """Blocking version of run_async()."""
+        return asyncio.run(self.run_async(records, output, checkpoint=checkpoint, on_result=on_result))
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+class PrefixStore:
+    """
+    Memoizes reasoning chains step by step.
+
+    Each chain is a hash chain: the root key identifies the chain's
+    configuration (provider, model, question, temperature), and the key for
+    step k+1 is the hash of step k's key and step k's text. The store maps a
+    key to the step generated after it, so any previously computed prefix of a
+    chain can be walked back without re-generating it.
+    """
+
+    def __init__(self, max_entries=100000):
+        """
+        Initialize an empty store.
+
+        Args:
+            max_entries (int, optional): Maximum number of stored steps; the least
+                recently used are dropped first. Defaults to 100000.
+        """
+        self.max_entries = max_entries
+        self._steps = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def root_key(*parts):
+        """Return the key of an empty chain identified by `parts`."""
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def child_key(key, step):
+        """Return the key of the chain `key` extended by `step`."""
+        return hashlib.sha256((key + "\0" + step).encode("utf-8")).hexdigest()
+
+    def walk(self, key, limit):
+        """
+        Follow the chain from `key`, collecting up to `limit` stored steps.
+
+        Args:
+            key (str): Key to start from, usually a root_key().
+            limit (int): Maximum number of steps to return.
+
+        Returns:
+            tuple: (steps, key) where key identifies the chain after the returned steps.
+        """
+        steps = []
+        with self._lock:
+            while len(steps) < limit:
+                step = self._steps.get(key)
+                if step is None:
+                    break
+                self._steps.move_to_end(key)
+                steps.append(step)
+                key = self.child_key(key, step)
+        return steps, key
+
+    def extend(self, key, step):
+        """
+        Record `step` as the step following chain `key`.
+
+        Args:
+            key (str): Key of the chain before the step.
+            step (str): The generated step.
+
+        Returns:
+            str: Key of the chain including the new step.
+        """
+        with self._lock:
+            self._steps[key] = step
+            self._steps.move_to_end(key)
+            while len(self._steps) > self.max_entries:
+                self._steps.popitem(last=False)
+        return self.child_key(key, step)
+
+    def __len__(self):
+        return len(self._steps)
@@ -0,0 +1,285 @@
+import os
+import pickle
+import tempfile
+import multiprocessing
+import multiprocessing.connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Solvers a pool can run by name; a solver class can be passed instead
+SOLVERS = ("fixed", "dynamic")
+
+class WorkerCrashedError(RuntimeError):
+    """A question's worker process died every time the question was assigned."""
+
+def _solver_class(solver):
+    """Resolve a solver name to its class; classes are returned unchanged."""
+    if not isinstance(solver, str):
+        return solver
+    if solver == "fixed":
+        from .chain_of_thought import ChainOfThought
+        return ChainOfThought
+    if solver == "dynamic":
+        from .dynamic_cot import DynamicChainOfThought
+        return DynamicChainOfThought
+    raise ValueError(f"Unsupported solver: {solver}. Use one of {', '.join(SOLVERS)} or a solver class.")
+
+def _picklable(error):
+    """Return the exception, or a RuntimeError carrying its message if it cannot be sent between processes."""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+def _worker_main(solver, provider, kwargs, concurrency, defaults, tasks, results):
+    """
+    Entry point of a worker process.
+
+    Builds one solver, then solves shards from `tasks` until it receives None,
+    sending ("result", index, result) on the `results` connection as each
+    question finishes and ("done", shard_id, None) after each shard. Each
+    worker has its own connection, so a worker that dies mid-send cannot
+    leave a lock held that the others need.
+    """
+    try:
+        cot = _solver_class(solver)(provider=provider, **kwargs)
+    except Exception as e:
+        results.send(("failed", None, _picklable(e)))
+        return
+
+    for shard_id, shard in iter(tasks.get, None):
+        indexes = [index for index, _ in shard]
+        items = [item for _, item in shard]
+        for position, result in cot.solve_many(items, concurrency=concurrency, return_exceptions=True, **defaults):
+            if isinstance(result, Exception):
+                result = _picklable(result)
+            results.send(("result", indexes[position], result))
+        results.send(("done", shard_id, None))
+
+class _Worker:
+    """Parent-side handle of a worker process and the shards assigned to it."""
+
+    def __init__(self, process, tasks, results):
+        self.process = process
+        self.tasks = tasks
+        self.results = results
+        self.shards = {}  # shard id -> {index: item} not yet answered
+
+    def answered(self, index):
+        """Mark a question answered, so it is not reassigned if the worker dies."""
+        for remaining in self.shards.values():
+            remaining.pop(index, None)
+
+class ProcessPool:
+    """
+    Solves questions on a pool of worker processes, each holding its own solver.
+
+    One process stops scaling once the Python-side work per call (prompt
+    building, answer extraction, JSON handling) is significant next to the
+    provider's latency, as with cached responses, the mock provider or high
+    quotas. The pool shards the input across `workers` processes, each
+    running `concurrency` solves at a time on its own threads.
+
+    Every worker's clients share one rate limit through the file-backed
+    limiter (rate_limit_backend="file"), so together the workers stay within
+    the provider's quota. Adaptive concurrency and the circuit breaker
+    (src.adaptive) still act per process.
+
+    If a worker process dies, its unfinished questions are reassigned to a
+    replacement worker, one question per shard. A question whose worker dies
+    on every one of its `max_attempts` assignments fails with WorkerCrashedError.
+    """
+
+    def __init__(self, solver="fixed", provider="openai", workers=None, concurrency=4, shard_size=8,
+                 max_attempts=2, mp_context=None, **kwargs):
+        """
+        Initialize the pool. Worker processes are started by solve_many().
+
+        Args:
+            solver (str or type, optional): "fixed", "dynamic", or a solver class constructed with
+                (provider=..., **kwargs) that has solve_many(). Defaults to "fixed".
+            provider (str, optional): LLM provider for every worker. Defaults to "openai".
+            workers (int, optional): Number of worker processes. Defaults to the CPU count.
+            concurrency (int, optional): Concurrent solves per worker. Defaults to 4.
+            shard_size (int, optional): Questions sent to a worker at a time. Defaults to 8.
+            max_attempts (int, optional): Times a question is assigned before a crashing worker
+                fails it. Defaults to 2.
+            mp_context (str, optional): multiprocessing start method ("fork", "spawn", ...).
+                Defaults to the platform default. Everything passed to workers must be
+                picklable under "spawn".
+            **kwargs: Passed to each worker's solver and client (e.g. model, requests_per_min).
+                rate_limit_backend defaults to "file", and rate_limit_dir to a directory
+                private to this pool.
+        """
+        if kwargs.get("rate_limiter") is not None:
+            raise ValueError("A rate_limiter instance cannot be shared between processes; "
+                             "use requests_per_min and rate_limit_dir instead.")
+        _solver_class(solver)
+        self.solver = solver
+        self.provider = provider
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.shard_size = shard_size
+        self.max_attempts = max_attempts
+        self.context = multiprocessing.get_context(mp_context)
+        self.kwargs = dict(kwargs)
+        self.kwargs.setdefault("rate_limit_backend", "file")
+        self._state_dir = None
+        if self.kwargs["rate_limit_backend"] == "file" and not self.kwargs.get("rate_limit_dir"):
+            self._state_dir = tempfile.TemporaryDirectory(prefix="chainofthought-pool-")
+            self.kwargs["rate_limit_dir"] = self._state_dir.name
+        self.crashes = 0
+
+    def _start_worker(self, defaults):
+        tasks = self.context.Queue()
+        results, child_results = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=_worker_main,
+            args=(self.solver, self.provider, self.kwargs, self.concurrency, defaults, tasks, child_results),
+            daemon=True,
+        )
+        process.start()
+        # Only the child holds the sending end, so reading reaches EOF when the child dies
+        child_results.close()
+        return _Worker(process, tasks, results)
+
+    def solve_many(self, questions, ordered=False, return_exceptions=False, **defaults):
+        """
+        Solve many questions across the worker processes.
+
+        Questions are read lazily and at most two shards per worker are
+        outstanding, so large inputs are not held in memory.
+
+        Args:
+            questions (iterable): Question strings, or dicts with a "question" key and the
+                per-question overrides the solver's solve_many() accepts.
+            ordered (bool, optional): Yield results in input order instead of as they
+                finish. Defaults to False.
+            return_exceptions (bool, optional): Yield a failed question's exception instead
+                of raising it. Defaults to False.
+            **defaults: Default solve() arguments for every question (e.g. steps=3).
+
+        Yields:
+            tuple: (index, result) where index is the question's position in the input.
+        """
+        items = enumerate(questions)
+        workers = {}  # results connection -> worker
+        shards = {}  # shard id -> the assigned worker's {index: item} not yet answered
+        attempts = {}  # index -> assignments so far, for questions not yet answered
+        retry = []  # (index, item) taken back from crashed workers
+        buffered = {}
+        next_index = 0
+        exhausted = False
+        shard_ids = iter(range(1 << 62))
+
+        def next_shard():
+            nonlocal exhausted
+            # Reassigned questions go out one per shard, so one that kills its worker fails alone
+            if retry:
+                return [retry.pop(0)]
+            shard = []
+            while len(shard) < self.shard_size and not exhausted:
+                try:
+                    shard.append(next(items))
+                except StopIteration:
+                    exhausted = True
+            return shard
+
+        def assign(worker):
+            while len(worker.shards) < 2:
+                shard = next_shard()
+                if not shard:
+                    return
+                shard_id = next(shard_ids)
+                for index, _ in shard:
+                    attempts[index] = attempts.get(index, 0) + 1
+                shards[shard_id] = dict(shard)
+                worker.shards[shard_id] = shards[shard_id]
+                worker.tasks.put((shard_id, shard))
+
+        def finish(index, result):
+            attempts.pop(index, None)
+            if isinstance(result, Exception) and not return_exceptions:
+                raise result
+            if not ordered:
+                return [(index, result)]
+            buffered[index] = result
+            ready = []
+            nonlocal next_index
+            while next_index in buffered:
+                ready.append((next_index, buffered.pop(next_index)))
+                next_index += 1
+            return ready
+
+        def reassign(worker):
+            """Take back a dead worker's unanswered questions; fail those out of attempts."""
+            failed = []
+            for shard_id, remaining in worker.shards.items():
+                del shards[shard_id]
+                for index, item in remaining.items():
+                    if attempts[index] >= self.max_attempts:
+                        failed.append((index, WorkerCrashedError(
+                            f"Worker process died {attempts[index]} times while solving question {index}")))
+                    else:
+                        retry.append((index, item))
+            return failed
+
+        def start_worker():
+            worker = self._start_worker(defaults)
+            workers[worker.results] = worker
+            assign(worker)
+
+        try:
+            for _ in range(self.workers):
+                start_worker()
+
+            while shards:
+                for connection in multiprocessing.connection.wait(list(workers)):
+                    worker = workers[connection]
+                    try:
+                        kind, key, value = connection.recv()
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        self.crashes += 1
+                        logger.warning(f"Worker process {worker.process.pid} exited with code "
+                                       f"{worker.process.exitcode}; reassigning its questions")
+                        del workers[connection]
+                        connection.close()
+                        failed = reassign(worker)
+                        start_worker()
+                        for index, error in failed:
+                            yield from finish(index, error)
+                        continue
+
+                    if kind == "failed":
+                        raise value
+                    if kind == "result":
+                        worker.answered(key)
+                        yield from finish(key, value)
+                    else:
+                        del shards[key]
+                        del worker.shards[key]
+                        assign(worker)
+        finally:
+            for worker in workers.values():
+                worker.tasks.put(None)
+            for worker in workers.values():
+                worker.process.join(timeout=1)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+                worker.results.close()
+
+    def close(self):
+        """Remove the pool's rate limit state directory."""
+        if self._state_dir is not None:
+            self._state_dir.cleanup()
+            self._state_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
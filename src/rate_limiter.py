@@ -0,0 +1,399 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    The bucket refills continuously at `rate_per_min` and holds at most
+    `capacity` tokens, so callers can burst up to the capacity and are then
+    held to the refill rate. Callers reserve tokens up front; the bucket may go
+    into debt, and the returned wait time is how long until the debt is repaid.
+    This keeps concurrent callers in a fair queue without a background thread.
+    """
+
+    def __init__(self, rate_per_min, capacity=None):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rate_per_min (float): Tokens added per minute.
+            capacity (float, optional): Maximum burst size. Defaults to one minute's worth of tokens.
+        """
+        self.rate = rate_per_min / 60
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Take `amount` tokens from the bucket and return how long to wait before using them.
+
+        Args:
+            amount (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds to wait (0 if the tokens were available).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class FileTokenBucket:
+    """
+    A token bucket whose state lives in a small file, shared by every process on the host.
+
+    Each reservation takes an exclusive flock on the state file, refills the
+    bucket from the stored timestamp and writes it back, so any number of
+    worker processes configured with the same file draw from one quota.
+    The file is reopened on every call, which keeps the lock working across
+    fork() (a shared file descriptor would share the lock as well).
+    """
+
+    _STATE = struct.Struct("dd")  # tokens, last update (wall clock)
+
+    def __init__(self, path, rate_per_min, capacity=None):
+        """
+        Initialize the bucket. The file is created full on first use.
+
+        Args:
+            path (str): Path of the state file. All processes sharing a quota must use the same path.
+            rate_per_min (float): Tokens added per minute.
+            capacity (float, optional): Maximum burst size. Defaults to one minute's worth of tokens.
+        """
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl file locking, which is not available on this platform.")
+        self.path = path
+        self.rate = rate_per_min / 60
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+
+    def reserve(self, amount=1):
+        """
+        Take `amount` tokens from the shared bucket and return how long to wait before using them.
+
+        Args:
+            amount (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds to wait (0 if the tokens were available).
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            now = time.time()
+            data = os.pread(fd, self._STATE.size, 0)
+            if len(data) == self._STATE.size:
+                tokens, updated = self._STATE.unpack(data)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            else:
+                tokens = self.capacity
+            tokens -= amount
+            os.pwrite(fd, self._STATE.pack(tokens, now), 0)
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self.rate
+
+class SQLiteTokenBucket:
+    """
+    A token bucket stored as a row of a SQLite table, shared by every process and host using the file.
+
+    Each reservation refills and debits the row inside an immediate
+    transaction, so reservations from any number of processes are serialized
+    by SQLite's file lock. The row also counts every token ever reserved, for
+    quota accounting (see sqlite_quota_usage()). Like FileTokenBucket, the
+    database is reopened on every call so the bucket keeps working across fork().
+    Sharing between hosts needs a filesystem with working POSIX locks.
+    """
+
+    def __init__(self, path, name, rate_per_min, capacity=None):
+        """
+        Initialize the bucket. The table and row are created full on first use.
+
+        Args:
+            path (str): SQLite database path. All processes sharing a quota must use the same path.
+            name (str): Name of the bucket's row.
+            rate_per_min (float): Tokens added per minute.
+            capacity (float, optional): Maximum burst size. Defaults to one minute's worth of tokens.
+        """
+        self.path = path
+        self.name = name
+        self.rate = rate_per_min / 60
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS quotas ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, used REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return _SQLiteConnection(self.path)
+
+    def reserve(self, amount=1):
+        """
+        Take `amount` tokens from the shared bucket and return how long to wait before using them.
+
+        Args:
+            amount (float, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds to wait (0 if the tokens were available).
+        """
+        with self._connect() as db:
+            now = time.time()
+            row = db.execute("SELECT tokens, updated_at FROM quotas WHERE name = ?", (self.name,)).fetchone()
+            if row is None:
+                tokens = self.capacity
+            else:
+                tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            tokens -= amount
+            db.execute(
+                "INSERT INTO quotas (name, tokens, updated_at, used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at, "
+                "used = used + excluded.used",
+                (self.name, tokens, now, amount),
+            )
+
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self.rate
+
+class _SQLiteConnection:
+    """Context manager running its body in one immediate (write-locked) transaction."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.db.close()
+
+def sqlite_quota_usage(path):
+    """
+    Return the tokens reserved so far from every SQLiteTokenBucket in a database.
+
+    Args:
+        path (str): SQLite database path.
+
+    Returns:
+        dict: Bucket name -> tokens reserved (requests for ".requests" buckets).
+    """
+    if not os.path.exists(path):
+        return {}
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        return dict(db.execute("SELECT name, used FROM quotas ORDER BY name").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        db.close()
+
+class RateLimiter:
+    """
+    Rate limiter enforcing a requests-per-minute and an optional tokens-per-minute quota.
+
+    One instance can be shared by any number of clients and threads; both
+    blocking (acquire) and async (acquire_async) waits are supported.
+    """
+
+    # Fraction of the configured request rate currently allowed; lowered by src.adaptive while throttled
+    rate_scale = 1.0
+
+    def __init__(self, requests_per_min, tokens_per_min=None, burst=None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_min (float): Maximum requests per minute.
+            tokens_per_min (float, optional): Maximum prompt + response tokens per minute. Defaults to no limit.
+            burst (float, optional): Maximum number of requests sent back to back. Defaults to requests_per_min.
+        """
+        self.request_bucket = TokenBucket(requests_per_min, capacity=burst)
+        self.token_bucket = TokenBucket(tokens_per_min) if tokens_per_min else None
+
+    def _reserve(self, tokens):
+        """Reserve one request plus `tokens` tokens and return the combined wait."""
+        wait_time = self.request_bucket.reserve(1 / self.rate_scale)
+        if self.token_bucket is not None and tokens:
+            wait_time = max(wait_time, self.token_bucket.reserve(tokens))
+        return wait_time
+
+    def acquire(self, tokens=0):
+        """
+        Block until a request using `tokens` tokens may be sent.
+
+        Args:
+            tokens (int, optional): Estimated prompt tokens of the request. Defaults to 0.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        wait_time = self._reserve(tokens)
+        if wait_time > 0:
+            logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds")
+            time.sleep(wait_time)
+        return wait_time
+
+    async def acquire_async(self, tokens=0):
+        """Async version of acquire() that yields to the event loop while waiting."""
+        wait_time = self._reserve(tokens)
+        if wait_time > 0:
+            logger.debug(f"Rate limiting: waiting {wait_time:.2f} seconds")
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    def record_tokens(self, tokens):
+        """
+        Charge tokens that were only known after the request, such as the response length.
+        The charge is never waited on directly; it delays the next acquire() instead.
+        """
+        if self.token_bucket is not None and tokens:
+            self.token_bucket.reserve(tokens)
+
+class FileRateLimiter(RateLimiter):
+    """
+    RateLimiter whose buckets are stored in files, so the quota is shared across processes.
+
+    Every process that creates a FileRateLimiter with the same directory and
+    name (and the same limits) draws from one combined quota.
+    """
+
+    def __init__(self, directory, name, requests_per_min, tokens_per_min=None, burst=None):
+        """
+        Initialize the file-backed rate limiter.
+
+        Args:
+            directory (str): Directory holding the bucket state files. Created if missing.
+            name (str): Name identifying the quota; used for the state file names.
+            requests_per_min (float): Maximum requests per minute across all processes.
+            tokens_per_min (float, optional): Maximum tokens per minute across all processes.
+            burst (float, optional): Maximum number of requests sent back to back. Defaults to requests_per_min.
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        self.request_bucket = FileTokenBucket(
+            os.path.join(directory, f"{name}.requests"), requests_per_min, capacity=burst
+        )
+        self.token_bucket = None
+        if tokens_per_min:
+            self.token_bucket = FileTokenBucket(os.path.join(directory, f"{name}.tokens"), tokens_per_min)
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    RateLimiter whose buckets are rows of a SQLite database, so the quota is shared
+    by every process, on any host, that uses the same database file.
+    """
+
+    def __init__(self, path, name, requests_per_min, tokens_per_min=None, burst=None):
+        """
+        Initialize the SQLite-backed rate limiter.
+
+        Args:
+            path (str): SQLite database path. Its directory is created if missing.
+            name (str): Name identifying the quota; used for the bucket row names.
+            requests_per_min (float): Maximum requests per minute across all processes.
+            tokens_per_min (float, optional): Maximum tokens per minute across all processes.
+            burst (float, optional): Maximum number of requests sent back to back. Defaults to requests_per_min.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.request_bucket = SQLiteTokenBucket(path, f"{name}.requests", requests_per_min, capacity=burst)
+        self.token_bucket = None
+        if tokens_per_min:
+            self.token_bucket = SQLiteTokenBucket(path, f"{name}.tokens", tokens_per_min)
+
+def default_state_dir():
+    """Default directory for FileRateLimiter state, shared by all processes of the current user."""
+    return os.path.join(tempfile.gettempdir(), "chainofthought-ratelimits")
+
+# Shared limiters, keyed by (provider, api key fingerprint, model)
+_shared_limiters = {}
+_shared_limiters_lock = threading.Lock()
+
+def _key_fingerprint(api_key):
+    """Hash the API key so raw keys are never kept as registry keys."""
+    if not api_key:
+        return None
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def get_rate_limiter(provider, api_key, model, requests_per_min, tokens_per_min=None, burst=None,
+                     backend="memory", state_dir=None):
+    """
+    Return the rate limiter shared by every client of the same provider, API key and model.
+
+    The limiter is created on first use; later calls for the same key get the
+    same instance and their limit arguments are ignored.
+
+    Args:
+        provider (str): The LLM provider name.
+        api_key (str): The API key the quota belongs to (may be None).
+        model (str): The model name.
+        requests_per_min (float): Maximum requests per minute.
+        tokens_per_min (float, optional): Maximum tokens per minute.
+        burst (float, optional): Maximum number of requests sent back to back.
+        backend (str, optional): "memory" to share the limiter within this process, "file" to
+            share it with every process on the host, or "sqlite" to share it with every process
+            using the same SQLite database, on any host. Defaults to "memory".
+        state_dir (str, optional): Directory for the "file" backend's state. Defaults to default_state_dir().
+            For the "sqlite" backend, the database path (default: ratelimits.sqlite in default_state_dir()).
+
+    Returns:
+        RateLimiter: The shared rate limiter.
+    """
+    if backend not in ("memory", "file", "sqlite"):
+        raise ValueError(f"Unsupported rate limit backend: {backend}. Use 'memory', 'file' or 'sqlite'.")
+
+    fingerprint = _key_fingerprint(api_key)
+    key = (provider, fingerprint, model, backend, state_dir)
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(key)
+        if limiter is None:
+            if backend == "sqlite":
+                limiter = SQLiteRateLimiter(
+                    state_dir or os.path.join(default_state_dir(), "ratelimits.sqlite"),
+                    f"{provider}-{fingerprint or 'default'}-{model}",
+                    requests_per_min,
+                    tokens_per_min=tokens_per_min,
+                    burst=burst,
+                )
+            elif backend == "file":
+                limiter = FileRateLimiter(
+                    state_dir or default_state_dir(),
+                    f"{provider}-{fingerprint or 'default'}-{model}",
+                    requests_per_min,
+                    tokens_per_min=tokens_per_min,
+                    burst=burst,
+                )
+            else:
+                limiter = RateLimiter(requests_per_min, tokens_per_min=tokens_per_min, burst=burst)
+            _shared_limiters[key] = limiter
+        return limiter
@@ -0,0 +1,138 @@
+import re
+
+from .tokens import estimate_tokens
+
+# Tokens of earlier reasoning carried in each continuation/final prompt, by model.
+# Larger budgets keep more steps verbatim at a higher cost per call.
+MODEL_CONTEXT_BUDGETS = {
+    "gpt-4o": 2000,
+    "gpt-4o-mini": 3000,
+    "gemini-1.5-flash": 3000,
+    "gemini-2.0-flash": 3000,
+}
+DEFAULT_CONTEXT_BUDGET = 1500
+
+def context_budget_for_model(model):
+    """Return the reasoning token budget for `model`, falling back to DEFAULT_CONTEXT_BUDGET."""
+    return MODEL_CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+
+# Sentence or line boundaries used to split a step into candidate facts
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+# Sentences worth keeping: ones with numbers, equations or explicit conclusions
+_FACT_PATTERN = re.compile(r"\d|=|(?i:\b(?:therefore|thus|so|hence|means|given)\b)")
+_STEP_LABEL = re.compile(r"^\s*(?:\*\*)?step\s*\d+\s*[:.)-]*(?:\*\*)?\s*", re.IGNORECASE)
+
+_FACTS_HEADER = "Key facts from earlier steps:"
+# Room for the header, the "(n earlier steps omitted)" line and separators
+_FACTS_OVERHEAD_TOKENS = estimate_tokens(_FACTS_HEADER) + 12
+
+class _Step:
+    """One reasoning step with its token estimate and compacted key facts."""
+
+    __slots__ = ("number", "text", "tokens", "facts_line", "facts_tokens")
+
+    def __init__(self, number, text, max_facts, max_fact_chars):
+        self.number = number
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.facts_line = f"- Step {number}: {_key_facts(text, max_facts, max_fact_chars)}"
+        self.facts_tokens = estimate_tokens(self.facts_line) + 1
+
+def _key_facts(text, max_facts, max_fact_chars):
+    """Pick the last few fact-bearing sentences of a step (or its first sentence) as a one-line summary."""
+    sentences = [_STEP_LABEL.sub("", sentence).strip() for sentence in _SENTENCE_SPLIT.split(text)]
+    sentences = [sentence for sentence in sentences if sentence]
+    facts = [sentence for sentence in sentences if _FACT_PATTERN.search(sentence)][-max_facts:]
+    if not facts:
+        facts = sentences[:1]
+    facts = [fact if len(fact) <= max_fact_chars else fact[:max_fact_chars - 3] + "..." for fact in facts]
+    return " ".join(facts)
+
+class ReasoningContext:
+    """
+    Keeps the reasoning carried between DynamicChainOfThought steps within a token budget.
+
+    Every step is measured once (estimated tokens, no network tokenizer) and
+    summarized once into its key facts. When the full reasoning no longer fits
+    the budget, the most recent steps stay verbatim and older steps are replaced
+    by their key facts; step 1's facts (the problem setup) are always pinned.
+    """
+
+    def __init__(self, budget_tokens=DEFAULT_CONTEXT_BUDGET, max_facts_per_step=3, max_fact_chars=200):
+        """
+        Initialize an empty context.
+
+        Args:
+            budget_tokens (int, optional): Maximum estimated tokens of rendered reasoning.
+                Defaults to DEFAULT_CONTEXT_BUDGET.
+            max_facts_per_step (int, optional): Key facts kept per compacted step. Defaults to 3.
+            max_fact_chars (int, optional): Maximum length of a single fact. Defaults to 200.
+        """
+        self.budget_tokens = budget_tokens
+        self.max_facts_per_step = max_facts_per_step
+        self.max_fact_chars = max_fact_chars
+        self.steps = []
+        self.total_tokens = 0
+
+    @classmethod
+    def from_steps(cls, reasoning_steps, **kwargs):
+        """Build a context from a list of step texts."""
+        context = cls(**kwargs)
+        for step in reasoning_steps:
+            context.add_step(step)
+        return context
+
+    def add_step(self, text):
+        """
+        Record a new reasoning step.
+
+        Args:
+            text (str): The step text.
+        """
+        step = _Step(len(self.steps) + 1, text, self.max_facts_per_step, self.max_fact_chars)
+        self.steps.append(step)
+        self.total_tokens += step.tokens
+
+    def render(self):
+        """
+        Return the reasoning to place in the next prompt, within the token budget.
+
+        Returns:
+            str: All steps verbatim if they fit, otherwise a "Key facts" section
+                for older steps followed by the most recent steps verbatim.
+        """
+        if self.total_tokens <= self.budget_tokens:
+            return "\n\n".join(step.text for step in self.steps)
+
+        # Keep the newest steps verbatim in up to three quarters of the budget
+        verbatim_budget = self.budget_tokens * 3 // 4
+        newest = self.steps[-1]
+        verbatim = [self._fit(newest.text, verbatim_budget)]
+        used = estimate_tokens(verbatim[0]) + _FACTS_OVERHEAD_TOKENS
+        cutoff = len(self.steps) - 1
+        while cutoff > 0 and used + self.steps[cutoff - 1].tokens + 1 <= verbatim_budget:
+            cutoff -= 1
+            verbatim.insert(0, self.steps[cutoff].text)
+            used += self.steps[cutoff].tokens + 1
+
+        # Summarize the older steps: pin step 1, then add the newest summaries that still fit
+        older = self.steps[:cutoff]
+        chosen = set()
+        for step in older[:1] + older[:0:-1]:
+            if used + step.facts_tokens > self.budget_tokens:
+                continue
+            chosen.add(step.number)
+            used += step.facts_tokens
+
+        facts = [step.facts_line for step in older if step.number in chosen]
+        omitted = len(older) - len(chosen)
+        if omitted:
+            facts.append(f"- ({omitted} earlier step{'s' if omitted != 1 else ''} omitted)")
+
+        return _FACTS_HEADER + "\n" + "\n".join(facts) + "\n\n" + "\n\n".join(verbatim)
+
+    def _fit(self, text, budget_tokens):
+        """Trim a single over-long step to its last `budget_tokens` tokens."""
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+        return "..." + text[-budget_tokens * 4:]
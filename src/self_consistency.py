@@ -0,0 +1,104 @@
+import asyncio
+import logging
+
+from .answer_extraction import extract_answer, validate_answer
+from .base_client import independent_draws
+
+logger = logging.getLogger(__name__)
+
+async def solve_self_consistent_async(solver, question, k=5, quorum=None, temperature=0.7, tolerance=0.03, **solve_kwargs):
+    """
+    Solve a question with k sampled chains run concurrently and take a majority vote.
+
+    Answers are normalized with the same numeric handling the validation harness
+    uses (fractions, percentages, tolerance), so "0.67", "2/3" and "0.666" count
+    as one answer. As soon as `quorum` chains agree, the remaining chains are
+    cancelled, so the result usually arrives close to single-chain latency.
+
+    Args:
+        solver: A ChainOfThought or DynamicChainOfThought instance.
+        question (str): The question or problem to solve.
+        k (int, optional): Number of chains to sample. Defaults to 5.
+        quorum (int, optional): Number of agreeing chains that ends the vote early.
+            Defaults to a strict majority of k.
+        temperature (float, optional): Sampling temperature for every chain. Defaults to 0.7.
+        tolerance (float, optional): Numeric tolerance for two answers to agree. Defaults to 0.03.
+        **solve_kwargs: Extra arguments for solver.solve_async() (e.g. steps or max_steps).
+
+    Returns:
+        dict: question, final_answer (the winning answer), votes (answer -> count),
+            agreement (share of completed chains voting for the winner), and
+            chains (the completed solve results), chains_cancelled and chains_failed.
+
+    Raises:
+        ValueError: If k is less than 1.
+        Exception: The first chain's error, if every chain failed.
+    """
+    if k < 1:
+        raise ValueError(f"Self-consistency needs at least one chain; got k={k}.")
+    quorum = quorum or k // 2 + 1
+
+    # Each chain must be an independent sample, not a cached or shared response
+    with independent_draws():
+        tasks = [
+            asyncio.ensure_future(solver.solve_async(question, temperature=temperature, **solve_kwargs))
+            for _ in range(k)
+        ]
+
+    chains = []
+    failures = []
+    groups = []  # [{"answer": representative answer, "count": votes}]
+    try:
+        for next_chain in asyncio.as_completed(tasks):
+            try:
+                result = await next_chain
+            except Exception as e:
+                logger.warning(f"Self-consistency chain failed: {e}")
+                failures.append(e)
+                continue
+
+            chains.append(result)
+            answer = extract_answer(result["final_answer"])
+            if answer is None:
+                continue
+
+            for group in groups:
+                if validate_answer(group["answer"], answer, tolerance=tolerance):
+                    group["count"] += 1
+                    break
+            else:
+                group = {"answer": answer, "count": 1}
+                groups.append(group)
+
+            if group["count"] >= quorum:
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if not chains:
+        raise failures[0]
+
+    winner = max(groups, key=lambda group: group["count"]) if groups else None
+    return {
+        "question": question,
+        "final_answer": winner["answer"] if winner else chains[0]["final_answer"],
+        "votes": {group["answer"]: group["count"] for group in groups},
+        "agreement": winner["count"] / len(chains) if winner else 0.0,
+        "chains": chains,
+        "chains_cancelled": len(pending),
+        "chains_failed": len(failures),
+    }
+
+def solve_self_consistent(solver, question, k=5, quorum=None, temperature=0.7, tolerance=0.03, **solve_kwargs):
+    """
+    Blocking version of solve_self_consistent_async().
+
+    Runs its own event loop, so it cannot be called from inside a running loop;
+    use solve_self_consistent_async() there instead.
+    """
+    return asyncio.run(solve_self_consistent_async(
+        solver, question, k=k, quorum=quorum, temperature=temperature, tolerance=tolerance, **solve_kwargs
+    ))
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import logging
+
+from .base_client import ClientWrapper, draws_must_be_independent
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """One upstream request and the callers waiting on it."""
+
+    def __init__(self, task=None):
+        self.task = task  # asyncio.Task for async flights
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.waiters = 1
+
+class InFlightRequests:
+    """
+    Registry of requests in flight, shared by every SingleFlightClient that uses it.
+
+    Sync and async requests are tracked separately, and async ones per event
+    loop, since a caller can only wait on a request running in its own loop.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, key, start=None):
+        """
+        Return (flight, leader) for `key`, starting a new flight if none is in progress.
+
+        Args:
+            key (tuple): The request key.
+            start (callable, optional): For async flights, called (under the lock) to create
+                the flight's task when this caller is the leader.
+
+        Returns:
+            tuple: (_Flight, bool) where the bool is True if the caller leads the flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                return flight, False
+            flight = self._flights[key] = _Flight(start() if start else None)
+            return flight, True
+
+    def leave(self, key, flight):
+        """Forget a finished flight, so later requests start their own."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flights)
+
+# Flights shared by all single-flight clients in the process, so separate solvers coalesce too
+IN_FLIGHT = InFlightRequests()
+
+class SingleFlightClient(ClientWrapper):
+    """
+    Client wrapper that coalesces identical concurrent requests into one upstream call.
+
+    While a request for a (provider, model, prompt, temperature) is in flight,
+    identical requests from any other solver in the process wait for it and
+    receive the same response (or error) instead of sending their own. This
+    saves quota and duplicate latency when solver variants or repeated runs
+    send the same prompts at once, without a persistent cache. Nothing is kept
+    once the request finishes.
+
+    Inside an independent_draws() block (as in self-consistency sampling)
+    every call goes upstream, since those callers need separate samples.
+    Streaming is not coalesced.
+    """
+
+    def __init__(self, client, registry=None):
+        """
+        Args:
+            client: The client to wrap.
+            registry (InFlightRequests, optional): Where flights are tracked. Defaults to
+                the process-wide IN_FLIGHT.
+        """
+        super().__init__(client)
+        self.registry = registry or IN_FLIGHT
+
+    def _key(self, prompt, temperature, kwargs):
+        return (
+            self.client.provider,
+            self.client.model_name,
+            self.client.effective_prompt(prompt, **kwargs),
+            temperature,
+            repr(sorted(kwargs.items())),
+        )
+
+    def _record_coalesced(self):
+        metrics.COALESCED_REQUESTS.inc(provider=self.client.provider, model=self.client.model_name)
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        """Generate, or wait for an identical request already in flight and share its response."""
+        if draws_must_be_independent():
+            return self.client.generate(prompt, temperature=temperature, **kwargs)
+
+        key = self._key(prompt, temperature, kwargs)
+        flight, leader = self.registry.join(key)
+        if not leader:
+            self._record_coalesced()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self.client.generate(prompt, temperature=temperature, **kwargs)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self.registry.leave(key, flight)
+            flight.done.set()
+        return flight.response
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        """
+        Async version of generate().
+
+        The upstream request runs as its own task, so it continues when the
+        caller that started it is cancelled; it is cancelled only once every
+        caller waiting on it has been.
+        """
+        if draws_must_be_independent():
+            return await self.client.agenerate(prompt, temperature=temperature, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        key = (loop,) + self._key(prompt, temperature, kwargs)
+
+        def start():
+            return loop.create_task(self.client.agenerate(prompt, temperature=temperature, **kwargs))
+
+        flight, leader = self.registry.join(key, start)
+        if leader:
+            flight.task.add_done_callback(lambda task: self.registry.leave(key, flight))
+        else:
+            self._record_coalesced()
+
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0:
+                flight.task.cancel()
+            raise
@@ -0,0 +1,16 @@
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text without a tokenizer.
+
+    Uses the common rule of thumb of roughly four characters per token for
+    English text, which is close enough for rate limiting and budgeting.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Estimated token count (0 for empty text).
+    """
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
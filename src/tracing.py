@@ -0,0 +1,244 @@
+import collections
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+
+# The span that new spans are nested under
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class _NullSpan:
+    """Stand-in returned while tracing is disabled; every operation is a no-op."""
+
+    def set(self, **attributes):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """
+    One timed operation in a trace.
+
+    Spans started while another span is current are nested under it and share
+    its track, so each top-level operation (e.g. one solve) is drawn on its own
+    row of the timeline even when many run concurrently on one thread.
+    """
+
+    __slots__ = ("tracer", "name", "attributes", "start", "track", "_token")
+
+    def __init__(self, tracer, name, attributes, track):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.track = track
+        self.start = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes):
+        """Add or update attributes shown with the span."""
+        self.attributes.update(attributes)
+
+    def end(self):
+        """Finish the span and record it."""
+        self.tracer._record(self, time.perf_counter())
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.end()
+        return False
+
+class Tracer:
+    """
+    Collects spans in memory and exports them as a Chrome trace (viewable in Perfetto or chrome://tracing).
+
+    Tracing is off until enable() is called; while off, span() returns a shared
+    no-op object, so the hooks in clients and solvers cost almost nothing.
+    """
+
+    def __init__(self, max_spans=100000):
+        """
+        Args:
+            max_spans (int, optional): Most recent spans kept in memory. Defaults to 100000.
+        """
+        self.enabled = False
+        self._spans = collections.deque(maxlen=max_spans)
+        self._tracks = itertools.count(1)
+        self._track_names = {}
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Start recording spans."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording spans (already recorded spans are kept)."""
+        self.enabled = False
+
+    def clear(self):
+        """Forget all recorded spans."""
+        with self._lock:
+            self._spans.clear()
+            self._track_names.clear()
+
+    def span(self, name, **attributes):
+        """
+        Start a span to be used as a context manager; it becomes the parent of spans started inside it.
+
+        Args:
+            name (str): Operation name, e.g. "solve", "step" or "provider_call".
+            **attributes: Values shown with the span, e.g. step=2 or prompt_chars=1200.
+
+        Returns:
+            Span: The span (a no-op stand-in while tracing is disabled).
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        parent = _current_span.get()
+        if parent is not None:
+            track = parent.track
+        else:
+            track = next(self._tracks)
+            with self._lock:
+                self._track_names[track] = f"{name} {track}"
+        return Span(self, name, attributes, track)
+
+    def _record(self, span, end):
+        with self._lock:
+            self._spans.append((span.name, span.start, end, span.track, dict(span.attributes)))
+
+    def spans(self):
+        """
+        Return the recorded spans.
+
+        Returns:
+            list: (name, start, end, track, attributes) tuples; times are perf_counter() seconds.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def to_chrome_trace(self):
+        """
+        Build the trace in the Chrome trace event format.
+
+        Returns:
+            dict: {"traceEvents": [...]} with one complete ("X") event per span and one track per top-level span.
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            track_names = dict(self._track_names)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track, "args": {"name": track_name}}
+            for track, track_name in sorted(track_names.items())
+        ]
+        for name, start, end, track, attributes in spans:
+            events.append({
+                "name": name,
+                "cat": "cot",
+                "ph": "X",
+                "ts": round((start - self._epoch) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": pid,
+                "tid": track,
+                "args": {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                         for key, value in attributes.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """
+        Write the trace to a JSON file that Perfetto (ui.perfetto.dev) or chrome://tracing can open.
+
+        Args:
+            path (str): Destination file.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+def trace_generator(span, generator):
+    """
+    Run a generator inside `span`, making the span current only while the generator's own code runs.
+
+    Setting the span around the whole iteration would leak it into the
+    consumer's code between items; this keeps parentage correct for both sides.
+
+    Returns:
+        iterator: The generator itself while tracing is disabled, otherwise a traced wrapper.
+    """
+    if span is _NULL_SPAN:
+        return generator
+    return _run_in_span(span, generator)
+
+def _run_in_span(span, generator):
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            except BaseException as e:
+                span.set(error=type(e).__name__)
+                raise
+            finally:
+                _current_span.reset(token)
+            yield item
+    finally:
+        generator.close()
+        span.end()
+
+# The process-wide tracer used by clients and solvers
+TRACER = Tracer()
+
+def span(name, **attributes):
+    """Start a span on the process-wide tracer. See Tracer.span()."""
+    return TRACER.span(name, **attributes)
+
+def traced(name, **attributes):
+    """
+    Decorate a function (plain, async or generator) to run inside a span called `name`.
+
+    Args:
+        name (str): Span name.
+        **attributes: Fixed attributes added to every span.
+    """
+    def decorate(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with TRACER.span(name, **attributes):
+                    return await function(*args, **kwargs)
+
+        elif inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                return trace_generator(TRACER.span(name, **attributes), function(*args, **kwargs))
+
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with TRACER.span(name, **attributes):
+                    return function(*args, **kwargs)
+
+        return wrapper
+    return decorate
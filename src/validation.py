@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import logging
+
+from .chain_of_thought import ChainOfThought
+from .dynamic_cot import DynamicChainOfThought
+from .llm_client_factory import LLMClientFactory
+from .answer_extraction import extract_answer, validate_answer
+
+logger = logging.getLogger(__name__)
+
+# Solving methods compared by the validation runner
+METHODS = ("dynamic_cot", "fixed_cot", "regular")
+
+def load_problems(path):
+    """
+    Read a problem set from a JSON list or a JSONL file.
+
+    Every problem needs a "question" and an "expected_answer"; an optional "id"
+    identifies it in the results (otherwise a hash of the question is used).
+    JSONL files are read lazily, so problem sets can be much larger than memory.
+
+    Args:
+        path (str): Path to a .json or .jsonl file.
+
+    Yields:
+        dict: The problems in file order.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def problem_id(problem):
+    """Return the problem's "id", or a stable hash of its question."""
+    if problem.get("id") is not None:
+        return str(problem["id"])
+    return hashlib.sha256(problem["question"].encode("utf-8")).hexdigest()[:16]
+
+def load_results(path):
+    """
+    Read the records of an earlier (possibly interrupted) run.
+
+    A partially written last line is ignored. When a pair appears more than
+    once, the latest record wins.
+
+    Args:
+        path (str): The JSONL results file.
+
+    Returns:
+        dict: (problem id, method) -> record.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping incomplete result line in {path}")
+                continue
+            records[(record["id"], record["method"])] = record
+    return records
+
+def summarize(records):
+    """
+    Count passes, failures and errors per method.
+
+    Args:
+        records (iterable): Result records.
+
+    Returns:
+        dict: method -> {"passed", "failed", "errors"}.
+    """
+    summary = {}
+    for record in records:
+        counts = summary.setdefault(record["method"], {"passed": 0, "failed": 0, "errors": 0})
+        if record.get("error"):
+            counts["errors"] += 1
+        elif record["correct"]:
+            counts["passed"] += 1
+        else:
+            counts["failed"] += 1
+    return summary
+
+class ValidationRunner:
+    """
+    Runs (problem, method) pairs concurrently and streams each result to a JSONL file.
+
+    All solvers share the factory's rate limiter, so `concurrency` only bounds
+    how many pairs are in flight; the limiter sets the actual request rate.
+    Every completed pair is appended to the output file immediately, and a
+    rerun with the same file skips the pairs that already have a result.
+    Pairs that ended in an error are retried on the next run.
+    """
+
+    def __init__(self, provider="openai", methods=METHODS, concurrency=8, max_steps=5, steps=3, **kwargs):
+        """
+        Initialize the runner and its solvers.
+
+        Args:
+            provider (str, optional): LLM provider to use. Defaults to "openai".
+            methods (tuple, optional): Methods to run, from METHODS. Defaults to all.
+            concurrency (int, optional): Maximum pairs in flight. Defaults to 8.
+            max_steps (int, optional): max_steps for the dynamic method. Defaults to 5.
+            steps (int, optional): steps for the fixed method. Defaults to 3.
+            **kwargs: Passed to the solvers and client (e.g. model, cache).
+        """
+        unknown = [method for method in methods if method not in METHODS]
+        if unknown:
+            raise ValueError(f"Unsupported method: {unknown[0]}. Use one of {', '.join(METHODS)}.")
+
+        self.provider = provider
+        self.methods = tuple(methods)
+        self.concurrency = concurrency
+        self.max_steps = max_steps
+        self.steps = steps
+        self.dynamic_cot = DynamicChainOfThought(provider=provider, **kwargs) if "dynamic_cot" in methods else None
+        self.fixed_cot = ChainOfThought(provider=provider, **kwargs) if "fixed_cot" in methods else None
+        self.client = LLMClientFactory.create_client(provider=provider, **kwargs)
+
+    async def _solve(self, question, method):
+        """Run one method and return (full answer, steps taken)."""
+        if method == "dynamic_cot":
+            result = await self.dynamic_cot.solve_async(question, max_steps=self.max_steps)
+            return result["final_answer"], result.get("steps_taken", len(result["reasoning_steps"]) + 1)
+        if method == "fixed_cot":
+            result = await self.fixed_cot.solve_async(question, steps=self.steps)
+            return result["final_answer"], self.steps
+        # Direct prompt; the OpenAI client adds its standard answer format by default
+        response = await self.client.agenerate(f"Question: {question}\n\nSolve this problem step by step.")
+        return response, 1
+
+    async def _run_pair(self, problem, method):
+        """Run one (problem, method) pair and build its result record."""
+        record = {
+            "id": problem_id(problem),
+            "method": method,
+            "question": problem["question"],
+            "expected": problem["expected_answer"],
+            "got": None,
+            "correct": False,
+            "steps": None,
+            "full_answer": None,
+            "error": None,
+        }
+        start = time.perf_counter()
+        try:
+            full_answer, steps = await self._solve(problem["question"], method)
+            record["got"] = extract_answer(full_answer)
+            record["correct"] = validate_answer(problem["expected_answer"], record["got"])
+            record["steps"] = steps
+            record["full_answer"] = full_answer
+        except Exception as e:
+            logger.warning(f"{method} failed on problem {record['id']}: {e}")
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["elapsed"] = round(time.perf_counter() - start, 3)
+        return record
+
+    def _pending_pairs(self, problems, done):
+        """Yield the (problem, method) pairs that have no result yet, problem by problem."""
+        for problem in problems:
+            pid = problem_id(problem)
+            for method in self.methods:
+                if (pid, method) not in done:
+                    yield problem, method
+
+    async def run_async(self, problems, output_path, resume=True, on_result=None):
+        """
+        Validate every problem with every method.
+
+        Args:
+            problems (iterable): Problem dicts with "question" and "expected_answer".
+                Read lazily, so a generator from load_problems() works for large sets.
+            output_path (str): JSONL file that receives one record per completed pair.
+            resume (bool, optional): Skip pairs already recorded in output_path
+                without an error. Defaults to True; False starts a new file.
+            on_result (callable, optional): Called with each new record as it completes.
+
+        Returns:
+            dict: All records, old and new, keyed by (problem id, method).
+        """
+        records = load_results(output_path) if resume else {}
+        done = {key for key, record in records.items() if not record.get("error")}
+        pairs = self._pending_pairs(problems, done)
+        pending = set()
+
+        def submit_next():
+            for problem, method in pairs:
+                pending.add(asyncio.ensure_future(self._run_pair(problem, method)))
+                return True
+            return False
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+            # Start on a new line if an interrupted run left a partial record
+            if output.tell() > 0:
+                with open(output_path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b"\n":
+                        output.write("\n")
+
+            for _ in range(self.concurrency):
+                if not submit_next():
+                    break
+
+            try:
+                while pending:
+                    done_tasks, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done_tasks:
+                        pending.discard(task)
+                        record = task.result()
+                        output.write(json.dumps(record) + "\n")
+                        output.flush()
+                        records[(record["id"], record["method"])] = record
+                        if on_result is not None:
+                            on_result(record)
+                        submit_next()
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        return records
+
+    def run(self, problems, output_path, resume=True, on_result=None):
+        """Blocking version of run_async()."""
+        return asyncio.run(self.run_async(problems, output_path, resume=resume, on_result=on_result))
@@ -0,0 +1,351 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from .pipeline import RECORD_OPTIONS, Pipeline
+from .rate_limiter import sqlite_quota_usage
+
+logger = logging.getLogger(__name__)
+
+# Job states; a "leased" job whose lease has expired is leased again as if it were pending
+STATUSES = ("pending", "leased", "done", "failed")
+
+def job_id(job):
+    """
+    Return the job's "id", or a stable hash of its question and resolved solver configuration.
+
+    Options the job does not set are resolved to the Pipeline defaults, so a
+    job that spells out a default and one that leaves it unset share an id.
+
+    Args:
+        job (dict): A question record with any RECORD_OPTIONS.
+
+    Returns:
+        str: The job id.
+    """
+    if job.get("id") is not None:
+        return str(job["id"])
+    config = Pipeline()._options(job)
+    key = json.dumps([job["question"], [config[name] for name in RECORD_OPTIONS]])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+class WorkQueue:
+    """
+    A queue of question jobs in a SQLite file, shared by any number of worker processes and hosts.
+
+    Each job is a question record with its solver configuration (see
+    src.pipeline.RECORD_OPTIONS). Workers lease jobs for `lease_duration`
+    seconds, renew the lease while solving and write the result record back.
+    A job whose worker dies is leased again once its lease expires, and a job
+    that ended in an error is retried; either way, after `max_attempts` leases
+    the job is marked failed.
+
+    The same database holds the shared rate limit buckets of the workers'
+    providers (see QueueWorker), so it also accounts for quota use. Sharing
+    between hosts needs a filesystem with working POSIX locks. A WorkQueue
+    should not be used across fork(); open one per process.
+    """
+
+    # Records inserted per transaction by add()
+    INSERT_BATCH = 500
+
+    def __init__(self, path, lease_duration=300.0, max_attempts=3):
+        """
+        Open (and if needed create) a queue.
+
+        Args:
+            path (str): SQLite database path.
+            lease_duration (float, optional): Seconds a worker holds a job without renewing. Defaults to 300.
+            max_attempts (int, optional): Leases before a job is marked failed. Defaults to 3.
+        """
+        self.path = path
+        self.lease_duration = lease_duration
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._transaction() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, record TEXT NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL, worker TEXT, lease_expires REAL, result TEXT, updated_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)")
+
+    @contextmanager
+    def _transaction(self):
+        """Run the body in one write-locked transaction."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def add(self, records, **options):
+        """
+        Add question records to the queue. Records whose id is already queued are skipped.
+
+        A record without an "id" is keyed by its question and solver configuration
+        (see job_id()), so one question can be queued under several configurations.
+
+        Args:
+            records (iterable): Question records, e.g. from src.pipeline.read_records().
+            **options: Solver configuration (RECORD_OPTIONS) for records that do not set their own.
+
+        Returns:
+            int: Number of jobs added.
+        """
+        unknown = set(options) - set(RECORD_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+
+        added = 0
+        batch = []
+
+        def flush():
+            nonlocal added
+            with self._transaction() as db:
+                before = db.total_changes
+                db.executemany(
+                    "INSERT OR IGNORE INTO jobs (id, record, status, attempts, updated_at) VALUES (?, ?, 'pending', 0, ?)",
+                    batch,
+                )
+                added += db.total_changes - before
+            batch.clear()
+
+        for record in records:
+            job = {name: value for name, value in options.items() if value is not None}
+            job.update(record)
+            job["id"] = job_id(job)
+            batch.append((job["id"], json.dumps(job), time.time()))
+            if len(batch) >= self.INSERT_BATCH:
+                flush()
+        if batch:
+            flush()
+        return added
+
+    def lease(self, worker, count=1):
+        """
+        Lease up to `count` jobs that are pending or whose lease has expired.
+
+        Args:
+            worker (str): Id of the leasing worker.
+            count (int, optional): Maximum jobs to lease. Defaults to 1.
+
+        Returns:
+            list: The leased job records.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # Jobs whose workers died on their last attempt
+            expired = db.execute(
+                "SELECT id, record FROM jobs WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            ).fetchall()
+            for job_id, record in expired:
+                question = json.loads(record)["question"]
+                result = {"id": job_id, "question": question,
+                          "error": f"Lease expired on each of {self.max_attempts} attempts"}
+                db.execute("UPDATE jobs SET status = 'failed', result = ?, updated_at = ? WHERE id = ?",
+                           (json.dumps(result), now, job_id))
+            if expired:
+                logger.warning(f"{len(expired)} jobs failed after their leases expired {self.max_attempts} times")
+
+            rows = db.execute(
+                "SELECT id, record FROM jobs WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY rowid LIMIT ?",
+                (now, count),
+            ).fetchall()
+            db.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                [(worker, now + self.lease_duration, now, job_id) for job_id, _ in rows],
+            )
+        return [json.loads(record) for _, record in rows]
+
+    def renew(self, worker, job_ids):
+        """
+        Extend the leases `worker` holds on `job_ids` by lease_duration.
+
+        Returns:
+            int: Number of leases renewed (jobs leased to another worker meanwhile are not).
+        """
+        now = time.time()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(now + self.lease_duration, now, job_id, worker) for job_id in job_ids],
+            )
+            return db.total_changes - before
+
+    def complete(self, worker, result):
+        """
+        Record the result of a leased job.
+
+        A result with an "error" puts the job back as pending until it has been
+        leased max_attempts times, then marks it failed.
+
+        Args:
+            worker (str): Id of the worker holding the lease.
+            result (dict): The result record, with the job's "id".
+
+        Returns:
+            bool: False if the lease had already passed to another worker and the result was dropped.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'", (result["id"], worker)
+            ).fetchone()
+            if row is None:
+                return False
+            if not result.get("error"):
+                status = "done"
+            else:
+                status = "failed" if row[0] >= self.max_attempts else "pending"
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (status, json.dumps(result), now, result["id"]),
+            )
+            return True
+
+    def release(self, worker, job_ids):
+        """Hand leased jobs back unsolved (e.g. on shutdown), without using up an attempt."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, attempts = attempts - 1, "
+                "updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(now, job_id, worker) for job_id in job_ids],
+            )
+
+    def counts(self):
+        """Return the number of jobs in each status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def results(self, status=None):
+        """
+        Yield the result records of finished jobs in the order they were added.
+
+        Args:
+            status (str, optional): "done" or "failed" to yield only those. Defaults to both.
+        """
+        statuses = (status,) if status else ("done", "failed")
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT result FROM jobs WHERE status IN ({', '.join('?' * len(statuses))}) ORDER BY rowid",
+                statuses,
+            ).fetchall()
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def quota_usage(self):
+        """Return the requests (and tokens) reserved so far from each provider quota kept in this queue."""
+        return sqlite_quota_usage(self.path)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class QueueWorker:
+    """
+    Solves jobs from a WorkQueue until none are left.
+
+    Up to `concurrency` jobs are solved at a time with a Pipeline, and their
+    leases are renewed while they run. Unless told otherwise, the worker's
+    clients keep their rate limits in the queue's database (the "sqlite"
+    rate limit backend), so every worker on every host shares each
+    provider's quota, and the queue accounts for its use.
+    """
+
+    def __init__(self, queue, worker_id=None, concurrency=8, poll_interval=1.0, **kwargs):
+        """
+        Args:
+            queue (WorkQueue): The queue to work on.
+            worker_id (str, optional): Id recorded on leases. Defaults to "<host>-<pid>".
+            concurrency (int, optional): Jobs solved at a time. Defaults to 8.
+            poll_interval (float, optional): Seconds between checks while other workers hold
+                the remaining jobs. Defaults to 1.
+            **kwargs: Passed to the Pipeline: default solver options for jobs that do not set
+                them, and client options (e.g. cache, requests_per_min).
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        kwargs.setdefault("rate_limit_backend", "sqlite")
+        if kwargs["rate_limit_backend"] == "sqlite":
+            kwargs.setdefault("rate_limit_dir", queue.path)
+        self.pipeline = Pipeline(concurrency=concurrency, **kwargs)
+
+    async def _solve(self, record, counts):
+        result = await self.pipeline.solve_record(record)
+        if await asyncio.to_thread(self.queue.complete, self.worker_id, result):
+            counts["failed" if result["error"] else "solved"] += 1
+        else:
+            logger.warning(f"Lease on job {result['id']} was lost; its result was dropped")
+
+    async def run_async(self):
+        """
+        Lease and solve jobs until the queue has none pending or leased.
+
+        Returns:
+            dict: Counts of jobs this worker "solved" and "failed".
+        """
+        counts = {"solved": 0, "failed": 0}
+        running = {}  # task -> job id
+        renew_interval = self.queue.lease_duration / 3
+        renewed_at = time.monotonic()
+        try:
+            while True:
+                if len(running) < self.concurrency:
+                    jobs = await asyncio.to_thread(self.queue.lease, self.worker_id, self.concurrency - len(running))
+                    for record in jobs:
+                        running[asyncio.ensure_future(self._solve(record, counts))] = record["id"]
+
+                if not running:
+                    remaining = await asyncio.to_thread(self.queue.counts)
+                    if not remaining["pending"] and not remaining["leased"]:
+                        return counts
+                    # Other workers hold the rest; their leases may still expire
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                timeout = max(0.0, renewed_at + renew_interval - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del running[task]
+                    task.result()
+                if time.monotonic() >= renewed_at + renew_interval:
+                    await asyncio.to_thread(self.queue.renew, self.worker_id, list(running.values()))
+                    renewed_at = time.monotonic()
+        finally:
+            if running:
+                for task in running:
+                    task.cancel()
+                self.queue.release(self.worker_id, list(running.values()))
+
+    def run(self):
+        """Blocking version of run_async()."""
+        return asyncio.run(self.run_async())
+
+    def close(self):
+        """Release the pipeline's solvers and clients. The queue is left open."""
+        self.pipeline.close()
@@ -0,0 +1,159 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.adaptive import AdaptiveController, CircuitOpenError, get_controller
+from src.base_client import RetriesExhaustedError
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import MockClient, LatencyModel
+from src.rate_limiter import RateLimiter
+
+class TestAdaptiveController(unittest.TestCase):
+    """Tests for AIMD concurrency and the circuit breaker."""
+
+    def test_throttle_cuts_concurrency_and_rate(self):
+        """Test the multiplicative decrease on throttling and the additive recovery."""
+        limiter = RateLimiter(10 ** 9)
+        controller = AdaptiveController(limiter, max_concurrency=8)
+
+        with controller.slot() as started:
+            controller.record_throttle(started)
+        self.assertEqual(controller.limit, 1)
+        self.assertEqual(limiter.rate_scale, 0.5)
+
+        for _ in range(10):
+            with controller.slot():
+                controller.record_success()
+        self.assertGreater(controller.limit, 1)
+        self.assertEqual(limiter.rate_scale, 1.0)
+
+    def test_stale_throttles_are_ignored(self):
+        """Test that requests sent before a decrease do not cut the limit again."""
+        controller = AdaptiveController(max_concurrency=8)
+        first, second = controller.slot(), controller.slot()
+        started_first, started_second = first.__enter__(), second.__enter__()
+
+        time.sleep(0.001)
+        controller.record_throttle(started_first)
+        controller.record_throttle(started_second)
+        first.__exit__(None, None, None)
+        second.__exit__(None, None, None)
+
+        self.assertEqual(controller.limit, 1)
+        self.assertEqual(controller.rate_scale, 0.5)
+
+    def test_slot_waits_at_the_limit(self):
+        """Test that no more than `limit` requests are in flight at once."""
+        controller = AdaptiveController(max_concurrency=2)
+        peak, lock = [0], threading.Lock()
+
+        def request():
+            with controller.slot():
+                with lock:
+                    peak[0] = max(peak[0], controller.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_async_slot_waits_at_the_limit(self):
+        """Test the async slot against the same limit."""
+        controller = AdaptiveController(max_concurrency=3)
+        peak = [0]
+
+        async def request():
+            async with controller.aslot():
+                peak[0] = max(peak[0], controller.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(request() for _ in range(10)))
+
+        asyncio.run(run())
+        self.assertEqual(peak[0], 3)
+
+    def test_circuit_opens_and_recovers(self):
+        """Test fail-fast after repeated failures and a half-open probe after the reset timeout."""
+        controller = AdaptiveController(failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            with controller.slot():
+                controller.record_failure()
+        self.assertEqual(controller.state, controller.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            with controller.slot():
+                pass
+
+        time.sleep(0.06)
+        with controller.slot():
+            # Only the probe goes through while half-open
+            with self.assertRaises(CircuitOpenError):
+                with controller.slot():
+                    pass
+            controller.record_success()
+        self.assertEqual(controller.state, controller.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        """Test that a failing probe opens the circuit again straight away."""
+        controller = AdaptiveController(failure_threshold=1, reset_timeout=0.01)
+        with controller.slot():
+            controller.record_failure()
+        time.sleep(0.02)
+        with controller.slot():
+            controller.record_failure()
+        self.assertEqual(controller.state, controller.OPEN)
+
+    def test_shared_per_rate_limiter(self):
+        """Test that clients on one quota share a controller and the factory passes options."""
+        limiter = RateLimiter(10 ** 9)
+        self.assertIs(get_controller(limiter), get_controller(limiter))
+
+        limiter = RateLimiter(10 ** 9)
+        first = LLMClientFactory.create_client("mock", rate_limiter=limiter, max_concurrency=4, failure_threshold=2)
+        second = LLMClientFactory.create_client("mock", rate_limiter=limiter)
+        self.assertIs(first.controller, second.controller)
+        self.assertEqual((first.controller.max_concurrency, first.controller.failure_threshold), (4, 2))
+
+class TestClientIntegration(unittest.TestCase):
+    """Tests for clients driven by the controller."""
+
+    def test_throttling_lowers_the_shared_rate(self):
+        """Test that 429s from the mock provider slow the whole limiter down."""
+        limiter = RateLimiter(10 ** 9)
+        client = MockClient(rate_limit_rate=0.5, retry_delay=0, seed=1, rate_limiter=limiter)
+        for _ in range(5):
+            client.generate("What is 2+2?", max_retries=10)
+        self.assertLess(client.controller.limit, client.controller.max_concurrency)
+
+        throttled = MockClient(rate_limit_rate=1.0, retry_delay=0, rate_limiter=RateLimiter(10 ** 9))
+        with self.assertRaises(RetriesExhaustedError):
+            throttled.generate("What is 2+2?", max_retries=3)
+        self.assertLess(throttled.rate_limiter.rate_scale, 1.0)
+
+    def test_down_provider_fails_fast(self):
+        """Test that once the circuit opens, calls raise without reaching the provider."""
+        limiter = RateLimiter(10 ** 9)
+        get_controller(limiter, failure_threshold=3, reset_timeout=60)
+        client = MockClient(failure_rate=1.0, retry_delay=0, latency=LatencyModel(0), rate_limiter=limiter)
+
+        with self.assertRaises(CircuitOpenError):
+            client.generate("What is 2+2?", max_retries=10)
+        self.assertEqual(client.calls, 3)
+
+        with self.assertRaises(CircuitOpenError):
+            client.generate("What is 2+2?")
+        self.assertEqual(client.calls, 3)
+
+if __name__ == '__main__':
+    unittest.main()
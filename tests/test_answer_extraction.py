@@ -0,0 +1,76 @@
+import sys
+import os
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.answer_extraction import AnswerExtractor, extract_answer, extract_numeric_answer, validate_answer
+
+class TestExtractAnswer(unittest.TestCase):
+    """Tests for extract_answer() and extract_numeric_answer()."""
+
+    def test_delimited_answer_takes_priority(self):
+        """Test that a delimited answer wins over numbers elsewhere in the text."""
+        text = "We have 2/3 of 50%. FINAL_ANSWER: [42] END_ANSWER and 7 more"
+        self.assertEqual(extract_answer(text), "42.0")
+        self.assertEqual(extract_numeric_answer(text).kind, "delimiter")
+
+    def test_non_numeric_delimited_answer(self):
+        """Test that a non-numeric delimited answer is returned as text."""
+        answer = extract_numeric_answer("FINAL_ANSWER: blue END_ANSWER")
+        self.assertEqual(answer.text, "blue")
+        self.assertIsNone(answer.value)
+
+    def test_fraction_then_percent_then_last_number(self):
+        """Test the fallback order when there are no delimiters."""
+        self.assertEqual(extract_answer("it is 5% then 2/3 then 9"), "0.67")
+        self.assertEqual(extract_answer("it is 5% then 9"), "5")
+        self.assertEqual(extract_answer("first 3, then 4.5"), "4.5")
+        self.assertIsNone(extract_answer("no numbers here"))
+
+    def test_zero_denominator_falls_through(self):
+        """Test that a fraction with a zero denominator is skipped."""
+        answer = extract_numeric_answer("x 3/0 and 5%")
+        self.assertEqual((answer.text, answer.kind), ("5", "percent"))
+
+    def test_numeric_value(self):
+        """Test that the numeric value is returned alongside the text."""
+        answer = extract_numeric_answer("The total is 150 legs.")
+        self.assertEqual(answer.value, 150.0)
+        self.assertEqual(answer.kind, "number")
+
+class TestExtractStepAnswer(unittest.TestCase):
+    """Tests for AnswerExtractor.extract_step_answer()."""
+
+    def setUp(self):
+        self.extractor = AnswerExtractor()
+
+    def test_conclusion_phrase(self):
+        """Test that the text after a conclusion phrase is returned."""
+        found, answer = self.extractor.extract_step_answer("Adding up, therefore the answer is 150.")
+        self.assertTrue(found)
+        self.assertEqual(answer, "150.")
+
+    def test_no_conclusion(self):
+        """Test the legacy fallbacks when a step has not concluded."""
+        self.assertEqual(self.extractor.extract_step_answer("Multiply 20 by 2."), (False, None))
+        self.assertEqual(self.extractor.extract_step_answer("First idea.\n\nSecond idea."), (False, "Second idea."))
+
+    def test_custom_patterns_without_keywords(self):
+        """Test that the keyword prefilter can be disabled for custom patterns."""
+        extractor = AnswerExtractor(conclusion_patterns=[r"(?i)we get"], conclusion_keywords=None)
+        self.assertEqual(extractor.extract_step_answer("So we get 12"), (True, "12"))
+
+class TestValidateAnswer(unittest.TestCase):
+    """Tests for validate_answer()."""
+
+    def test_fraction_and_percent_equivalence(self):
+        """Test that equivalent fraction, decimal and percentage answers match."""
+        self.assertTrue(validate_answer("2/3", "0.67"))
+        self.assertTrue(validate_answer("60", "0.6"))
+        self.assertFalse(validate_answer("2/3", "0.5"))
+        self.assertFalse(validate_answer(None, "1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import sys
+import os
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import iter_until_stop
+
+class TestIterUntilStop(unittest.TestCase):
+    """Tests for cutting a stream at a stop delimiter."""
+    
+    def test_passes_everything_without_stop(self):
+        """Test that chunks are unchanged when no stop is given."""
+        self.assertEqual(list(iter_until_stop(["a", "b"], None)), ["a", "b"])
+    
+    def test_cuts_after_stop(self):
+        """Test that output ends right after the stop text."""
+        chunks = ["Step 2: 4. FINAL_ANSWER: 4 END_ANSWER", " and more text", " never read"]
+        self.assertEqual(
+            "".join(iter_until_stop(chunks, "END_ANSWER")),
+            "Step 2: 4. FINAL_ANSWER: 4 END_ANSWER",
+        )
+    
+    def test_stop_spanning_chunks(self):
+        """Test that a stop split across chunk boundaries is detected."""
+        chunks = ["FINAL_ANSWER: 4 END_", "ANS", "WER trailing", "ignored"]
+        self.assertEqual(list(iter_until_stop(chunks, "END_ANSWER")), ["FINAL_ANSWER: 4 END_", "ANS", "WER"])
+    
+    def test_closes_source_when_stopped(self):
+        """Test that the source generator is closed so the request ends early."""
+        state = {"closed": False, "produced": 0}
+        
+        def source():
+            try:
+                for chunk in ["x END_ANSWER", "y", "z"]:
+                    state["produced"] += 1
+                    yield chunk
+            finally:
+                state["closed"] = True
+        
+        list(iter_until_stop(source(), "END_ANSWER"))
+        self.assertTrue(state["closed"])
+        self.assertEqual(state["produced"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import batch
+
+class TestSolveMany(unittest.TestCase):
+    """Tests for the batch solving helpers."""
+    
+    def test_yields_every_index_with_per_question_overrides(self):
+        """Test that dict items override defaults and unknown keys are ignored."""
+        def solve(question, steps=3, temperature=0.7):
+            return {"question": question, "steps": steps, "temperature": temperature}
+        
+        questions = [
+            "plain question",
+            {"type": "math", "question": "dict question", "steps": 5},
+        ]
+        results = dict(batch.solve_many(solve, questions, ("steps", "temperature"), temperature=0.2))
+        
+        self.assertEqual(results[0], {"question": "plain question", "steps": 3, "temperature": 0.2})
+        self.assertEqual(results[1], {"question": "dict question", "steps": 5, "temperature": 0.2})
+    
+    def test_concurrency_is_bounded(self):
+        """Test that no more than `concurrency` solves run at once."""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+        
+        def solve(question):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return question
+        
+        results = list(batch.solve_many(solve, (str(i) for i in range(20)), (), concurrency=3))
+        
+        self.assertEqual(sorted(index for index, _ in results), list(range(20)))
+        self.assertLessEqual(state["peak"], 3)
+    
+    def test_return_exceptions(self):
+        """Test that failures are yielded in place of results when requested."""
+        def solve(question):
+            if question == "bad":
+                raise ValueError("boom")
+            return question
+        
+        results = dict(batch.solve_many(solve, ["ok", "bad"], (), return_exceptions=True))
+        self.assertEqual(results[0], "ok")
+        self.assertIsInstance(results[1], ValueError)
+        
+        with self.assertRaises(ValueError):
+            list(batch.solve_many(solve, ["ok", "bad"], ()))
+    
+    def test_solve_many_async(self):
+        """Test the async variant yields results in completion order."""
+        async def solve_async(question, delay=0):
+            await asyncio.sleep(delay)
+            return question
+        
+        async def collect():
+            questions = [{"question": "slow", "delay": 0.05}, {"question": "fast", "delay": 0}]
+            return [item async for item in batch.solve_many_async(solve_async, questions, ("delay",), concurrency=2)]
+        
+        self.assertEqual(asyncio.run(collect()), [(1, "fast"), (0, "slow")])
+
+    def test_concurrency_must_be_positive(self):
+        """Test that a concurrency below 1 is rejected instead of yielding nothing."""
+        with self.assertRaises(ValueError):
+            list(batch.solve_many(lambda question: question, ["a"], (), concurrency=0))
+        
+        async def collect():
+            return [item async for item in batch.solve_many_async(lambda question: question, ["a"], (), concurrency=0)]
+        
+        with self.assertRaises(ValueError):
+            asyncio.run(collect())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import sys
+import os
+import asyncio
+import http.server
+import json
+import tempfile
+import threading
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_api import BatchClient, BatchJobError, LocalBatchBackend, LocalBatchServer, request_line
+from src.chain_of_thought import ChainOfThought
+from src.dynamic_cot import DynamicChainOfThought
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import MockClient
+from src.rate_limiter import RateLimiter
+
+def solve_all(solver, questions, **kwargs):
+    """Solve every question concurrently and return the results in input order."""
+    async def run():
+        results = {}
+        async for index, result in solver.solve_many_async(questions, concurrency=len(questions), **kwargs):
+            results[index] = result
+        return [results[index] for index in range(len(questions))]
+    return asyncio.run(run())
+
+class FlakyClient:
+    """Fails the first request for each prompt, then echoes it."""
+
+    def __init__(self):
+        self.seen = set()
+
+    def generate(self, prompt, temperature=0.7):
+        if prompt not in self.seen:
+            self.seen.add(prompt)
+            raise RuntimeError("transient failure")
+        return f"echo: {prompt}"
+
+class FailingBackend:
+    """A backend whose jobs always fail."""
+
+    def submit(self, lines):
+        return "job-1"
+
+    def status(self, job_id):
+        return {"id": job_id, "status": "failed"}
+
+class TestLocalBatch(unittest.TestCase):
+    """Tests for batch jobs against the local file-based stand-in."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = LocalBatchServer(
+            self.directory, MockClient(rate_limiter=RateLimiter(10 ** 9)), poll_interval=0.01
+        ).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def batched(self, solver_class, **kwargs):
+        return solver_class(provider="mock", batch=self.directory, quiet_period=0.2, poll_interval=0.01,
+                            rate_limiter=RateLimiter(10 ** 9), **kwargs)
+
+    def test_chains_advance_in_lockstep(self):
+        """Test that each step of every chain goes out in one job per wave."""
+        cot = self.batched(ChainOfThought)
+        questions = [f"What is {n} + {n}?" for n in range(20)]
+
+        results = solve_all(cot, questions, steps=3)
+
+        self.assertEqual(len(results), 20)
+        for result in results:
+            self.assertEqual(len(result["reasoning_steps"]), 2)
+            self.assertIn("FINAL_ANSWER: 42 END_ANSWER", result["final_answer"])
+        self.assertEqual(cot.client.waves, 3)
+        self.assertEqual(cot.client.requests_submitted, 60)
+        self.assertEqual(self.server.jobs_processed, 3)
+
+    def test_dynamic_chains(self):
+        """Test that dynamic chains stop at the wave their answer arrives in."""
+        cot = self.batched(DynamicChainOfThought)
+        results = solve_all(cot, [f"Problem {n}" for n in range(5)], max_steps=6)
+
+        self.assertEqual([result["final_answer"] for result in results], ["42"] * 5)
+        self.assertEqual(cot.client.waves, 3)
+
+    def test_job_files(self):
+        """Test the job directory layout and line formats."""
+        backend = LocalBatchBackend(self.directory)
+        job_id = backend.submit([request_line("a", "mock-model", "Question: what?", 0.2)])
+
+        self.server.stop()
+        self.server.process_pending()
+        job = backend.status(job_id)
+
+        self.assertEqual((job["status"], job["completed"], job["failed"]), ("completed", 1, 0))
+        [line] = backend.results(job)
+        self.assertEqual(line["custom_id"], "a")
+        self.assertTrue(line["response"]["body"]["choices"][0]["message"]["content"])
+
+    def test_failed_requests_are_resubmitted(self):
+        """Test that a request that failed inside a job goes out again with the next wave."""
+        self.server.client = FlakyClient()
+        client = BatchClient(MockClient(), LocalBatchBackend(self.directory), quiet_period=0.01, poll_interval=0.01)
+
+        self.assertEqual(client.generate("hello"), "echo: hello")
+        self.assertEqual(client.waves, 2)
+
+    def test_failed_job_raises(self):
+        """Test that callers get an error when the whole job fails."""
+        client = BatchClient(MockClient(), FailingBackend(), quiet_period=0.01, poll_interval=0.01)
+        with self.assertRaises(BatchJobError):
+            client.generate("hello")
+
+    def test_provider_without_batch_api(self):
+        """Test that batch=True needs a provider with a batch API."""
+        with self.assertRaises(NotImplementedError):
+            LLMClientFactory.create_client("mock", batch=True)
+
+class StubBatchHandler(http.server.BaseHTTPRequestHandler):
+    """A minimal OpenAI files and batches API that completes every batch at once."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, payload, status=200):
+        data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        files = self.server.files
+        if self.path == "/v1/files":
+            # Pull the JSONL out of the multipart upload
+            lines = [line for line in body.decode().splitlines() if line.startswith('{"custom_id"')]
+            file_id = f"file-{len(files)}"
+            files[file_id] = lines
+            self._send({"id": file_id})
+        elif self.path == "/v1/batches":
+            request = json.loads(body)
+            self.server.batches.append(request)
+            outputs = []
+            for line in map(json.loads, files[request["input_file_id"]]):
+                content = f"echo: {line['body']['messages'][0]['content']}"
+                outputs.append(json.dumps({"custom_id": line["custom_id"], "response": {
+                    "status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}}))
+            files[f"output-{len(self.server.batches)}"] = outputs
+            self._send({"id": f"batch-{len(self.server.batches)}", "status": "validating"})
+        else:
+            self._send({"error": {"message": "not found"}}, 404)
+
+    def do_GET(self):
+        if self.path.startswith("/v1/batches/"):
+            number = self.path.rsplit("-", 1)[1]
+            self._send({"id": f"batch-{number}", "status": "completed", "output_file_id": f"output-{number}"})
+        elif self.path.startswith("/v1/files/"):
+            self._send("\n".join(self.server.files[self.path.split("/")[3]]) + "\n")
+        else:
+            self._send({"error": {"message": "not found"}}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestOpenAIBatchBackend(unittest.TestCase):
+    """Tests for the OpenAI Batch API backend against a local stub."""
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubBatchHandler)
+        self.server.daemon_threads = True
+        self.server.files = {}
+        self.server.batches = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_generate_through_batches(self):
+        """Test uploading, creating, polling and downloading a batch through the factory."""
+        client = LLMClientFactory.create_client(
+            "openai", api_key="test-key", base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+            batch=True, quiet_period=0.05, poll_interval=0.01, rate_limiter=RateLimiter(1),
+        )
+
+        async def run():
+            return await asyncio.gather(*(client.agenerate(f"Prompt {n}", use_standard_format=False) for n in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [f"echo: Prompt {n}" for n in range(5)])
+        self.assertEqual(len(self.server.batches), 1)
+        self.assertEqual(self.server.batches[0]["endpoint"], "/v1/chat/completions")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import sys
+import os
+import asyncio
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import BaseLLMClient
+from src.cache import ResponseCache, CachedClient
+
+class CountingClient(BaseLLMClient):
+    """Minimal client that echoes the prompt and counts calls."""
+    
+    provider = "test"
+    
+    def __init__(self):
+        super().__init__("test-model", requests_per_min=6000)
+        self.calls = 0
+    
+    def effective_prompt(self, prompt, use_standard_format=True, **kwargs):
+        return prompt + (" [formatted]" if use_standard_format else "")
+    
+    def generate(self, prompt, temperature=0.7, use_standard_format=True):
+        self.calls += 1
+        return f"response to {self.effective_prompt(prompt, use_standard_format)}"
+
+class TestResponseCache(unittest.TestCase):
+    """Tests for the ResponseCache class."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits or misses."""
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", "v")
+        self.assertEqual(cache.get("k"), "v")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_persists_to_disk(self):
+        """Test that a new cache on the same file sees earlier entries."""
+        first = ResponseCache(self.path)
+        first.set("k", "v")
+        first.close()
+        
+        second = ResponseCache(self.path)
+        self.assertEqual(second.get("k"), "v")
+    
+    def test_memory_lru_is_bounded(self):
+        """Test that the in-memory level keeps only the most recent entries."""
+        cache = ResponseCache(self.path, max_memory_entries=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        self.assertEqual(list(cache._memory), ["b", "c"])
+        # Evicted from memory but still served from disk
+        self.assertEqual(cache.get("a"), "a")
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = ResponseCache(self.path, ttl=0.01)
+        cache.set("k", "v")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+    
+    def test_disk_size_eviction(self):
+        """Test that the disk level is trimmed to max_disk_entries."""
+        cache = ResponseCache(self.path, max_disk_entries=10)
+        for i in range(ResponseCache.EVICTION_INTERVAL):
+            cache.set(str(i), str(i))
+        self.assertEqual(cache.stats()["disk_entries"], 10)
+
+class TestCachedClient(unittest.TestCase):
+    """Tests for the CachedClient wrapper."""
+    
+    def setUp(self):
+        self.inner = CountingClient()
+        self.client = CachedClient(self.inner, ResponseCache(":memory:"))
+    
+    def test_repeated_prompt_is_served_from_cache(self):
+        """Test that only the first identical request reaches the wrapped client."""
+        first = self.client.generate("Question: 2+2?", temperature=0)
+        second = self.client.generate("Question: 2+2?", temperature=0)
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.calls, 1)
+    
+    def test_key_includes_temperature_and_prompt_rewrite(self):
+        """Test that temperature and use_standard_format produce separate entries."""
+        self.client.generate("Question: 2+2?", temperature=0)
+        self.client.generate("Question: 2+2?", temperature=0.7)
+        self.client.generate("Question: 2+2?", temperature=0, use_standard_format=False)
+        self.assertEqual(self.inner.calls, 3)
+    
+    def test_agenerate_shares_entries_with_generate(self):
+        """Test that async calls hit entries written by sync calls."""
+        self.client.generate("Question: 2+2?", temperature=0)
+        asyncio.run(self.client.agenerate("Question: 2+2?", temperature=0))
+        self.assertEqual(self.inner.calls, 1)
+    
+    def test_delegates_other_attributes(self):
+        """Test that the wrapper exposes the wrapped client's attributes."""
+        self.assertEqual(self.client.model_name, "test-model")
+        self.assertEqual(self.client.provider, "test")
+
+if __name__ == '__main__':
+    unittest.main()
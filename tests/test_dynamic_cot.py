@@ -0,0 +1,129 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.base_client import iter_until_stop
+from src.dynamic_cot import DynamicChainOfThought
+from src.mock_client import LatencyModel
+from src.rate_limiter import RateLimiter
+
+class TestDynamicChainOfThought(unittest.TestCase):
+    """Tests for the DynamicChainOfThought class."""
+    
+    def setUp(self):
+        """Set up a DynamicChainOfThought with a mocked client."""
+        self.factory_patcher = patch('src.dynamic_cot.LLMClientFactory.create_client')
+        self.mock_client = self.factory_patcher.start().return_value
+        self.dynamic_cot = DynamicChainOfThought()
+    
+    def tearDown(self):
+        self.factory_patcher.stop()
+    
+    def test_solve_stops_at_delimited_answer(self):
+        """Test that solve() returns as soon as a step contains the answer delimiters."""
+        self.mock_client.generate.side_effect = [
+            "I need to add 2 and 2.",
+            "2 + 2 = 4. FINAL_ANSWER: 4 END_ANSWER",
+        ]
+        
+        result = self.dynamic_cot.solve("What is 2+2?", max_steps=5)
+        
+        self.assertEqual(result["final_answer"], "4")
+        self.assertEqual(result["steps_taken"], 2)
+        self.assertEqual(self.mock_client.generate.call_count, 2)
+    
+    def test_solve_stream_yields_deltas_and_stops_early(self):
+        """Test that solve_stream() streams text and cuts the step at END_ANSWER."""
+        responses = iter([
+            ["I need to ", "add 2 and 2."],
+            ["2 + 2 = 4. FINAL_ANSWER: 4 END_", "ANSWER", " Let me double check..."],
+        ])
+        self.mock_client.generate_stream.side_effect = (
+            lambda prompt, temperature=0.7, stop=None: iter_until_stop(next(responses), stop)
+        )
+        
+        events = list(self.dynamic_cot.solve_stream("What is 2+2?", max_steps=5))
+        
+        deltas = [event["text"] for event in events if event["type"] == "delta"]
+        self.assertEqual(deltas, ["I need to ", "add 2 and 2.", "2 + 2 = 4. FINAL_ANSWER: 4 END_", "ANSWER"])
+        self.assertEqual([event["step"] for event in events if event["type"] == "step"], [1, 2])
+        
+        result = events[-1]["result"]
+        self.assertEqual(result["final_answer"], "4")
+        self.assertEqual(result["reasoning_steps"][-1], "2 + 2 = 4. FINAL_ANSWER: 4 END_ANSWER")
+        self.assertEqual(result["steps_taken"], 2)
+
+class TestSpeculativeFinalAnswer(unittest.TestCase):
+    """Tests for prefetching the final answer alongside each step."""
+    
+    def setUp(self):
+        metrics.REGISTRY.reset()
+    
+    def outcomes(self):
+        return {outcome: metrics.SPECULATIVE_ANSWERS.get(solver="DynamicChainOfThought", outcome=outcome)
+                for outcome in ("used", "discarded", "failed")}
+    
+    def test_step_limit_uses_prefetched_answer(self):
+        """Test that hitting max_steps takes the prefetched answer instead of one more request."""
+        cot = DynamicChainOfThought(provider="mock", steps_to_answer=10, rate_limiter=RateLimiter(10 ** 9))
+        result = cot.solve("What is 2+2?", max_steps=4, speculate=True)
+        
+        self.assertEqual(result["final_answer"], "42")
+        self.assertEqual(result["steps_taken"], 4)
+        self.assertEqual(len(result["reasoning_steps"]), 4)
+        # 4 steps plus a speculation alongside steps 2-4, and no final request after them
+        self.assertEqual(cot.client.calls, 7)
+        self.assertEqual(self.outcomes(), {"used": 1, "discarded": 2, "failed": 0})
+    
+    def test_close_stops_the_speculation_threads(self):
+        """Test that the pool is sized by speculation_workers and close() shuts it down."""
+        cot = DynamicChainOfThought(provider="mock", steps_to_answer=3, speculation_workers=2,
+                                    rate_limiter=RateLimiter(10 ** 9))
+        cot.solve("What is 2+2?", max_steps=4, speculate=True)
+        executor = cot._executor
+        self.assertEqual(executor._max_workers, 2)
+        
+        cot.close()
+        self.assertIsNone(cot._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+    
+    def test_repeated_step_ends_the_chain(self):
+        """Test that a step repeating earlier reasoning returns the prefetched answer straight away."""
+        def respond(prompt, temperature):
+            if "final answer is:" in prompt:
+                return "FINAL_ANSWER: 4 END_ANSWER"
+            return "I am still thinking about it."
+        
+        cot = DynamicChainOfThought(provider="mock", responses=respond, rate_limiter=RateLimiter(10 ** 9))
+        result = cot.solve("What is 2+2?", max_steps=10, speculate=True)
+        
+        self.assertEqual(result["final_answer"], "4")
+        self.assertEqual(result["steps_taken"], 2)
+        self.assertEqual(self.outcomes()["used"], 1)
+    
+    def test_async_cancels_stale_speculation(self):
+        """Test that speculations are cancelled once a step concludes by itself."""
+        cot = DynamicChainOfThought(provider="mock", steps_to_answer=3, latency=LatencyModel(0.05),
+                                    rate_limiter=RateLimiter(10 ** 9))
+        
+        async def run():
+            result = await cot.solve_async("What is 2+2?", max_steps=10, speculate=True)
+            await asyncio.sleep(0)
+            return result, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        
+        result, leftover = asyncio.run(run())
+        
+        self.assertEqual(result["final_answer"], "42")
+        self.assertEqual(result["steps_taken"], 3)
+        self.assertEqual(leftover, [])
+        self.assertEqual(self.outcomes(), {"used": 0, "discarded": 2, "failed": 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.gemini_client import GeminiClient
+from src.rate_limiter import RateLimiter
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStream:
+    """A streaming response that counts the chunks it produced and records being cancelled."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.produced = 0
+        self.cancelled = False
+
+    def __iter__(self):
+        for text in self.texts:
+            if self.cancelled:
+                return
+            self.produced += 1
+            yield FakeChunk(text)
+
+    def cancel(self):
+        self.cancelled = True
+
+class FakeModel:
+    def __init__(self, texts):
+        self.texts = texts
+        self.streams = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.streams.append(FakeStream(self.texts))
+        return self.streams[-1]
+
+class TestGeminiClientStream(unittest.TestCase):
+    """Tests for GeminiClient.generate_stream with a fake model."""
+
+    def setUp(self):
+        self.client = GeminiClient(api_key="test-key", rate_limiter=RateLimiter(10 ** 9))
+
+    def test_stream_is_ended_at_stop(self):
+        """Test that the response is cancelled once the stop text has been produced."""
+        self.client.model = FakeModel(["Step 1: add. ", "Step 2:", " more"] + [" more"] * 50)
+
+        text = "".join(self.client.generate_stream("What is 2+2?", stop="Step 2:"))
+
+        self.assertEqual(text, "Step 1: add. Step 2:")
+        [stream] = self.client.model.streams
+        self.assertTrue(stream.cancelled)
+        self.assertLess(stream.produced, 5)
+
+    def test_stream_is_ended_when_the_caller_stops_early(self):
+        """Test that closing the generator before the end also ends the response."""
+        self.client.model = FakeModel(["a", "b", "c"])
+
+        chunks = self.client.generate_stream("What is 2+2?")
+        self.assertEqual(next(chunks), "a")
+        chunks.close()
+
+        self.assertTrue(self.client.model.streams[0].cancelled)
+
+if __name__ == '__main__':
+    unittest.main()
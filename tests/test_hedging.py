@@ -0,0 +1,153 @@
+import sys
+import os
+import asyncio
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.base_client import RetriesExhaustedError
+from src.hedging import HedgedClient, LatencyTracker
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import MockClient, LatencyModel
+from src.rate_limiter import RateLimiter
+from src.single_flight import SingleFlightClient
+
+def mock(answer, latency=0.0, **kwargs):
+    """A mock client that always answers `answer` after a fixed latency."""
+    return MockClient(
+        model=f"mock-{answer}",
+        responses=lambda prompt, temperature: answer,
+        latency=LatencyModel(latency),
+        retry_delay=0,
+        rate_limiter=RateLimiter(10 ** 9),
+        **kwargs
+    )
+
+class TestLatencyTracker(unittest.TestCase):
+    """Tests for the sliding-window latency percentiles."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles and the sliding window."""
+        tracker = LatencyTracker(window=100)
+        self.assertIsNone(tracker.percentile("mock", "m", 0.95))
+        for value in range(1, 101):
+            tracker.observe("mock", "m", value / 100)
+
+        self.assertEqual(tracker.percentile("mock", "m", 0.95), 0.95)
+        self.assertEqual(tracker.percentile("mock", "m", 0.5), 0.5)
+
+        for _ in range(100):
+            tracker.observe("mock", "m", 2.0)
+        self.assertEqual(tracker.percentile("mock", "m", 0.5), 2.0)
+        self.assertEqual(tracker.count("mock", "m"), 100)
+
+class TestHedgedClient(unittest.TestCase):
+    """Tests for hedging slow requests to a secondary client."""
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def hedged(self, primary, secondary, **kwargs):
+        return HedgedClient(primary, secondary, initial_delay=0.05, tracker=LatencyTracker(), **kwargs)
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test that a primary answering within the hedge delay never reaches the secondary."""
+        primary, secondary = mock("primary"), mock("secondary")
+        client = self.hedged(primary, secondary)
+
+        self.assertEqual(client.generate("What is 2+2?"), "primary")
+        self.assertEqual(secondary.calls, 0)
+
+    def test_slow_primary_is_hedged(self):
+        """Test that a slow primary loses to the secondary and the hedge is counted."""
+        primary, secondary = mock("primary", latency=1.0), mock("secondary")
+        client = self.hedged(primary, secondary)
+
+        start = time.perf_counter()
+        self.assertEqual(client.generate("What is 2+2?"), "secondary")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(metrics.HEDGED_REQUESTS.get(provider="mock", model="mock-primary", winner="secondary"), 1)
+
+    def test_failed_primary_falls_back_immediately(self):
+        """Test that a primary error is hedged without waiting for the delay."""
+        primary, secondary = mock("primary", failure_rate=1.0), mock("secondary")
+        client = HedgedClient(primary, secondary, initial_delay=10, tracker=LatencyTracker())
+
+        start = time.perf_counter()
+        self.assertEqual(client.generate("What is 2+2?", max_retries=0), "secondary")
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_both_failing_raises_primary_error(self):
+        """Test that the primary's error is raised when neither client succeeds."""
+        client = self.hedged(mock("primary", failure_rate=1.0), mock("secondary", failure_rate=1.0))
+        with self.assertRaises(RetriesExhaustedError) as raised:
+            client.generate("What is 2+2?", max_retries=0)
+        self.assertEqual(raised.exception.retries, 0)
+        self.assertEqual(metrics.HEDGED_REQUESTS.get(provider="mock", model="mock-primary", winner="none"), 1)
+
+    def test_async_hedge_cancels_the_loser(self):
+        """Test that the async path returns the secondary's answer and cancels the primary."""
+        primary, secondary = mock("primary", latency=1.0), mock("secondary")
+        client = self.hedged(primary, secondary)
+
+        async def run():
+            start = time.perf_counter()
+            response = await client.agenerate("What is 2+2?")
+            elapsed = time.perf_counter() - start
+            # Give a cancelled primary the chance to (wrongly) finish
+            await asyncio.sleep(0)
+            return response, elapsed, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        response, elapsed, leftover = asyncio.run(run())
+
+        self.assertEqual(response, "secondary")
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(leftover, [])
+
+    def test_cancelled_loser_latency_is_recorded(self):
+        """Test that a primary cancelled by a hedge still records the time it had run."""
+        tracker = LatencyTracker()
+        client = HedgedClient(mock("primary", latency=1.0), mock("secondary"), initial_delay=0.05, tracker=tracker)
+
+        asyncio.run(client.agenerate("What is 2+2?"))
+
+        self.assertEqual(tracker.count("mock", "mock-primary"), 1)
+        self.assertGreaterEqual(tracker.percentile("mock", "mock-primary", 0.95), 0.05)
+
+    def test_hedge_does_not_queue_behind_hung_primaries(self):
+        """Test that with every primary thread busy, a hedge still runs straight away."""
+        client = self.hedged(mock("primary", latency=1.0), mock("secondary"), max_workers=1)
+        client._submit("primary", client.client, "Hung", 0.7, {})
+
+        start = time.perf_counter()
+        self.assertEqual(client.generate("What is 2+2?"), "secondary")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_hedge_delay_follows_observed_latency(self):
+        """Test that the delay moves from initial_delay to the primary's latency percentile."""
+        tracker = LatencyTracker()
+        client = HedgedClient(mock("primary"), mock("secondary"), percentile=0.9, initial_delay=5,
+                              min_samples=10, max_delay=2, tracker=tracker)
+        self.assertEqual(client.hedge_delay(), 2)
+
+        for value in range(1, 11):
+            tracker.observe("mock", "mock-primary", value / 10)
+        self.assertEqual(client.hedge_delay(), 0.9)
+
+    def test_factory_option(self):
+        """Test building a hedged client through the factory."""
+        client = LLMClientFactory.create_client(
+            "mock", hedge={"provider": "mock", "model": "mock-backup"}, hedge_percentile=0.99,
+            rate_limiter=RateLimiter(10 ** 9),
+        )
+        self.assertIsInstance(client, SingleFlightClient)
+        self.assertIsInstance(client.client, HedgedClient)
+        self.assertEqual(client.secondary.model_name, "mock-backup")
+        self.assertEqual(client.percentile, 0.99)
+        self.assertIn("FINAL_ANSWER", client.generate("The final answer is:"))
+
+if __name__ == '__main__':
+    unittest.main()
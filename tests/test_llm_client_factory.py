@@ -0,0 +1,84 @@
+import sys
+import os
+import subprocess
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import BaseLLMClient
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import MockClient
+from src.rate_limiter import RateLimiter
+from src.single_flight import SingleFlightClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class EchoClient(BaseLLMClient):
+    """A minimal third-party client."""
+
+    provider = "echo"
+
+    def __init__(self, model="echo-1", requests_per_min=60, rate_limiter=None, prefix=""):
+        super().__init__(model, requests_per_min, rate_limiter=rate_limiter)
+        self.prefix = prefix
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        return self.prefix + prompt
+
+class TestLLMClientFactory(unittest.TestCase):
+    """Tests for the provider registry."""
+
+    def tearDown(self):
+        LLMClientFactory._providers.pop("echo", None)
+
+    def test_import_does_not_load_providers(self):
+        """Test that importing the solvers imports no provider module and configures no logging."""
+        code = (
+            "import sys, logging\n"
+            "from src.chain_of_thought import ChainOfThought\n"
+            "from src.dynamic_cot import DynamicChainOfThought\n"
+            "loaded = [name for name in ('src.openai_client', 'src.gemini_client', 'src.mock_client',\n"
+            "                            'google.generativeai', 'requests') if name in sys.modules]\n"
+            "print(loaded, logging.getLogger().handlers)\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "[] []")
+
+    def test_builtin_provider_is_loaded_on_first_use(self):
+        """Test creating a built-in client with its options passed through."""
+        client = LLMClientFactory.create_client("Mock", answer="7", rate_limiter=RateLimiter(10 ** 9))
+        self.assertIsInstance(client, SingleFlightClient)
+        self.assertIsInstance(client.client, MockClient)
+        self.assertEqual(client.model_name, "mock-model")
+        self.assertIn("FINAL_ANSWER: 7", client.generate("The final answer is:"))
+
+    def test_register_class(self):
+        """Test registering a third-party client class with its own options."""
+        LLMClientFactory.register_provider("echo", EchoClient, options=("prefix",))
+        self.assertIn("echo", LLMClientFactory.providers())
+
+        client = LLMClientFactory.create_client("echo", prefix="> ", model="echo-2", rate_limiter=RateLimiter(10 ** 9))
+
+        self.assertEqual(client.model_name, "echo-2")
+        self.assertEqual(client.generate("hi"), "> hi")
+
+    def test_register_import_path(self):
+        """Test that a provider registered by import path is imported when first created."""
+        spec = LLMClientFactory.register_provider("echo", f"{__name__}:EchoClient", requests_per_min=5)
+        self.assertIsInstance(spec.client, str)
+
+        client = LLMClientFactory.create_client("echo")
+
+        self.assertIs(spec.client, EchoClient)
+        self.assertEqual(client.model_name, "echo-1")
+        self.assertAlmostEqual(client.rate_limiter.request_bucket.rate * 60, 5)
+
+    def test_unknown_provider(self):
+        """Test that an unknown provider lists the registered ones."""
+        with self.assertRaises(ValueError) as context:
+            LLMClientFactory.create_client("nope")
+        self.assertIn("'gemini', 'mock', 'openai'", str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.metrics import MetricsRegistry
+from src.base_client import RetriesExhaustedError
+from src.mock_client import MockClient
+from src.chain_of_thought import ChainOfThought
+from src.dynamic_cot import DynamicChainOfThought
+from src.rate_limiter import RateLimiter
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests for counters, histograms and the Prometheus export."""
+
+    def test_counter_and_histogram(self):
+        """Test reading values in-process."""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("status",))
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+
+        requests.inc(status="ok")
+        requests.inc(2, status="ok")
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+
+        self.assertEqual(requests.get(status="ok"), 3)
+        self.assertEqual(requests.get(status="error"), 0)
+        state = latency.get()
+        self.assertEqual(state["count"], 3)
+        self.assertAlmostEqual(state["sum"], 5.55)
+        self.assertEqual([count for _, count in state["buckets"]], [1, 2, 3])
+
+    def test_prometheus_text(self):
+        """Test the text exposition format, including label escaping and +Inf buckets."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors.", ("error",)).inc(error='bad "quote"')
+        registry.histogram("wait_seconds", "Waits.", buckets=(1,)).observe(0.5)
+
+        text = registry.render_prometheus()
+
+        self.assertIn("# TYPE errors_total counter", text)
+        self.assertIn('errors_total{error="bad \\"quote\\""} 1', text)
+        self.assertIn('wait_seconds_bucket{le="1"} 1', text)
+        self.assertIn('wait_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("wait_seconds_sum 0.5", text)
+
+    def test_write_prometheus(self):
+        """Test writing the text page to a file."""
+        registry = MetricsRegistry()
+        registry.counter("runs_total", "Runs.").inc()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cot.prom")
+            registry.write_prometheus(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), registry.render_prometheus())
+
+class TestClientMetrics(unittest.TestCase):
+    """Tests for the metrics recorded by clients and solvers."""
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        self.labels = {"provider": "mock", "model": "mock-model"}
+
+    def test_generate_records_latency_sizes_and_retries(self):
+        """Test that one generate call records its latency, sizes, throttle wait and retries."""
+        client = MockClient(responses=["four"], rate_limit_rate=0.5, retry_delay=0, seed=1,
+                            rate_limiter=RateLimiter(10 ** 9))
+        client.generate("What is 2+2?", max_retries=20)
+
+        self.assertEqual(metrics.GENERATE_SECONDS.get(call="generate", **self.labels)["count"], 1)
+        self.assertEqual(metrics.PROMPT_CHARS.get(**self.labels), len("What is 2+2?"))
+        self.assertEqual(metrics.RESPONSE_CHARS.get(**self.labels), len("four"))
+        retries = metrics.RETRIES.get(error="MockRateLimitError", **self.labels)
+        self.assertEqual(retries, client.calls - 1)
+        self.assertEqual(metrics.RATE_LIMIT_WAIT_SECONDS.get(**self.labels)["count"], client.calls)
+
+    def test_exhausted_retries_count_as_errors(self):
+        """Test that giving up after max_retries is counted by error type."""
+        client = MockClient(failure_rate=1.0, retry_delay=0, rate_limiter=RateLimiter(10 ** 9))
+        with self.assertRaises(RetriesExhaustedError):
+            client.generate("What is 2+2?", max_retries=1)
+        self.assertEqual(metrics.ERRORS.get(error="MockServiceError", **self.labels), 1)
+
+    def test_dynamic_steps_per_solve(self):
+        """Test that the dynamic solver records its steps per solve."""
+        cot = DynamicChainOfThought(provider="mock", steps_to_answer=4, rate_limiter=RateLimiter(10 ** 9))
+        cot.solve("What is 2+2?")
+        cot.solve("What is 3+3?")
+
+        steps = metrics.SOLVE_STEPS.get(solver="DynamicChainOfThought")
+        self.assertEqual((steps["count"], steps["sum"]), (2, 8))
+        self.assertEqual(metrics.SOLVE_SECONDS.get(solver="DynamicChainOfThought")["count"], 2)
+
+    def test_fixed_solves_record_model_calls(self):
+        """Test that the fixed solver records the model calls it made, the same measure as the dynamic one."""
+        cot = ChainOfThought(provider="mock", steps_to_answer=5, rate_limiter=RateLimiter(10 ** 9))
+        cot.solve("What is 2+2?", steps=3)
+        cot.solve("What is 3+3?", steps=5, mode="single_call")
+
+        steps = metrics.SOLVE_STEPS.get(solver="ChainOfThought")
+        # Two steps and the final answer, then everything in one call
+        self.assertEqual((steps["count"], steps["sum"]), (2, 3 + 1))
+
+if __name__ == '__main__':
+    unittest.main()
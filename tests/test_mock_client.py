@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import random
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import RetriesExhaustedError
+from src.mock_client import MockClient, LatencyModel
+from src.dynamic_cot import DynamicChainOfThought
+from src.rate_limiter import RateLimiter
+
+def unlimited():
+    """A private limiter so tests don't share the factory's registry."""
+    return RateLimiter(10 ** 9)
+
+class TestMockClient(unittest.TestCase):
+    """Tests for the offline mock provider."""
+
+    def test_scripted_responses_then_rules(self):
+        """Test that scripted responses are used in order before the built-in rules."""
+        client = MockClient(responses=["first", "second"], rate_limiter=unlimited())
+        self.assertEqual(client.generate("Step 1:"), "first")
+        self.assertEqual(client.generate("Step 1:"), "second")
+        self.assertTrue(client.generate("Step 1:").startswith("Step 1:"))
+        self.assertEqual(client.calls, 3)
+
+    def test_rules_answer_after_n_steps(self):
+        """Test that steps reach the delimited answer at steps_to_answer."""
+        client = MockClient(answer="7", steps_to_answer=3, rate_limiter=unlimited())
+        self.assertNotIn("FINAL_ANSWER", client.generate("Solve it.\n\nStep 2: "))
+        self.assertIn("FINAL_ANSWER: 7 END_ANSWER", client.generate("Solve it.\n\nStep 3: "))
+        self.assertIn("FINAL_ANSWER: 7 END_ANSWER", client.generate("Question: what?"))
+
+    def test_dynamic_solver_stops_at_answer(self):
+        """Test that DynamicChainOfThought concludes after the configured number of steps."""
+        cot = DynamicChainOfThought(provider="mock", answer="12.5", steps_to_answer=4, rate_limiter=unlimited())
+        result = cot.solve("What is 25/2?")
+        self.assertEqual(len(result["reasoning_steps"]), 4)
+        self.assertEqual(result["final_answer"], "12.5")
+
+    def test_failures_are_retried_deterministically(self):
+        """Test that simulated failures are retried and the same seed gives the same calls."""
+        def run():
+            client = MockClient(failure_rate=0.3, rate_limit_rate=0.2, retry_delay=0, seed=3, rate_limiter=unlimited())
+            responses = [client.generate("Question: what?", max_retries=10) for _ in range(10)]
+            return responses, client.calls
+
+        responses, calls = run()
+        self.assertTrue(all("FINAL_ANSWER" in response for response in responses))
+        self.assertGreater(calls, 10)
+        self.assertEqual(run(), (responses, calls))
+
+    def test_exhausted_retries(self):
+        """Test that a request that always hits 429s raises RetriesExhaustedError after max_retries."""
+        client = MockClient(rate_limit_rate=1.0, retry_delay=0, rate_limiter=unlimited())
+        with self.assertRaises(RetriesExhaustedError) as raised:
+            asyncio.run(client.agenerate("Question: what?", max_retries=2))
+        self.assertTrue(str(raised.exception).startswith("Error after 2 retries: 429"))
+        self.assertEqual(client.calls, 3)
+
+    def test_stream_stops_at_delimiter(self):
+        """Test that streaming yields word chunks and ends at the stop text."""
+        client = MockClient(responses=["The value is 3. FINAL_ANSWER: 3 END_ANSWER and more"], rate_limiter=unlimited())
+        chunks = list(client.generate_stream("Question: what?", stop="END_ANSWER"))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue("".join(chunks).endswith("END_ANSWER"))
+
+class TestLatencyModel(unittest.TestCase):
+    """Tests for LatencyModel."""
+
+    def test_distributions_are_non_negative_with_expected_mean(self):
+        """Test that every distribution is non-negative and roughly centred on the mean."""
+        for distribution in LatencyModel.DISTRIBUTIONS:
+            model = LatencyModel(mean=0.1, distribution=distribution, spread=0.05)
+            rng = random.Random(0)
+            samples = [model.first_token(rng) for _ in range(2000)]
+            self.assertGreaterEqual(min(samples), 0.0)
+            self.assertAlmostEqual(sum(samples) / len(samples), 0.1, delta=0.01)
+
+    def test_per_token_latency(self):
+        """Test that per-token latency scales with the response length."""
+        model = LatencyModel(mean=0.5, per_token=0.01)
+        self.assertAlmostEqual(model.sample(random.Random(0), response_tokens=100), 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import sys
+import os
+import asyncio
+import http.server
+import json
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import RetriesExhaustedError
+from src.openai_client import OpenAIAPIError, OpenAIClient, parse_retry_after
+from src.rate_limiter import RateLimiter
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers chat completion requests from the server's script, keeping connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append({
+                "body": body,
+                "port": self.client_address[1],
+                "authorization": self.headers.get("Authorization"),
+            })
+            step = server.script.pop(0) if server.script else {}
+
+        time.sleep(step.get("delay", 0))
+        status = step.get("status", 200)
+        if status == 200 and body.get("stream"):
+            self._send_events(step.get("chunks", ["echo"]))
+            return
+        if status == 200:
+            content = step.get("content", f"echo: {body['messages'][0]['content']}")
+            payload = {"choices": [{"message": {"role": "assistant", "content": content}}]}
+        else:
+            payload = {"error": {"message": step.get("message", "stub error")}}
+        data = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in step.get("headers", {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_events(self, chunks):
+        """Send each chunk as a server-sent event, a little apart; record how many got through."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        sent = 0
+        try:
+            for chunk in chunks:
+                event = {"choices": [{"delta": {"content": chunk}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                sent += 1
+                time.sleep(0.02)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except OSError:
+            pass
+        with self.server.lock:
+            self.server.streamed.append(sent)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestOpenAIClient(unittest.TestCase):
+    """Tests for the OpenAI client against a local HTTP stub server."""
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.script = []
+        self.server.streamed = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.client = OpenAIClient(
+            api_key="test-key",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+            rate_limiter=RateLimiter(10 ** 9),
+            pool_size=4,
+            read_timeout=0.5,
+        )
+        self.client.base_delay = 0.01
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_generate(self):
+        """Test the request body, headers and response parsing."""
+        self.server.script = [{"content": "4"}]
+
+        response = self.client.generate("What is 2+2?", temperature=0.2)
+
+        self.assertEqual(response, "4")
+        request = self.server.requests[0]
+        self.assertEqual(request["authorization"], "Bearer test-key")
+        self.assertEqual(request["body"]["model"], "gpt-4o")
+        self.assertEqual(request["body"]["temperature"], 0.2)
+        self.assertEqual(request["body"]["messages"], [{"role": "user", "content": "What is 2+2?"}])
+
+    def test_connection_is_reused(self):
+        """Test that consecutive calls share one keep-alive connection."""
+        for _ in range(5):
+            self.client.generate("What is 2+2?")
+        ports = {request["port"] for request in self.server.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_retry_after_is_honoured(self):
+        """Test that a 429 is retried after the server's Retry-After delay."""
+        self.server.script = [{"status": 429, "headers": {"Retry-After": "0.2"}}, {"content": "4"}]
+
+        start = time.perf_counter()
+        response = self.client.generate("What is 2+2?")
+
+        self.assertEqual(response, "4")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_read_timeout_is_retried(self):
+        """Test that a response slower than the read timeout is abandoned and retried."""
+        self.server.script = [{"delay": 1.0}, {"content": "4"}]
+        self.assertEqual(self.client.generate("What is 2+2?"), "4")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 raises immediately with the server's message."""
+        self.server.script = [{"status": 400, "message": "bad request"}]
+
+        with self.assertRaises(OpenAIAPIError) as raised:
+            self.client.generate("What is 2+2?")
+
+        self.assertEqual(raised.exception.status, 400)
+        self.assertIn("bad request", str(raised.exception))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_retries_are_exhausted(self):
+        """Test that persistent server errors give up after max_retries."""
+        self.server.script = [{"status": 503, "headers": {"Retry-After": "0"}}] * 3
+        with self.assertRaises(RetriesExhaustedError) as raised:
+            self.client.generate("What is 2+2?", max_retries=2)
+        self.assertEqual(raised.exception.last_error.status, 503)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_generate_stream(self):
+        """Test that streamed deltas are passed through and the request is marked as streaming."""
+        self.server.script = [{"chunks": ["The answer ", "is ", "4."]}]
+
+        chunks = list(self.client.generate_stream("What is 2+2?"))
+
+        self.assertEqual(chunks, ["The answer ", "is ", "4."])
+        self.assertTrue(self.server.requests[0]["body"]["stream"])
+
+    def test_generate_stream_closes_the_response_at_stop(self):
+        """Test that the response is closed once the stop text arrives, so the server stops sending."""
+        self.server.script = [{"chunks": ["Step 1: ", "add. ", "Step 2:"] + ["more "] * 100}]
+
+        text = "".join(self.client.generate_stream("What is 2+2?", stop="Step 2:"))
+
+        self.assertEqual(text, "Step 1: add. Step 2:")
+        deadline = time.monotonic() + 5
+        while not self.server.streamed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertLess(self.server.streamed[0], 20)
+
+    def test_generate_stream_retries_before_the_first_chunk(self):
+        """Test that an error status when opening the stream is retried."""
+        self.server.script = [{"status": 503, "headers": {"Retry-After": "0"}}, {"chunks": ["4"]}]
+        self.assertEqual(list(self.client.generate_stream("What is 2+2?")), ["4"])
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_agenerate_uses_the_pool(self):
+        """Test concurrent async calls: all succeed over at most pool_size connections."""
+        self.server.script = [{"delay": 0.05} for _ in range(12)]
+
+        async def run():
+            return await asyncio.gather(*(self.client.agenerate(f"Question {n}") for n in range(12)))
+
+        responses = asyncio.run(run())
+
+        self.assertEqual(responses, [f"echo: Question {n}" for n in range(12)])
+        ports = {request["port"] for request in self.server.requests}
+        self.assertLessEqual(len(ports), 4)
+
+    def test_parse_retry_after(self):
+        """Test the Retry-After forms: seconds, an HTTP date and OpenAI's retry-after-ms."""
+        self.assertEqual(parse_retry_after({"retry-after": "3"}), 3.0)
+        self.assertEqual(parse_retry_after({"retry-after-ms": "250", "retry-after": "1"}), 0.25)
+        self.assertEqual(parse_retry_after({"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"}), 0.0)
+        self.assertIsNone(parse_retry_after({"retry-after": "soon"}))
+        self.assertIsNone(parse_retry_after({}))
+
+if __name__ == '__main__':
+    unittest.main()
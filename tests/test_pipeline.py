@@ -0,0 +1,130 @@
+import sys
+import os
+import io
+import json
+import subprocess
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline import Pipeline, load_checkpoint, read_records
+from src.rate_limiter import RateLimiter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class TestPipeline(unittest.TestCase):
+    """Tests for the streaming JSONL pipeline."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, "results.jsonl")
+
+    def pipeline(self, **kwargs):
+        return Pipeline(provider="mock", rate_limiter=RateLimiter(10 ** 9), **kwargs)
+
+    def test_read_records(self):
+        """Test JSONL objects, bare strings and blank lines."""
+        records = list(read_records(io.StringIO('{"id": 1, "question": "a"}\n\n"b"\n')))
+        self.assertEqual(records, [{"id": 1, "question": "a"}, {"question": "b"}])
+
+        with self.assertRaises(ValueError):
+            list(read_records(io.StringIO('{"prompt": "a"}\n')))
+
+    def test_results_and_per_record_options(self):
+        """Test that each record is solved with its own solver and options."""
+        records = [
+            {"id": "fixed", "question": "What is 2+2?", "expected_answer": "42"},
+            {"id": "dynamic", "question": "What is 3+3?", "solver": "dynamic", "max_steps": 2},
+            {"id": "direct", "question": "What is 4+4?", "solver": "direct", "model": "mock-other"},
+            {"id": "bad", "question": "What is 5+5?", "solver": "unknown"},
+        ]
+        counts = self.pipeline().run(records, self.output)
+
+        self.assertEqual(counts, {"solved": 3, "failed": 1, "skipped": 0})
+        results = {record["id"]: record for record in read_output(self.output)}
+        self.assertEqual(results["fixed"]["answer"], "42.0")
+        self.assertTrue(results["fixed"]["correct"])
+        self.assertEqual(len(results["fixed"]["reasoning_steps"]), 2)
+        self.assertEqual(results["dynamic"]["steps_taken"], 2)
+        self.assertEqual(results["direct"]["model"], "mock-other")
+        self.assertEqual(results["fixed"]["model"], "mock-model")
+        self.assertTrue(results["bad"]["error"].startswith("ValueError"))
+
+    def test_close_releases_the_solvers(self):
+        """Test that closing the pipeline closes the solvers it created."""
+        with self.pipeline() as pipeline:
+            pipeline.run([{"question": "What is 3+3?", "solver": "dynamic"}], self.output)
+            [solver] = pipeline._solvers.values()
+            solver.solve("What is 2+2?", max_steps=2, speculate=True)
+            self.assertIsNotNone(solver._executor)
+        self.assertIsNone(solver._executor)
+        self.assertEqual(pipeline._solvers, {})
+
+    def test_rerun_skips_finished_ids(self):
+        """Test that a rerun only solves questions that are new or ended in an error."""
+        self.pipeline().run([{"id": "a", "question": "q1"}, {"id": "b", "question": "q2", "solver": "unknown"}],
+                            self.output)
+        # Simulate a crash in the middle of writing a record
+        with open(self.output, "a", encoding="utf-8") as f:
+            f.write('{"id": "c", "quest')
+
+        records = [{"id": "a", "question": "q1"}, {"id": "b", "question": "q2"}, {"id": "c", "question": "q3"}]
+        counts = self.pipeline().run(records, self.output)
+
+        self.assertEqual(counts, {"solved": 2, "failed": 0, "skipped": 1})
+        self.assertEqual(load_checkpoint(self.output), {"a", "b", "c"})
+
+    def test_input_is_streamed(self):
+        """Test that only about `concurrency` records are read ahead of the written results."""
+        read = []
+
+        def records():
+            for index in range(200):
+                read.append(index)
+                yield {"id": str(index), "question": f"What is {index} + 1?"}
+
+        written = []
+        def on_result(record):
+            written.append(len(read))
+
+        self.pipeline(concurrency=4).run(records(), self.output, on_result=on_result)
+
+        self.assertEqual(len(written), 200)
+        self.assertLessEqual(written[0], 4)
+        self.assertTrue(all(in_flight <= index + 5 for index, in_flight in enumerate(written)))
+
+    def test_stdout_with_checkpoint(self):
+        """Test writing results to a stream while checkpointing ids to a file."""
+        checkpoint = os.path.join(self.directory, "done.jsonl")
+        stream = io.StringIO()
+        self.pipeline().run([{"id": "a", "question": "q1"}], stream, checkpoint=checkpoint)
+
+        self.assertEqual(json.loads(stream.getvalue())["id"], "a")
+        counts = self.pipeline().run([{"id": "a", "question": "q1"}], io.StringIO(), checkpoint=checkpoint)
+        self.assertEqual(counts["skipped"], 1)
+
+class TestCommandLine(unittest.TestCase):
+    """Tests for python -m chainofthought run."""
+
+    def test_run_from_stdin_to_stdout(self):
+        """Test the command end to end in a subprocess."""
+        process = subprocess.run(
+            [sys.executable, "-m", "chainofthought", "run", "--provider", "mock", "--solver", "dynamic"],
+            input='{"id": "a", "question": "What is 2+2?"}\n"What is 3+3?"\n',
+            cwd=ROOT, capture_output=True, text=True, timeout=60,
+        )
+
+        self.assertEqual(process.returncode, 0, process.stderr)
+        results = [json.loads(line) for line in process.stdout.splitlines()]
+        self.assertEqual(len(results), 2)
+        self.assertEqual({result["answer"] for result in results}, {"42"})
+        self.assertIn("Solved 2", process.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chain_of_thought import ChainOfThought
+from src.process_pool import ProcessPool, WorkerCrashedError
+
+class CrashingSolver(ChainOfThought):
+    """Kills its process on questions containing "crash"; "crash once" only until a marker file exists."""
+
+    def solve(self, question, **kwargs):
+        if "crash" in question:
+            marker = os.path.join(os.environ["CRASH_MARKER_DIR"], question.replace(" ", "_"))
+            if "once" not in question or not os.path.exists(marker):
+                open(marker, "w").close()
+                os._exit(1)
+        return super().solve(question, **kwargs)
+
+class TestProcessPool(unittest.TestCase):
+    """Tests for solving across worker processes."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["CRASH_MARKER_DIR"] = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def pool(self, **kwargs):
+        options = dict(provider="mock", workers=3, shard_size=2, mp_context="fork")
+        options.update(kwargs)
+        return ProcessPool(**options)
+
+    def test_results_in_input_order(self):
+        """Test that every question is answered and ordered=True yields in input order."""
+        questions = [f"What is {n} + {n}?" for n in range(25)]
+        with self.pool() as pool:
+            results = list(pool.solve_many(questions, ordered=True, steps=2))
+
+        self.assertEqual([index for index, _ in results], list(range(25)))
+        for index, result in results:
+            self.assertEqual(result["question"], questions[index])
+            self.assertIn("FINAL_ANSWER: 42 END_ANSWER", result["final_answer"])
+
+    def test_per_question_overrides_and_errors(self):
+        """Test per-question overrides, and that solve errors come back from the workers."""
+        questions = [{"question": "a", "steps": 3}, {"question": "b", "steps": 2}, {"question": "c", "mode": "bad"}]
+        with self.pool() as pool:
+            results = dict(pool.solve_many(questions, return_exceptions=True))
+
+        self.assertEqual(len(results[0]["reasoning_steps"]), 2)
+        self.assertEqual(len(results[1]["reasoning_steps"]), 1)
+        self.assertIsInstance(results[2], ValueError)
+
+        with self.pool() as pool:
+            with self.assertRaises(ValueError):
+                list(pool.solve_many(questions))
+
+    def test_crashed_worker_is_replaced(self):
+        """Test that a dead worker's questions are reassigned and the pool keeps its size."""
+        questions = [f"q{n}" for n in range(10)] + ["crash once"] + [f"r{n}" for n in range(10)]
+        with self.pool(solver=CrashingSolver) as pool:
+            results = dict(pool.solve_many(questions, steps=2))
+
+            self.assertEqual(sorted(results), list(range(21)))
+            self.assertEqual(results[10]["question"], "crash once")
+            self.assertEqual(pool.crashes, 1)
+
+    def test_question_that_always_crashes(self):
+        """Test that a question fails with WorkerCrashedError after max_attempts crashes."""
+        with self.pool(solver=CrashingSolver, max_attempts=2) as pool:
+            results = dict(pool.solve_many(["fine", "crash always"], return_exceptions=True))
+
+            self.assertEqual(results[0]["question"], "fine")
+            self.assertIsInstance(results[1], WorkerCrashedError)
+            self.assertEqual(pool.crashes, 2)
+
+    def test_workers_share_one_quota(self):
+        """Test that the rate limit applies to all workers together, not to each one."""
+        # 10 questions x 2 requests at 20 requests/s with no burst takes about 1 s in total;
+        # separate per-process limits would allow 3 times that rate.
+        with self.pool(requests_per_min=1200, burst=1) as pool:
+            start = time.perf_counter()
+            results = list(pool.solve_many([f"q{n}" for n in range(10)], steps=2))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), 10)
+        self.assertGreaterEqual(elapsed, 0.9)
+
+    def test_rate_limiter_instance_rejected(self):
+        """Test that a process-local rate limiter cannot be passed to workers."""
+        with self.assertRaises(ValueError):
+            ProcessPool(provider="mock", rate_limiter=object())
+
+if __name__ == '__main__':
+    unittest.main()
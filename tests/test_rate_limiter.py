@@ -0,0 +1,163 @@
+import sys
+import os
+import asyncio
+import multiprocessing
+import tempfile
+import threading
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rate_limiter import (
+    TokenBucket, FileTokenBucket, SQLiteTokenBucket, RateLimiter, FileRateLimiter, SQLiteRateLimiter,
+    get_rate_limiter, sqlite_quota_usage,
+)
+
+def _reserve_from_file_bucket(path, count, results):
+    """Worker process: reserve `count` tokens and report how many were granted without waiting."""
+    bucket = FileTokenBucket(path, rate_per_min=1, capacity=6)
+    results.put(sum(1 for _ in range(count) if bucket.reserve() == 0))
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for the TokenBucket class."""
+    
+    def test_allows_burst_up_to_capacity(self):
+        """Test that a full bucket serves `capacity` requests without waiting."""
+        bucket = TokenBucket(rate_per_min=60, capacity=3)
+        waits = [bucket.reserve() for _ in range(3)]
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+    
+    def test_queues_requests_beyond_capacity(self):
+        """Test that requests beyond the burst wait one refill interval each."""
+        bucket = TokenBucket(rate_per_min=60, capacity=1)
+        bucket.reserve()
+        self.assertAlmostEqual(bucket.reserve(), 1.0, places=1)
+        self.assertAlmostEqual(bucket.reserve(), 2.0, places=1)
+    
+    def test_concurrent_reservations_never_oversubscribe(self):
+        """Test that concurrent threads get distinct slots."""
+        bucket = TokenBucket(rate_per_min=600, capacity=5)
+        waits = []
+        lock = threading.Lock()
+        
+        def reserve():
+            wait_time = bucket.reserve()
+            with lock:
+                waits.append(wait_time)
+        
+        threads = [threading.Thread(target=reserve) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sum(1 for wait_time in waits if wait_time == 0), 5)
+        # The last of the 15 queued requests waits for 15 refills at 10 per second
+        self.assertAlmostEqual(max(waits), 1.5, places=1)
+
+class TestFileTokenBucket(unittest.TestCase):
+    """Tests for the cross-process FileTokenBucket."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "bucket")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_state_is_shared_between_instances(self):
+        """Test that two bucket objects on the same file draw from one quota."""
+        first = FileTokenBucket(self.path, rate_per_min=60, capacity=2)
+        second = FileTokenBucket(self.path, rate_per_min=60, capacity=2)
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+        self.assertAlmostEqual(first.reserve(), 1.0, places=1)
+    
+    def test_quota_is_shared_across_processes(self):
+        """Test that worker processes together get no more than the burst capacity."""
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_reserve_from_file_bucket, args=(self.path, 4, results))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        granted = sum(results.get(timeout=5) for _ in workers)
+        self.assertEqual(granted, 6)
+    
+    def test_registry_file_backend(self):
+        """Test that the registry builds file-backed limiters in the requested directory."""
+        limiter = get_rate_limiter("gemini", "key", "gemini-2.0-flash", requests_per_min=2,
+                                   backend="file", state_dir=self.tmpdir.name)
+        self.assertIsInstance(limiter, FileRateLimiter)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertTrue(os.listdir(self.tmpdir.name))
+
+class TestSQLiteTokenBucket(unittest.TestCase):
+    """Tests for the SQLite-backed SQLiteTokenBucket."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "quotas.sqlite")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_state_is_shared_and_accounted(self):
+        """Test that two buckets on the same row draw from one quota, and usage is counted."""
+        first = SQLiteTokenBucket(self.path, "openai.requests", rate_per_min=60, capacity=2)
+        second = SQLiteTokenBucket(self.path, "openai.requests", rate_per_min=60, capacity=2)
+        other = SQLiteTokenBucket(self.path, "gemini.requests", rate_per_min=60, capacity=2)
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+        self.assertEqual(other.reserve(), 0.0)
+        self.assertAlmostEqual(first.reserve(), 1.0, places=1)
+        
+        self.assertEqual(sqlite_quota_usage(self.path), {"gemini.requests": 1, "openai.requests": 3})
+    
+    def test_registry_sqlite_backend(self):
+        """Test that the registry builds SQLite-backed limiters on the given database."""
+        limiter = get_rate_limiter("gemini", "key", "gemini-2.0-flash", requests_per_min=2, tokens_per_min=100,
+                                   backend="sqlite", state_dir=self.path)
+        self.assertIsInstance(limiter, SQLiteRateLimiter)
+        self.assertEqual(limiter.acquire(tokens=10), 0.0)
+        usage = sqlite_quota_usage(self.path)
+        self.assertEqual(sorted(usage.values()), [1, 10])
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests for the RateLimiter class and the shared registry."""
+    
+    def test_token_limit_applies_separately(self):
+        """Test that the tokens-per-minute quota can be the binding limit."""
+        limiter = RateLimiter(requests_per_min=6000, tokens_per_min=600)
+        self.assertEqual(limiter._reserve(600), 0.0)
+        self.assertAlmostEqual(limiter._reserve(60), 6.0, places=1)
+    
+    def test_record_tokens_delays_next_request(self):
+        """Test that response tokens charged after a call delay the next one."""
+        limiter = RateLimiter(requests_per_min=6000, tokens_per_min=600)
+        limiter.record_tokens(600)
+        self.assertGreater(limiter._reserve(10), 0.0)
+    
+    def test_acquire_async(self):
+        """Test that the async wait returns immediately when tokens are available."""
+        limiter = RateLimiter(requests_per_min=60)
+        self.assertEqual(asyncio.run(limiter.acquire_async()), 0.0)
+    
+    def test_registry_shares_limiter_per_key(self):
+        """Test that clients on the same provider, key and model share one limiter."""
+        first = get_rate_limiter("openai", "key-a", "gpt-4o", requests_per_min=20)
+        second = get_rate_limiter("openai", "key-a", "gpt-4o", requests_per_min=20)
+        other_key = get_rate_limiter("openai", "key-b", "gpt-4o", requests_per_min=20)
+        other_model = get_rate_limiter("openai", "key-a", "gpt-4o-mini", requests_per_min=20)
+        
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_key)
+        self.assertIsNot(first, other_model)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import sys
+import os
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.reasoning_context import ReasoningContext, context_budget_for_model, DEFAULT_CONTEXT_BUDGET
+from src.tokens import estimate_tokens
+
+def make_step(number, padding=400):
+    """A reasoning step with one numeric fact and a lot of filler text."""
+    filler = "I am carefully considering the situation described in the problem. " * (padding // 70)
+    return f"Step {number}: {filler}The width is {number * 10} cm."
+
+class TestReasoningContext(unittest.TestCase):
+    """Tests for the ReasoningContext class."""
+    
+    def test_short_reasoning_is_kept_verbatim(self):
+        """Test that reasoning under budget is rendered unchanged."""
+        steps = ["Step 1: the width is 4.", "Step 2: the area is 36."]
+        context = ReasoningContext.from_steps(steps, budget_tokens=1000)
+        self.assertEqual(context.render(), "\n\n".join(steps))
+    
+    def test_long_reasoning_stays_within_budget(self):
+        """Test that rendered reasoning stays bounded however many steps are added."""
+        context = ReasoningContext(budget_tokens=300)
+        for number in range(1, 30):
+            context.add_step(make_step(number))
+            self.assertLessEqual(estimate_tokens(context.render()), 300)
+    
+    def test_older_steps_keep_key_facts(self):
+        """Test that compacted steps keep their numbers and step 1 stays pinned."""
+        steps = [make_step(number) for number in range(1, 8)]
+        rendered = ReasoningContext.from_steps(steps, budget_tokens=300).render()
+        
+        self.assertIn("Key facts from earlier steps:", rendered)
+        self.assertIn("- Step 1: The width is 10 cm.", rendered)
+        # The newest step is always verbatim
+        self.assertTrue(rendered.endswith(steps[-1]))
+        # Filler text from compacted steps is dropped
+        self.assertLess(rendered.count("carefully considering"), sum(step.count("carefully considering") for step in steps))
+    
+    def test_budget_per_model(self):
+        """Test that unknown models get the default budget."""
+        self.assertEqual(context_budget_for_model("some-new-model"), DEFAULT_CONTEXT_BUDGET)
+        self.assertNotEqual(context_budget_for_model("gemini-2.0-flash"), DEFAULT_CONTEXT_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
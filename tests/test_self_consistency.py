@@ -0,0 +1,88 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_client import draws_must_be_independent
+from src.self_consistency import solve_self_consistent
+
+class ScriptedSolver:
+    """Stand-in solver whose chains finish after scripted delays with scripted answers."""
+    
+    def __init__(self, script):
+        self.script = list(script)
+        self.finished = 0
+        self.cancelled = 0
+        self.independent = []
+    
+    async def solve_async(self, question, temperature=0.7, **kwargs):
+        delay, answer = self.script.pop(0)
+        self.independent.append(draws_must_be_independent())
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.finished += 1
+        if isinstance(answer, Exception):
+            raise answer
+        return {"question": question, "reasoning_steps": [], "final_answer": answer}
+
+class TestSelfConsistency(unittest.TestCase):
+    """Tests for self-consistency voting."""
+    
+    def test_equivalent_numeric_answers_vote_together(self):
+        """Test that fractions, decimals and delimited answers are normalized before voting."""
+        solver = ScriptedSolver([
+            (0, "FINAL_ANSWER: 0.67 END_ANSWER"),
+            (0, "The probability is 2/3"),
+            (0, "FINAL_ANSWER: 0.5 END_ANSWER"),
+        ])
+        
+        result = solve_self_consistent(solver, "Monty Hall?", k=3, quorum=3)
+        
+        self.assertEqual(len(result["votes"]), 2)
+        self.assertEqual(max(result["votes"].values()), 2)
+        self.assertAlmostEqual(float(result["final_answer"]), 0.67, places=2)
+    
+    def test_quorum_cancels_remaining_chains(self):
+        """Test that slow chains are cancelled once a quorum agrees."""
+        solver = ScriptedSolver([(0.01, "FINAL_ANSWER: 4 END_ANSWER")] * 3 + [(5, "FINAL_ANSWER: 5 END_ANSWER")] * 2)
+        
+        result = solve_self_consistent(solver, "What is 2+2?", k=5)
+        
+        self.assertEqual(result["final_answer"], "4.0")
+        self.assertEqual(result["chains_cancelled"], 2)
+        self.assertEqual(solver.cancelled, 2)
+        self.assertEqual(result["agreement"], 1.0)
+    
+    def test_failed_chains_are_skipped(self):
+        """Test that a failing chain does not abort the vote."""
+        solver = ScriptedSolver([(0, RuntimeError("quota")), (0, "4"), (0, "4")])
+        result = solve_self_consistent(solver, "What is 2+2?", k=3, quorum=2)
+        self.assertEqual(result["final_answer"], "4")
+        self.assertEqual(result["chains_failed"], 1)
+    
+    def test_k_must_be_positive(self):
+        """Test that k=0 is rejected with a clear error instead of an IndexError."""
+        with self.assertRaises(ValueError) as raised:
+            solve_self_consistent(ScriptedSolver([]), "What is 2+2?", k=0)
+        self.assertIn("k=0", str(raised.exception))
+    
+    def test_every_chain_failing_raises_the_first_error(self):
+        """Test that the vote fails with a chain's own error when no chain completes."""
+        solver = ScriptedSolver([(0, RuntimeError("quota"))] * 2)
+        with self.assertRaises(RuntimeError):
+            solve_self_consistent(solver, "What is 2+2?", k=2)
+    
+    def test_chains_run_as_independent_draws(self):
+        """Test that chains are marked as independent samples for caching layers."""
+        solver = ScriptedSolver([(0, "4")] * 3)
+        solve_self_consistent(solver, "What is 2+2?", k=3)
+        self.assertEqual(solver.independent, [True, True, True])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import asyncio
+import contextvars
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import metrics
+from src.base_client import independent_draws
+from src.chain_of_thought import ChainOfThought
+from src.llm_client_factory import LLMClientFactory
+from src.mock_client import LatencyModel
+from src.rate_limiter import RateLimiter
+from src.single_flight import InFlightRequests, SingleFlightClient
+
+class SlowClient:
+    """Counts calls and answers after a delay; prompts starting with "fail" raise."""
+
+    provider = "slow"
+    model_name = "slow-model"
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    def effective_prompt(self, prompt, **kwargs):
+        return prompt
+
+    def generate(self, prompt, temperature=0.7, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if prompt.startswith("fail"):
+            raise RuntimeError("upstream failure")
+        return f"response {self.calls} to {prompt}"
+
+    async def agenerate(self, prompt, temperature=0.7, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if prompt.startswith("fail"):
+            raise RuntimeError("upstream failure")
+        return f"response {self.calls} to {prompt}"
+
+def generate_concurrently(client, prompts, **kwargs):
+    """Call client.generate() for each prompt on its own thread, in the caller's context; return responses or errors."""
+    results = [None] * len(prompts)
+
+    def call(index):
+        try:
+            results[index] = client.generate(prompts[index], **kwargs)
+        except Exception as e:
+            results[index] = e
+
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(call, index)) for index in range(len(prompts))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class TestSingleFlightClient(unittest.TestCase):
+    """Tests for coalescing identical in-flight requests."""
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        self.upstream = SlowClient()
+        self.client = SingleFlightClient(self.upstream, InFlightRequests())
+
+    def test_identical_requests_share_one_call(self):
+        """Test that concurrent identical requests get one upstream call and the same response."""
+        results = generate_concurrently(self.client, ["p"] * 6 + ["q"], temperature=0)
+
+        self.assertEqual(self.upstream.calls, 2)
+        self.assertEqual(len(set(results[:6])), 1)
+        self.assertNotEqual(results[6], results[0])
+        self.assertEqual(metrics.COALESCED_REQUESTS.get(provider="slow", model="slow-model"), 5)
+
+        # Nothing is kept once the request has finished
+        self.client.generate("p", temperature=0)
+        self.assertEqual(self.upstream.calls, 3)
+
+    def test_temperature_and_options_are_part_of_the_key(self):
+        """Test that requests differing in temperature or options are sent separately."""
+        generate_concurrently(self.client, ["p", "p"], temperature=0)
+        self.upstream.calls = 0
+
+        def call(temperature, **kwargs):
+            return lambda: self.client.generate("p", temperature=temperature, **kwargs)
+
+        threads = [threading.Thread(target=call(0)), threading.Thread(target=call(0.7)),
+                   threading.Thread(target=call(0, max_tokens=5))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.upstream.calls, 3)
+
+    def test_errors_are_shared(self):
+        """Test that every waiting caller gets the upstream error."""
+        results = generate_concurrently(self.client, ["fail"] * 4)
+
+        self.assertEqual(self.upstream.calls, 1)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_independent_draws_opt_out(self):
+        """Test that sampling runs inside independent_draws() each call upstream."""
+        with independent_draws():
+            generate_concurrently(self.client, ["p"] * 4)
+        self.assertEqual(self.upstream.calls, 4)
+
+    def test_async_requests_share_one_call(self):
+        """Test coalescing of concurrent agenerate() calls on one event loop."""
+        async def run():
+            return await asyncio.gather(*(self.client.agenerate("p", temperature=0) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(self.upstream.calls, 1)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_cancelling_one_caller_keeps_the_request(self):
+        """Test that the request survives its first caller's cancellation, and stops when all are cancelled."""
+        async def run():
+            leader = asyncio.ensure_future(self.client.agenerate("p"))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(self.client.agenerate("p"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            response = await follower
+
+            abandoned = [asyncio.ensure_future(self.client.agenerate("q")) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for task in abandoned:
+                task.cancel()
+            await asyncio.gather(*abandoned, return_exceptions=True)
+            await asyncio.sleep(0)
+            return response
+
+        self.assertEqual(asyncio.run(run()), "response 1 to p")
+        self.assertEqual(self.upstream.calls, 2)
+        self.assertEqual(self.upstream.cancelled, 1)
+        self.assertEqual(len(self.client.registry), 0)
+
+class TestFactoryCoalescing(unittest.TestCase):
+    """Tests for the factory's coalesce option."""
+
+    def test_separate_solvers_coalesce(self):
+        """Test that two solvers on the same model share identical requests, unless coalesce=False."""
+        async def solve_pair(**kwargs):
+            limiter = RateLimiter(10 ** 9)
+            solvers = [
+                ChainOfThought(provider="mock", latency=LatencyModel(0.05), rate_limiter=limiter, **kwargs)
+                for _ in range(2)
+            ]
+            await asyncio.gather(*(cot.solve_async("What is 2+2?", steps=3, temperature=0) for cot in solvers))
+            return sum(cot.client.calls for cot in solvers)
+
+        self.assertEqual(asyncio.run(solve_pair()), 3)
+        self.assertEqual(asyncio.run(solve_pair(coalesce=False)), 6)
+
+    def test_layering(self):
+        """Test that the cache sits in front of single-flight."""
+        client = LLMClientFactory.create_client("mock", cache=":memory:", rate_limiter=RateLimiter(10 ** 9))
+        self.assertIsInstance(client.client, SingleFlightClient)
+
+if __name__ == '__main__':
+    unittest.main()
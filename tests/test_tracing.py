@@ -0,0 +1,126 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import tracing
+from src.tracing import Tracer
+from src.chain_of_thought import ChainOfThought
+from src.mock_client import MockClient
+from src.rate_limiter import RateLimiter
+
+class TestTracer(unittest.TestCase):
+    """Tests for span nesting and the Chrome trace export."""
+
+    def test_disabled_tracer_records_nothing(self):
+        """Test that spans are no-ops until the tracer is enabled."""
+        tracer = Tracer()
+        with tracer.span("solve") as span:
+            span.set(steps=3)
+        self.assertIs(span, tracing._NULL_SPAN)
+        self.assertEqual(tracer.spans(), [])
+
+    def test_nested_spans_share_a_track(self):
+        """Test that child spans land on their root span's track and roots get separate tracks."""
+        tracer = Tracer()
+        tracer.enable()
+        with tracer.span("solve"):
+            with tracer.span("step", step=1):
+                pass
+        with tracer.span("solve"):
+            pass
+
+        spans = {(name, track) for name, _, _, track, _ in tracer.spans()}
+        self.assertEqual(spans, {("step", 1), ("solve", 1), ("solve", 2)})
+
+    def test_error_attribute(self):
+        """Test that an exception leaving a span is recorded on it."""
+        tracer = Tracer()
+        tracer.enable()
+        with self.assertRaises(ValueError):
+            with tracer.span("generate"):
+                raise ValueError("boom")
+        self.assertEqual(tracer.spans()[0][4]["error"], "ValueError")
+
+    def test_chrome_trace_export(self):
+        """Test the exported file: complete events plus track names."""
+        tracer = Tracer()
+        tracer.enable()
+        with tracer.span("solve", question=object()):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.trace.json")
+            tracer.export_chrome_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+
+        metadata = [event for event in events if event["ph"] == "M"]
+        complete = [event for event in events if event["ph"] == "X"]
+        self.assertEqual(metadata[0]["args"]["name"], "solve 1")
+        self.assertEqual(complete[0]["name"], "solve")
+        self.assertGreaterEqual(complete[0]["dur"], 0)
+        self.assertIsInstance(complete[0]["args"]["question"], str)
+
+class TestSolverTracing(unittest.TestCase):
+    """Tests for the spans recorded by solvers and clients."""
+
+    def setUp(self):
+        tracing.TRACER.clear()
+        tracing.TRACER.enable()
+
+    def tearDown(self):
+        tracing.TRACER.disable()
+        tracing.TRACER.clear()
+
+    def test_solve_nesting(self):
+        """Test that a solve is broken down into steps, generate calls and provider calls."""
+        cot = ChainOfThought(provider="mock", rate_limiter=RateLimiter(10 ** 9))
+        cot.solve("What is 2+2?", steps=3)
+
+        spans = tracing.TRACER.spans()
+        names = [name for name, _, _, _, _ in spans]
+        self.assertEqual(names.count("solve"), 1)
+        self.assertEqual(names.count("step"), 3)
+        self.assertEqual(names.count("generate"), 3)
+        self.assertEqual(names.count("provider_call"), 3)
+        self.assertEqual(len({track for _, _, _, track, _ in spans}), 1)
+
+        solve = next(span for span in spans if span[0] == "solve")
+        for name, start, end, _, _ in spans:
+            self.assertGreaterEqual(start, solve[1])
+            self.assertLessEqual(end, solve[2])
+
+    def test_concurrent_solves_get_separate_tracks(self):
+        """Test that concurrent async solves are drawn on separate tracks."""
+        cot = ChainOfThought(provider="mock", rate_limiter=RateLimiter(10 ** 9))
+
+        async def run():
+            await asyncio.gather(*(cot.solve_async(f"What is {n}+{n}?", steps=1) for n in range(3)))
+
+        asyncio.run(run())
+
+        spans = tracing.TRACER.spans()
+        solve_tracks = {track for name, _, _, track, _ in spans if name == "solve"}
+        self.assertEqual(len(solve_tracks), 3)
+        for name, _, _, track, _ in spans:
+            self.assertIn(track, solve_tracks)
+
+    def test_retries_show_as_backoff_spans(self):
+        """Test that each failed attempt and backoff is visible in the trace."""
+        client = MockClient(responses=["four"], failure_rate=0.5, retry_delay=0, seed=3,
+                            rate_limiter=RateLimiter(10 ** 9))
+        client.generate("What is 2+2?", max_retries=20)
+
+        spans = tracing.TRACER.spans()
+        names = [name for name, _, _, _, _ in spans]
+        self.assertEqual(names.count("provider_call"), client.calls)
+        self.assertEqual(names.count("backoff"), client.calls - 1)
+        self.assertEqual(names.count("rate_limit_wait"), client.calls)
+
+if __name__ == '__main__':
+    unittest.main()
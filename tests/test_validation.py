@@ -0,0 +1,83 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.validation import ValidationRunner, load_problems, load_results, problem_id, summarize
+from src.rate_limiter import RateLimiter
+
+PROBLEMS = [
+    {"id": "p1", "question": "What is 6 * 7?", "expected_answer": "42"},
+    {"id": "p2", "question": "What is 40 + 3?", "expected_answer": "43"},
+    {"question": "What is 84 / 2?", "expected_answer": "42"},
+]
+
+class TestValidationRunner(unittest.TestCase):
+    """Tests for the concurrent, resumable validation runner."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, "results.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_runner(self, **kwargs):
+        return ValidationRunner(provider="mock", answer="42", rate_limiter=RateLimiter(10 ** 9), **kwargs)
+
+    def test_every_pair_is_recorded(self):
+        """Test that each (problem, method) pair produces one JSONL record."""
+        records = self.make_runner().run(PROBLEMS, self.output)
+
+        self.assertEqual(len(records), 9)
+        with open(self.output) as f:
+            self.assertEqual(len(f.readlines()), 9)
+        summary = summarize(records.values())
+        for method in ("dynamic_cot", "fixed_cot", "regular"):
+            self.assertEqual(summary[method], {"passed": 2, "failed": 1, "errors": 0})
+
+    def test_resume_skips_completed_pairs(self):
+        """Test that a rerun only solves pairs missing from the results file."""
+        self.make_runner(methods=("regular",)).run(PROBLEMS[:2], self.output)
+
+        runner = self.make_runner(methods=("regular",))
+        records = runner.run(PROBLEMS, self.output)
+
+        self.assertEqual(runner.client.calls, 1)
+        self.assertEqual(len(records), 3)
+
+    def test_partial_last_line_is_ignored(self):
+        """Test that an interrupted write does not break resuming."""
+        self.make_runner(methods=("regular",)).run(PROBLEMS[:1], self.output)
+        with open(self.output, "a") as f:
+            f.write('{"id": "p2", "method": "reg')
+
+        self.make_runner(methods=("regular",)).run(PROBLEMS, self.output)
+
+        records = load_results(self.output)
+        self.assertEqual(set(records), {(problem_id(problem), "regular") for problem in PROBLEMS})
+
+    def test_errors_are_retried_on_resume(self):
+        """Test that pairs that exhausted their retries are recorded as errors and rerun later."""
+        failing = ValidationRunner(provider="mock", methods=("regular",), rate_limit_rate=1.0, retry_delay=0,
+                                   rate_limiter=RateLimiter(10 ** 9))
+        records = failing.run(PROBLEMS[:1], self.output)
+        self.assertTrue(records[("p1", "regular")]["error"].startswith("RetriesExhaustedError: Error after 5 retries"))
+
+        records = self.make_runner(methods=("regular",)).run(PROBLEMS[:1], self.output)
+        self.assertTrue(records[("p1", "regular")]["correct"])
+
+    def test_load_problems_from_jsonl(self):
+        """Test reading an external problem set."""
+        path = os.path.join(self.directory.name, "problems.jsonl")
+        with open(path, "w") as f:
+            for problem in PROBLEMS:
+                f.write(json.dumps(problem) + "\n")
+        self.assertEqual(list(load_problems(path)), PROBLEMS)
+
+if __name__ == '__main__':
+    unittest.main()
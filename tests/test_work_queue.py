@@ -0,0 +1,192 @@
+import sys
+import os
+import io
+import json
+import multiprocessing
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mock_client import LatencyModel
+from src.work_queue import QueueWorker, WorkQueue
+from chainofthought.__main__ import main
+
+def _work(path, worker_id):
+    """Worker process: solve jobs from the queue at `path` with the mock provider."""
+    QueueWorker(WorkQueue(path), worker_id=worker_id, provider="mock", concurrency=4).run()
+
+class TestWorkQueue(unittest.TestCase):
+    """Tests for leasing, completing and retrying jobs."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "queue.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_add_is_idempotent(self):
+        """Test that jobs are keyed by id and take the given options as defaults."""
+        queue = WorkQueue(self.path)
+        records = [{"id": "a", "question": "q1"}, {"id": "b", "question": "q2", "solver": "direct"}]
+
+        self.assertEqual(queue.add(records, solver="dynamic", model=None), 2)
+        self.assertEqual(queue.add(records + [{"question": "q3"}]), 1)
+        self.assertEqual(queue.counts(), {"pending": 3, "leased": 0, "done": 0, "failed": 0})
+
+        jobs = {job["id"]: job for job in queue.lease("w1", count=5)}
+        self.assertEqual(jobs["a"]["solver"], "dynamic")
+        self.assertEqual(jobs["b"]["solver"], "direct")
+        self.assertNotIn("model", jobs["a"])
+        with self.assertRaises(ValueError):
+            queue.add(records, bogus=1)
+
+    def test_one_question_under_several_configurations(self):
+        """Test that jobs without an id are keyed by question and resolved solver configuration."""
+        queue = WorkQueue(self.path)
+        question = "What is 2+2?"
+
+        self.assertEqual(queue.add([{"question": question}], solver="fixed"), 1)
+        self.assertEqual(queue.add([{"question": question}], solver="dynamic"), 1)
+        # Leaving an option unset is the same as giving its default
+        self.assertEqual(queue.add([{"question": question}]), 0)
+        self.assertEqual(queue.add([{"question": question, "solver": "dynamic", "steps": 3}]), 0)
+
+        jobs = queue.lease("w1", count=5)
+        self.assertEqual(sorted(job["solver"] for job in jobs), ["dynamic", "fixed"])
+        self.assertEqual(len({job["id"] for job in jobs}), 2)
+
+    def test_expired_lease_moves_to_another_worker(self):
+        """Test that a job is leased again once its worker stops renewing it."""
+        queue = WorkQueue(self.path, lease_duration=0.05)
+        queue.add([{"id": "a", "question": "q"}])
+
+        self.assertEqual(len(queue.lease("w1")), 1)
+        self.assertEqual(queue.lease("w2"), [])
+        time.sleep(0.1)
+        self.assertEqual(len(queue.lease("w2")), 1)
+
+        # The first worker's late result is dropped; the new holder's is kept
+        self.assertFalse(queue.complete("w1", {"id": "a", "error": None}))
+        self.assertEqual(queue.renew("w1", ["a"]), 0)
+        self.assertTrue(queue.complete("w2", {"id": "a", "answer": "42", "error": None}))
+        self.assertEqual(list(queue.results()), [{"id": "a", "answer": "42", "error": None}])
+
+    def test_errors_are_retried_up_to_max_attempts(self):
+        """Test that errored and expired jobs fail after max_attempts leases."""
+        queue = WorkQueue(self.path, lease_duration=0.05, max_attempts=2)
+        queue.add([{"id": "a", "question": "q1"}, {"id": "b", "question": "q2"}])
+
+        for _ in range(2):
+            [job] = queue.lease("w1")
+            queue.complete("w1", {"id": job["id"], "error": "boom"})
+        self.assertEqual(queue.counts()["failed"], 1)
+
+        for _ in range(2):
+            self.assertEqual(len(queue.lease("w1")), 1)
+            time.sleep(0.1)
+        self.assertEqual(queue.lease("w1"), [])
+        failed = {result["id"]: result for result in queue.results("failed")}
+        self.assertEqual(failed["a"]["error"], "boom")
+        self.assertIn("Lease expired", failed["b"]["error"])
+
+    def test_release_keeps_attempts(self):
+        """Test that released jobs go back to pending without using up an attempt."""
+        queue = WorkQueue(self.path, max_attempts=1)
+        queue.add([{"id": "a", "question": "q"}])
+        queue.lease("w1")
+        queue.release("w1", ["a"])
+
+        [job] = queue.lease("w2")
+        self.assertTrue(queue.complete("w2", {"id": job["id"], "error": "boom"}))
+        self.assertEqual(queue.counts()["failed"], 1)
+
+class TestQueueWorker(unittest.TestCase):
+    """Tests for workers solving jobs from a shared queue."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "queue.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_workers_in_several_processes(self):
+        """Test that processes share the jobs, solve each once and account for the quota."""
+        queue = WorkQueue(self.path)
+        queue.add({"id": str(n), "question": f"What is {n} + {n}?"} for n in range(30))
+        queue.add([{"id": "dynamic", "question": "What is 1 + 1?", "solver": "dynamic"}])
+
+        workers = [
+            multiprocessing.get_context("fork").Process(target=_work, args=(self.path, f"worker-{n}"))
+            for n in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+
+        self.assertEqual(queue.counts(), {"pending": 0, "leased": 0, "done": 31, "failed": 0})
+        results = list(queue.results())
+        self.assertEqual(sorted(result["id"] for result in results), sorted([str(n) for n in range(30)] + ["dynamic"]))
+        self.assertEqual({result["answer"] for result in results}, {"42.0", "42"})
+        # Every solve here takes 3 requests, all drawn from the one quota kept in the queue file
+        [(name, used)] = queue.quota_usage().items()
+        self.assertTrue(name.startswith("mock-default-mock-model"))
+        self.assertEqual(used, 31 * 3)
+
+    def test_dead_workers_jobs_are_retried(self):
+        """Test that a live worker waits for and picks up jobs leased by a dead one."""
+        queue = WorkQueue(self.path, lease_duration=0.2)
+        queue.add({"question": f"q{n}"} for n in range(5))
+        queue.lease("dead-worker", count=2)
+
+        counts = QueueWorker(WorkQueue(self.path, lease_duration=0.2), provider="mock", poll_interval=0.05).run()
+
+        self.assertEqual(counts, {"solved": 5, "failed": 0})
+        self.assertEqual(queue.counts()["done"], 5)
+
+    def test_long_jobs_keep_their_lease(self):
+        """Test that a worker renews leases while a job runs longer than the lease."""
+        queue = WorkQueue(self.path, lease_duration=0.15)
+        queue.add([{"question": "slow"}])
+        worker = QueueWorker(WorkQueue(self.path, lease_duration=0.15), provider="mock", latency=LatencyModel(0.2))
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+
+        time.sleep(0.3)
+        self.assertEqual(queue.lease("other"), [])
+        thread.join()
+        self.assertEqual(queue.counts()["done"], 1)
+
+class TestQueueCommandLine(unittest.TestCase):
+    """Tests for python -m chainofthought queue."""
+
+    def test_add_work_status_results(self):
+        """Test the queue commands end to end."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.sqlite")
+            questions = os.path.join(directory, "questions.jsonl")
+            with open(questions, "w") as f:
+                f.write('{"id": "a", "question": "What is 2+2?"}\n"What is 3+3?"\n')
+
+            self.assertEqual(main(["queue", "add", path, questions, "--solver", "dynamic"]), 0)
+            self.assertEqual(main(["queue", "work", path, "--provider", "mock", "--worker-id", "w1"]), 0)
+            status = io.StringIO()
+            with redirect_stdout(status):
+                main(["queue", "status", path])
+            output = os.path.join(directory, "results.jsonl")
+            main(["queue", "results", path, "-o", output])
+
+            self.assertEqual(json.loads(status.getvalue())["jobs"]["done"], 2)
+            with open(output) as f:
+                results = [json.loads(line) for line in f]
+            self.assertEqual([result["solver"] for result in results], ["dynamic", "dynamic"])
+
+if __name__ == '__main__':
+    unittest.main()